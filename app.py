@@ -1,25 +1,25 @@
 from flask import Flask, redirect, request, render_template, url_for, session, make_response, jsonify, flash
-from flask_s3 import FlaskS3, create_all
-import argparse
-from datetime import datetime
-from pytz import timezone
-from functools import wraps
 import time
-import boto3
-from botocore.exceptions import ClientError
-from flask_cognito_auth import CognitoAuthManager, login_handler, logout_handler, callback_handler
-import os
-from typing import Dict
-import json
 from flask_cors import CORS
+# Heavy or optional modules (boto3, openai, PIL, requests, flask_s3, cognito) are imported by the
+# code that uses them, see hooks/check-import-budget.py
+
+from integrations.scishield.app_resources import resource_status, startup_timings
+from integrations.scishield.image_buffer import InMemoryUploadRequest
 
 app = Flask(__name__)
+# Label image uploads are parsed into memory instead of spooled temp files
+app.request_class = InMemoryUploadRequest
 cors = CORS(app)
 
-from integrations.scishield.scishield_routes import scishield_bp
+# Blueprints only import code here; secrets and AWS clients are created on first use
+with startup_timings.timed("import chem-snap"):
+    from integrations.scishield.scishield_routes import scishield_bp
 app.register_blueprint(scishield_bp, url_prefix='/chem-snap')
-from integrations.scishield.scishield_routes2 import scishield_bp2
+with startup_timings.timed("import chemical_classification"):
+    from integrations.scishield.scishield_routes2 import scishield_bp2
 app.register_blueprint(scishield_bp2, url_prefix='/chemical_classification')
+startup_timings.record("app ready", time.perf_counter() - startup_timings.started)
 
 # Basic test endpoint
 @app.route("/", methods=["GET"])
@@ -31,5 +31,12 @@ def test_endpoint():
     extention2- chemical_classification/docs '''
 
 
+
+# Health check - never triggers secret fetches or client creation
+@app.route("/health", methods=["GET"])
+def health_endpoint():
+    return jsonify({"status": "ok", **resource_status()})
+
+
 if __name__ == "__main__":
     app.run()#host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,99 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Repository root, so `import app` resolves regardless of the working directory
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay out of the import path of `app`; the routes that need them import them lazily
+FORBIDDEN_MODULES = ["openai", "PIL", "requests", "boto3", "flask_s3", "flask_cognito_auth", "httpx", "botocore.auth"]
+
+
+def profile_import(module: str) -> Tuple[int, Dict[str, int], List[str]]:
+    """
+    Import a module in a fresh interpreter with ``-X importtime``.
+
+    Args:
+        module (str): The module to import, e.g. "app".
+
+    Returns:
+        Tuple[int, Dict[str, int], List[str]]: The module's cumulative import time in microseconds,
+        the cumulative time of every top-level package it pulled in, and the names in ``sys.modules``
+        after the import.
+    """
+    code = f"import sys, {module}; print('\\n'.join(sorted(sys.modules)))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    total = 0
+    packages: Dict[str, int] = {}
+    nested: List[Tuple[str, int]] = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if depth > 0:
+            nested.append((name, int(cumulative)))
+            continue
+        # Children are printed before their parent, so ``nested`` now holds everything ``name`` pulled in
+        if name == module:
+            total = int(cumulative)
+            for child, child_cumulative in nested:
+                root = child.split(".")[0]
+                packages[root] = max(packages.get(root, 0), child_cumulative)
+        nested = []
+    return total, packages, result.stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and enforce the import-time budget of the Flask app.")
+    parser.add_argument("--module", default="app", help="Module to profile (default: app)")
+    parser.add_argument("--max-ms", type=float, default=600.0, help="Budget for the median import time in ms")
+    parser.add_argument("--max-modules", type=int, default=500, help="Budget for the number of loaded modules")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to time; the median is compared")
+    parser.add_argument("--top", type=int, default=15, help="Slowest packages to list")
+    args = parser.parse_args()
+
+    try:
+        runs = [profile_import(args.module) for _ in range(max(args.runs, 1))]
+        median_ms = statistics.median(total for total, _, _ in runs) / 1000
+        _, packages, modules = runs[-1]
+
+        print(f"import {args.module}: {median_ms:.0f} ms (median of {len(runs)}), {len(modules)} modules")
+        print("Slowest packages (cumulative ms):")
+        for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"  {cumulative / 1000:8.1f}  {name}")
+
+        failures = []
+        if median_ms > args.max_ms:
+            failures.append(f"import time {median_ms:.0f} ms exceeds budget of {args.max_ms:.0f} ms")
+        if len(modules) > args.max_modules:
+            failures.append(f"{len(modules)} modules exceeds budget of {args.max_modules}")
+        loaded = [name for name in FORBIDDEN_MODULES if name in modules]
+        if loaded:
+            failures.append(f"heavy modules imported at startup: {', '.join(loaded)}")
+
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if not failures:
+            print("Import budget OK")
+        return not failures
+
+    except Exception as e:
+        print(e)
+        print("Something went wrong profiling the app imports")
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,157 @@
+# integrations/scishield/app_resources.py
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Secrets Manager secret shared by both blueprints
+SECRETS_NAME = os.environ.get("APP_SECRETS_NAME", "labtools-dev")
+SECRETS_REGION = os.environ.get("APP_SECRETS_REGION", "us-east-1")
+SECRETS_ENVIRONMENT = os.environ.get("APP_SECRETS_ENVIRONMENT", "dev")
+# Seconds a fetched secret is reused before it is fetched again
+SECRETS_TTL = float(os.environ.get("APP_SECRETS_TTL", "300"))
+
+
+class StartupTimings:
+    """
+    Cold-start timing breakdown: how long each one-off initialization stage took
+    (blueprint imports, first secret fetch, Bedrock client construction, ...).
+
+    Only the first run of a stage is recorded, so later refreshes do not hide the cold-start cost.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the duration of ``stage`` unless it was already recorded."""
+        with self._lock:
+            if stage not in self.stages:
+                self.stages[stage] = round(seconds * 1000, 1)
+                logger.info(f"Startup stage {stage} took {self.stages[stage]} ms")
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """Context manager recording the duration of its block as ``stage``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def report(self) -> Dict[str, Any]:
+        """Return the process uptime and the per-stage durations in milliseconds."""
+        with self._lock:
+            stages = dict(self.stages)
+        return {
+            "uptime_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "stages_ms": stages,
+        }
+
+
+# Process-wide timings, reported by the health endpoint
+startup_timings = StartupTimings()
+
+_secrets: Optional[Dict[str, Any]] = None
+_secrets_fetched_at = 0.0
+_secrets_lock = threading.Lock()
+
+
+def get_app_secrets() -> Dict[str, Any]:
+    """
+    Return the application secrets, fetching them from Secrets Manager on first use.
+
+    The values are cached in memory for ``APP_SECRETS_TTL`` seconds. If a refresh fails, the
+    previous values are kept and the error is logged, so a Secrets Manager blip does not fail
+    requests on a warm instance.
+
+    Returns:
+        Dict[str, Any]: The secret key/value pairs.
+
+    Raises:
+        Exception: If the very first fetch fails.
+    """
+    global _secrets, _secrets_fetched_at
+    if _secrets is not None and time.monotonic() - _secrets_fetched_at < SECRETS_TTL:
+        return _secrets
+    with _secrets_lock:
+        if _secrets is not None and time.monotonic() - _secrets_fetched_at < SECRETS_TTL:
+            return _secrets
+        try:
+            with startup_timings.timed("secrets"):
+                from vitality_tools.secrets_manager_tools import get_secrets
+
+                secrets = get_secrets(SECRETS_NAME, SECRETS_REGION, SECRETS_ENVIRONMENT) or {}
+        except Exception as e:
+            if _secrets is None:
+                raise
+            logger.warning(f"Secrets refresh failed, keeping cached values: {e}")
+            secrets = _secrets
+        _secrets = secrets
+        _secrets_fetched_at = time.monotonic()
+    return _secrets
+
+
+def get_secret(key: str, default: Optional[Any] = None) -> Any:
+    """
+    Return one application secret.
+
+    Args:
+        key: Secret key, e.g. "OPEN_AI_API_KEY" or "PRODUCT_KEY".
+        default: Value returned when the key is missing.
+
+    Returns:
+        The secret value, or ``default``.
+    """
+    return get_app_secrets().get(key, default)
+
+
+def get_bedrock_client() -> Any:
+    """
+    Return the shared synchronous ``bedrock-runtime`` client, creating it on first use.
+
+    Returns:
+        The boto3 client owned by the process-wide Bedrock invoker, so both blueprints share
+        one connection pool.
+    """
+    from integrations.scishield.bedrock_invoker import get_bedrock_invoker
+
+    return get_bedrock_invoker().client
+
+
+def resource_status() -> Dict[str, Any]:
+    """
+    Report which lazy resources have been initialized, without initializing any of them.
+
+    Returns:
+        Dict[str, Any]: Initialization flags, Bedrock transport and HTTP connection reuse
+        (``clients_created`` should stay at 1), per-model JSON repair counts, label and row
+        cache hit/miss counters, plus the cold-start timing breakdown.
+    """
+    invoker_module = sys.modules.get("integrations.scishield.bedrock_invoker")
+    transport_module = sys.modules.get("integrations.scishield.bedrock_transport")
+    transport = getattr(transport_module, "_transport", None)
+    http_module = sys.modules.get("integrations.scishield.http_session")
+    repair_module = sys.modules.get("integrations.scishield.json_repair")
+    label_module = sys.modules.get("integrations.scishield.scishield_routes")
+    classification_module = sys.modules.get("integrations.scishield.scishield_routes2")
+    return {
+        "secrets_loaded": _secrets is not None,
+        "secrets_age_s": round(time.monotonic() - _secrets_fetched_at, 1) if _secrets is not None else None,
+        "bedrock_client_ready": getattr(invoker_module, "_invoker", None) is not None,
+        "bedrock_transport_ready": transport is not None,
+        "bedrock_transport": transport.metrics() if transport is not None else None,
+        "http_session": http_module.http_session_metrics() if http_module is not None else None,
+        "json_repair": repair_module.repair_stats.stats() if repair_module is not None else None,
+        "label_cache": label_module.label_cache.stats() if label_module is not None else None,
+        "row_cache": classification_module.row_cache.stats() if classification_module is not None else None,
+        "cold_start": startup_timings.report(),
+    }
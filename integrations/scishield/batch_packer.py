@@ -0,0 +1,142 @@
+# integrations/scishield/batch_packer.py
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rough characters per token of inventory rows (part numbers and abbreviations tokenize worse than prose)
+CHARS_PER_TOKEN = 3.0
+
+# Upper bound on rows per model call, however short they are
+MAX_BATCH_ROWS = int(os.environ.get("CLASSIFICATION_MAX_BATCH_ROWS", "100"))
+
+# Share of max output tokens a batch may be expected to use; the per-row estimate is approximate
+OUTPUT_SAFETY = 0.85
+
+
+class TokenBudget(NamedTuple):
+    """How much a model may be asked to read and write per batch call."""
+    max_output_tokens: int  # the max_new_tokens / max_tokens the model is called with
+    max_input_tokens: int = 8000  # rows per prompt, which keeps the prompt part of the latency bounded
+    output_tokens_per_row: int = 70  # keys, prediction and extracted fields per row, besides the echoed row
+    max_rows: int = MAX_BATCH_ROWS
+    echo_rows: bool = True  # whether the reply repeats each row (False for replies keyed by row index)
+
+
+# Output caps the batch classifiers are called with; see the request bodies of each caller
+MODEL_TOKEN_BUDGETS: Dict[str, TokenBudget] = {
+    "us.amazon.nova-micro-v1:0": TokenBudget(max_output_tokens=4000),
+    "us.amazon.nova-lite-v1:0": TokenBudget(max_output_tokens=4000),
+    "us.amazon.nova-pro-v1:0": TokenBudget(max_output_tokens=4000),
+    "arn:aws:bedrock:us-east-1:961341512141:inference-profile/us.anthropic.claude-3-5-haiku-20241022-v1:0":
+        TokenBudget(max_output_tokens=8000),
+}
+DEFAULT_TOKEN_BUDGET = TokenBudget(max_output_tokens=4000)
+
+
+def token_budget(model_id: str) -> TokenBudget:
+    """Return the batch token budget of a model (``DEFAULT_TOKEN_BUDGET`` for unknown models)."""
+    return MODEL_TOKEN_BUDGETS.get(model_id, DEFAULT_TOKEN_BUDGET)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text from its length (no tokenizer needed)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class BatchPacker:
+    """
+    Packs rows into batches that fit a model's token budget, so short rows share one call and
+    long rows get smaller batches instead of overrunning the output cap.
+
+    Each row costs its prompt line in input tokens, and ``output_tokens_per_row`` plus the echoed
+    row (unless the budget's ``echo_rows`` is False) in expected output tokens. A batch is closed when the next row would
+    push either total over the budget, or when it reaches ``max_rows``.
+
+    Example:
+        >>> packer = BatchPacker(TokenBudget(max_output_tokens=4000))
+        >>> full = packer.add("item", {"Part_Description": "Acetone 4L"})  # None until a batch fills up
+        >>> packer.flush()
+        ['item']
+    """
+
+    def __init__(self, budget: TokenBudget, max_rows: Optional[int] = None):
+        self.budget = budget
+        self.max_rows = min(max_rows, budget.max_rows) if max_rows else budget.max_rows
+        self.output_limit = int(budget.max_output_tokens * OUTPUT_SAFETY)
+        self.items: List[Any] = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.batches = 0
+        self.rows = 0
+
+    def row_tokens(self, row: Any) -> Tuple[int, int]:
+        """Return the estimated (input, output) tokens of one row."""
+        tokens = estimate_tokens(json.dumps(row))
+        echoed = tokens if self.budget.echo_rows else 0
+        return tokens + 1, echoed + self.budget.output_tokens_per_row
+
+    def add(self, item: Any, row: Any) -> Optional[List[Any]]:
+        """
+        Add a row to the current batch.
+
+        Args:
+            item: What to put in the batch (the row itself, or e.g. a ``(key, row)`` pair).
+            row: The data row, used to estimate its tokens.
+
+        Returns:
+            Optional[List[Any]]: A completed batch to send, or None. A row that alone exceeds the
+            budget still gets a batch of its own.
+        """
+        input_tokens, output_tokens = self.row_tokens(row)
+        full = None
+        if self.items and (self.input_tokens + input_tokens > self.budget.max_input_tokens
+                           or self.output_tokens + output_tokens > self.output_limit):
+            full = self.flush()
+        self.items.append(item)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        if full is None and len(self.items) >= self.max_rows:
+            full = self.flush()
+        return full
+
+    def flush(self) -> Optional[List[Any]]:
+        """Close and return the current batch (None if it is empty)."""
+        if not self.items:
+            return None
+        batch = self.items
+        self.batches += 1
+        self.rows += len(batch)
+        self.items = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        return batch
+
+    @property
+    def rows_per_batch(self) -> float:
+        """Average rows per batch packed so far (``max_rows`` before the first batch)."""
+        return self.rows / self.batches if self.batches else float(self.max_rows)
+
+
+def pack_rows(rows: Iterable, budget: TokenBudget, max_rows: Optional[int] = None) -> List[List]:
+    """
+    Split rows into token-budgeted batches.
+
+    Args:
+        rows: The data rows.
+        budget: The model's token budget (see ``token_budget``).
+        max_rows: Optional cap on rows per batch, below the budget's own ``max_rows``.
+
+    Returns:
+        List[List]: The batches, in row order.
+    """
+    packer = BatchPacker(budget, max_rows)
+    batches = [batch for batch in (packer.add(row, row) for row in rows) if batch]
+    last = packer.flush()
+    if last:
+        batches.append(last)
+    return batches
@@ -0,0 +1,159 @@
+# integrations/scishield/batch_scheduler.py
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrently running model invocations per request
+DEFAULT_MAX_IN_FLIGHT = int(os.environ.get("CLASSIFICATION_MAX_IN_FLIGHT", "8"))
+
+
+class AIMDLimiter:
+    """
+    Concurrency limit that adapts to Bedrock throttling using additive-increase /
+    multiplicative-decrease (AIMD).
+
+    Every successful call grows the limit by roughly ``increase_step`` per full window
+    of successes; every throttled call multiplies it by ``decrease_factor``. The limit
+    always stays within ``[min_limit, max_limit]``.
+    """
+
+    def __init__(self, max_limit: int = DEFAULT_MAX_IN_FLIGHT, min_limit: int = 1,
+                 initial_limit: Optional[int] = None, increase_step: float = 1.0,
+                 decrease_factor: float = 0.5):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(initial_limit if initial_limit is not None else self.max_limit)
+        self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.successes = 0
+        self.throttles = 0
+
+    def has_capacity(self) -> bool:
+        """Return True if another call may start under the current limit."""
+        return self.in_flight < int(self.limit)
+
+    def started(self) -> None:
+        """Record that a call started."""
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self) -> None:
+        """Record that a call finished."""
+        self.in_flight -= 1
+
+    def record_success(self) -> None:
+        """Additive increase: grow the limit by ``increase_step`` per window of successes."""
+        self.successes += 1
+        self.limit = min(self.max_limit, self.limit + self.increase_step / max(int(self.limit), 1))
+
+    def record_throttle(self) -> None:
+        """Multiplicative decrease: shrink the limit after a ThrottlingException."""
+        self.throttles += 1
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        logger.warning(f"Throttling detected, concurrency limit reduced to {int(self.limit)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a snapshot of the limiter counters for logging."""
+        return {
+            "limit": int(self.limit),
+            "peak_in_flight": self.peak_in_flight,
+            "successes": self.successes,
+            "throttles": self.throttles,
+        }
+
+
+class BatchScheduler:
+    """
+    Runs batches concurrently under an ``AIMDLimiter`` and hands back results as they complete.
+
+    The caller drives it: ``submit`` a batch whenever ``has_capacity()`` is True, and
+    ``await wait_completed()`` otherwise. Batches can therefore be produced lazily (e.g. read
+    from an upload stream) so only the in-flight batches are held in memory.
+
+    Note:
+        Must be used from within a running event loop.
+    """
+
+    def __init__(self, worker: Callable[[List, AIMDLimiter], Awaitable[Any]],
+                 limiter: Optional[AIMDLimiter] = None):
+        self.worker = worker
+        self.limiter = limiter or AIMDLimiter()
+        self.submitted = 0
+        self._running: Dict[asyncio.Future, Tuple[int, List]] = {}
+
+    @property
+    def running(self) -> int:
+        """Number of batches currently in flight."""
+        return len(self._running)
+
+    def has_capacity(self) -> bool:
+        """Return True if a new batch may be submitted now."""
+        return self.limiter.has_capacity()
+
+    def submit(self, batch: List) -> int:
+        """
+        Start a batch.
+
+        Args:
+            batch: The batch passed to the worker.
+
+        Returns:
+            int: The batch index (submission order, starting at 0).
+        """
+        index = self.submitted
+        self.submitted += 1
+        self.limiter.started()
+        task = asyncio.ensure_future(self.worker(batch, self.limiter))
+        self._running[task] = (index, batch)
+        return index
+
+    async def wait_completed(self, wakeup: Optional[asyncio.Event] = None) -> List[Tuple[int, List, Any]]:
+        """
+        Wait until at least one running batch finishes.
+
+        Args:
+            wakeup: Optional event that also ends the wait when set (it is cleared again), so a
+                caller can act on partial results workers publish while they are still running.
+
+        Returns:
+            List[Tuple[int, List, Any]]: ``(index, batch, result)`` for every finished batch;
+            empty if only ``wakeup`` fired.
+
+        Raises:
+            Exception: The exception raised by a worker.
+        """
+        if not self._running:
+            return []
+        waiters = list(self._running)
+        wakeup_task = None
+        if wakeup is not None:
+            wakeup_task = asyncio.ensure_future(wakeup.wait())
+            waiters.append(wakeup_task)
+        try:
+            done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if wakeup_task is not None:
+                wakeup_task.cancel()
+                wakeup.clear()
+        completed = []
+        for task in done:
+            if task is wakeup_task:
+                continue
+            index, batch = self._running.pop(task)
+            self.limiter.finished()
+            completed.append((index, batch, task.result()))
+        return completed
+
+    def cancel(self) -> None:
+        """Cancel every running batch (e.g. when the consumer stops early)."""
+        for task in self._running:
+            task.cancel()
+        self._running.clear()
+
@@ -0,0 +1,139 @@
+# integrations/scishield/bedrock_invoker.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from integrations.scishield.app_resources import startup_timings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BEDROCK_REGION = os.environ.get("BEDROCK_REGION", "us-east-1")
+# Size of the botocore connection pool; the worker pool is matched to it
+BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+
+
+class BedrockInvoker:
+    """
+    Runs blocking Bedrock runtime calls on a dedicated, explicitly sized thread pool.
+
+    The loop's default executor is sized to ``min(32, cpu + 4)`` (6 workers on a 2-vCPU
+    Lambda), which silently caps concurrency far below the botocore connection pool.
+    This invoker owns its own pool with one worker per pooled connection and keeps
+    counters on queue depth and worker saturation.
+    """
+
+    def __init__(self, client: Any, max_workers: Optional[int] = None):
+        self.client = client
+        self.max_workers = max_workers or client.meta.config.max_pool_connections
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bedrock")
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.peak_active = 0
+        self.peak_queue_depth = 0
+        self.total_queue_wait = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the Bedrock worker pool and await its result.
+
+        Args:
+            fn: The blocking callable, e.g. ``client.invoke_model``.
+            *args: Positional arguments for ``fn``.
+            **kwargs: Keyword arguments for ``fn``.
+
+        Returns:
+            Whatever ``fn`` returns.
+
+        Raises:
+            Exception: Any exception raised by ``fn`` is propagated unchanged.
+        """
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self._queue_depth())
+
+        def call():
+            with self._lock:
+                self.active += 1
+                self.peak_active = max(self.peak_active, self.active)
+                self.total_queue_wait += time.perf_counter() - submitted_at
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def invoke_model(self, **kwargs) -> Dict:
+        """Asynchronous wrapper around ``client.invoke_model``."""
+        return await self.run(self.client.invoke_model, **kwargs)
+
+    async def invoke_model_with_response_stream(self, **kwargs) -> Dict:
+        """Asynchronous wrapper around ``client.invoke_model_with_response_stream``."""
+        return await self.run(self.client.invoke_model_with_response_stream, **kwargs)
+
+    def _queue_depth(self) -> int:
+        return self.submitted - self.completed - self.active
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Return a snapshot of the worker pool counters.
+
+        Returns:
+            Dict[str, Any]: Pool size, queued and active calls, saturation (active / workers),
+            peaks, totals and the average time calls spent waiting for a worker.
+        """
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queue_depth(),
+                "active": self.active,
+                "saturation": round(self.active / self.max_workers, 3),
+                "peak_active": self.peak_active,
+                "peak_queue_depth": self.peak_queue_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_queue_wait_ms": round(1000 * self.total_queue_wait / started, 2) if started else 0.0,
+            }
+
+
+_invoker: Optional[BedrockInvoker] = None
+_invoker_lock = threading.Lock()
+
+
+def get_bedrock_invoker() -> BedrockInvoker:
+    """
+    Return the process-wide Bedrock invoker, creating it on first use.
+
+    Returns:
+        BedrockInvoker: Invoker wrapping a ``bedrock-runtime`` client whose connection pool
+        and worker pool are both sized to ``BEDROCK_MAX_POOL_CONNECTIONS``.
+    """
+    global _invoker
+    if _invoker is None:
+        with _invoker_lock:
+            if _invoker is None:
+                with startup_timings.timed("bedrock_client"):
+                    import boto3
+                    import botocore.config
+
+                    config = botocore.config.Config(max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS)
+                    client = boto3.client("bedrock-runtime", region_name=BEDROCK_REGION, config=config)
+                    _invoker = BedrockInvoker(client, max_workers=BEDROCK_MAX_POOL_CONNECTIONS)
+    return _invoker
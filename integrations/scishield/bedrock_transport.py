@@ -0,0 +1,357 @@
+# integrations/scishield/bedrock_transport.py
+import asyncio
+import atexit
+import base64
+import json
+import logging
+import os
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Union
+from urllib.parse import quote
+
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import ClientError
+
+from integrations.scishield.app_resources import startup_timings
+from integrations.scishield.bedrock_invoker import (
+    BEDROCK_MAX_POOL_CONNECTIONS, BEDROCK_REGION, BedrockInvoker, get_bedrock_invoker)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# "http" (non-blocking httpx), "threaded" (boto3 on the worker pool) or "auto"
+BEDROCK_TRANSPORT = os.environ.get("BEDROCK_TRANSPORT", "auto")
+BEDROCK_ENDPOINT_URL = os.environ.get("BEDROCK_ENDPOINT_URL")
+BEDROCK_READ_TIMEOUT = float(os.environ.get("BEDROCK_READ_TIMEOUT", "120"))
+
+
+def _client_error(code: str, message: str, status: int, headers: Dict, operation: str) -> ClientError:
+    """Build the same ClientError boto3 raises so callers handle both transports alike."""
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": status, "HTTPHeaders": headers},
+        },
+        operation,
+    )
+
+
+class ThreadedBedrockTransport:
+    """
+    Bedrock runtime transport that runs the synchronous boto3 client on the shared worker pool.
+    """
+
+    name = "threaded"
+
+    def __init__(self, invoker: Optional[BedrockInvoker] = None):
+        self.invoker = invoker or get_bedrock_invoker()
+
+    async def invoke_model(self, model_id: str, body: Union[str, bytes],
+                           content_type: str = "application/json", accept: str = "application/json") -> bytes:
+        """
+        Invoke a model and return the raw response body.
+
+        Args:
+            model_id: Bedrock model id, inference profile id or ARN.
+            body: Serialized request body.
+            content_type: MIME type of ``body`` (default: application/json).
+            accept: Desired MIME type of the response (default: application/json).
+
+        Returns:
+            bytes: The response body.
+        """
+        response = await self.invoker.invoke_model(
+            modelId=model_id, body=body, contentType=content_type, accept=accept)
+        return await self.invoker.run(response["body"].read)
+
+    async def invoke_model_stream(self, model_id: str, body: Union[str, bytes]) -> AsyncIterator[Dict]:
+        """
+        Invoke a model with a streamed response.
+
+        Args:
+            model_id: Bedrock model id, inference profile id or ARN.
+            body: Serialized request body.
+
+        Yields:
+            Dict: The decoded JSON payload of each ``chunk`` event (e.g. ``{"contentBlockDelta": ...}``).
+        """
+        response = await self.invoker.invoke_model_with_response_stream(modelId=model_id, body=body)
+        events = iter(response["body"])
+        finished = object()
+        while True:
+            # Each read blocks on the socket, so pull events on the worker pool
+            event = await self.invoker.run(next, events, finished)
+            if event is finished:
+                break
+            chunk = event.get("chunk")
+            if chunk and chunk.get("bytes"):
+                yield json.loads(chunk["bytes"].decode("utf-8"))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return transport counters (the worker pool metrics for this transport)."""
+        return {"transport": self.name, **self.invoker.metrics()}
+
+
+class HttpBedrockTransport:
+    """
+    Non-blocking Bedrock runtime transport built on ``httpx.AsyncClient``.
+
+    Requests are SigV4-signed with botocore and sent over a keep-alive connection pool,
+    so one event loop can fan out hundreds of concurrent invocations without a thread
+    per call. Errors are raised as botocore ``ClientError`` with the AWS error code.
+
+    Note:
+        An ``httpx.AsyncClient`` is bound to the event loop it was created in, while the routes
+        call ``asyncio.run`` per request and jobs / NDJSON responses run on their own threads.
+        The client therefore lives on one persistent background loop, started on first use, and
+        every call is handed over to it: its keep-alive connections are reused across requests,
+        threads and jobs. The client is closed and the loop stopped at interpreter exit (``close``).
+    """
+
+    name = "http"
+
+    def __init__(self, region: str = BEDROCK_REGION, endpoint_url: Optional[str] = None,
+                 credentials: Optional[Any] = None, max_connections: int = BEDROCK_MAX_POOL_CONNECTIONS,
+                 read_timeout: float = BEDROCK_READ_TIMEOUT):
+        # Imported here so neither is paid for at app import time
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx is required for the http Bedrock transport")
+        import boto3
+
+        self.httpx = httpx
+        self.region = region
+        self.endpoint_url = (endpoint_url or f"https://bedrock-runtime.{region}.amazonaws.com").rstrip("/")
+        self.credentials = credentials or boto3.Session().get_credentials()
+        if self.credentials is None:
+            raise ValueError("No AWS credentials available to sign Bedrock requests")
+        self.max_connections = max_connections
+        self.read_timeout = read_timeout
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.clients_created = 0
+
+    async def _create_client(self) -> "httpx.AsyncClient":
+        httpx = self.httpx
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections),
+            timeout=httpx.Timeout(self.read_timeout, connect=10.0),
+        )
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Return the background loop owning the client, starting both on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    thread = threading.Thread(target=loop.run_forever, name="bedrock-http", daemon=True)
+                    thread.start()
+                    self._client = asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+                    self._loop_thread = thread
+                    self._loop = loop
+                    self.clients_created += 1
+                    atexit.register(self.close)
+        return self._loop
+
+    async def _run(self, function: Callable[..., Awaitable], *args: Any) -> Any:
+        """Run ``function(*args)`` on the background loop and await its result from the caller's loop."""
+        loop = self._get_loop()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(function(*args), loop))
+
+    def close(self) -> None:
+        """Close the client and stop its background loop (the next call starts new ones)."""
+        with self._lock:
+            loop, thread, client = self._loop, self._loop_thread, self._client
+            self._loop = self._loop_thread = self._client = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing the Bedrock http client: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+    def _signed_request(self, path: str, body: bytes, headers: Dict[str, str]) -> Dict[str, Any]:
+        from botocore.auth import SigV4Auth
+        from botocore.awsrequest import AWSRequest
+
+        credentials = self.credentials
+        if hasattr(credentials, "get_frozen_credentials"):
+            credentials = credentials.get_frozen_credentials()
+        request = AWSRequest(method="POST", url=f"{self.endpoint_url}{path}", data=body, headers=headers)
+        SigV4Auth(credentials, "bedrock", self.region).add_auth(request)
+        return {"url": request.url, "headers": dict(request.headers.items()), "content": body}
+
+    @staticmethod
+    def _model_path(model_id: str, action: str) -> str:
+        return f"/model/{quote(model_id, safe='')}/{action}"
+
+    @staticmethod
+    def _raise_for_status(response: "httpx.Response", operation: str) -> None:
+        if response.status_code < 400:
+            return
+        error_type = response.headers.get("x-amzn-errortype", "")
+        code = error_type.split(":")[0] or f"HTTP{response.status_code}"
+        try:
+            message = response.json().get("message", response.text)
+        except ValueError:
+            message = response.text
+        raise _client_error(code, message, response.status_code, dict(response.headers), operation)
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            if delta > 0:
+                self.requests += 1
+            self.in_flight += delta
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def invoke_model(self, model_id: str, body: Union[str, bytes],
+                           content_type: str = "application/json", accept: str = "application/json") -> bytes:
+        """
+        Invoke a model and return the raw response body.
+
+        Args:
+            model_id: Bedrock model id, inference profile id or ARN.
+            body: Serialized request body.
+            content_type: MIME type of ``body`` (default: application/json).
+            accept: Desired MIME type of the response (default: application/json).
+
+        Returns:
+            bytes: The response body.
+
+        Raises:
+            ClientError: If Bedrock returns an error status (e.g. ThrottlingException).
+        """
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        request = self._signed_request(self._model_path(model_id, "invoke"), body,
+                                       {"Content-Type": content_type, "Accept": accept})
+        self._track(1)
+        try:
+            response = await self._run(self._post, request)
+        finally:
+            self._track(-1)
+        self._raise_for_status(response, "InvokeModel")
+        return response.content
+
+    async def _post(self, request: Dict[str, Any]) -> "httpx.Response":
+        return await self._client.post(**request)
+
+    async def _pump_stream(self, request: Dict[str, Any], emit: Callable[[Dict], None]) -> None:
+        """Read a streamed response on the background loop, handing each decoded chunk to ``emit``."""
+        async with self._client.stream("POST", **request) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                self._raise_for_status(response, "InvokeModelWithResponseStream")
+
+            buffer = EventStreamBuffer()
+            async for data in response.aiter_bytes():
+                buffer.add_data(data)
+                for message in buffer:
+                    headers = message.headers
+                    if headers.get(":message-type") == "exception":
+                        code = headers.get(":exception-type", "UnknownException")
+                        code = code[0].upper() + code[1:]
+                        payload = json.loads(message.payload or b"{}")
+                        raise _client_error(code, payload.get("message", ""), response.status_code,
+                                            dict(response.headers), "InvokeModelWithResponseStream")
+                    if headers.get(":event-type") == "chunk":
+                        chunk_bytes = json.loads(message.payload).get("bytes")
+                        if chunk_bytes:
+                            emit(json.loads(base64.b64decode(chunk_bytes)))
+
+    async def invoke_model_stream(self, model_id: str, body: Union[str, bytes]) -> AsyncIterator[Dict]:
+        """
+        Invoke a model with a streamed response.
+
+        Args:
+            model_id: Bedrock model id, inference profile id or ARN.
+            body: Serialized request body.
+
+        Yields:
+            Dict: The decoded JSON payload of each ``chunk`` event (e.g. ``{"contentBlockDelta": ...}``).
+
+        Raises:
+            ClientError: If Bedrock returns an error status or an exception event mid-stream.
+        """
+        body = body.encode("utf-8") if isinstance(body, str) else body
+        request = self._signed_request(
+            self._model_path(model_id, "invoke-with-response-stream"), body,
+            {"Content-Type": "application/json", "Accept": "application/vnd.amazon.eventstream"})
+        caller_loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        def emit(item: object) -> None:
+            # Runs on the background loop; the caller's loop may already be gone after a cancel
+            try:
+                caller_loop.call_soon_threadsafe(chunks.put_nowait, item)
+            except RuntimeError:
+                pass
+
+        self._track(1)
+        pump = asyncio.run_coroutine_threadsafe(self._pump_stream(request, emit), self._get_loop())
+        pump.add_done_callback(lambda _: emit(finished))
+        try:
+            while True:
+                item = await chunks.get()
+                if item is finished:
+                    break
+                yield item
+            pump.result()  # Raise the error that ended the stream, if any
+        finally:
+            pump.cancel()
+            self._track(-1)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return transport counters: total requests, in-flight requests and clients (pools) created."""
+        with self._lock:
+            return {
+                "transport": self.name,
+                "max_connections": self.max_connections,
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "clients_created": self.clients_created,
+            }
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_bedrock_transport():
+    """
+    Return the process-wide Bedrock transport, creating it on first use.
+
+    Returns:
+        HttpBedrockTransport or ThreadedBedrockTransport: The non-blocking http transport when
+        ``BEDROCK_TRANSPORT`` is "http" or "auto" and it can be built (httpx installed and
+        credentials resolvable), otherwise the threaded boto3 transport.
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                with startup_timings.timed("bedrock_transport"):
+                    _transport = _build_transport(BEDROCK_TRANSPORT)
+    return _transport
+
+
+def _build_transport(kind: str):
+    if kind in ("http", "auto"):
+        try:
+            return HttpBedrockTransport(endpoint_url=BEDROCK_ENDPOINT_URL)
+        except (ImportError, ValueError) as e:
+            if kind == "http":
+                raise
+            logger.warning(f"Falling back to threaded Bedrock transport: {e}")
+    return ThreadedBedrockTransport()
@@ -0,0 +1,87 @@
+# integrations/scishield/compact_schema.py
+import json
+import logging
+from typing import List
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# System prompt of the compact reply contract: the model answers each row by its index with short
+# keys and leaves out what it did not find, instead of echoing the row and nine verbose field names
+COMPACT_SYSTEM_PROMPT = """
+                    You are an AI trained to identify chemicals based on text descriptions and extract relevant data if present.
+                    The following is a batch of rows from a dataset, one per line as: <row index><TAB><row data>.
+                    For each determine if the data has any chemical info at all.
+
+                    Respond with a JSON array with one object per row, using these short keys:
+                    - i: the row index,
+                    - p: "C" if it is a chemical, "N" if not.
+
+                    For a chemical also include these keys, leaving out any that are not present in the row:
+                    - c: confidence score (a decimal between 0.000 and 1.000),
+                    - cas: CAS number,
+                    - lot: lot number,
+                    - mfr: manufacturer,
+                    - qty: quantity,
+                    - name: chemical name,
+                    - prod: product name,
+                    - pn: product number,
+                    - u: units.
+
+                    Do not repeat the row data. Respond only with the JSON array.
+                """
+
+# Short key -> field of the full prediction shape, in the order of the verbose prompt
+COMPACT_FIELDS = (
+    ("c", "Confidence score"),
+    ("cas", "CAS number"),
+    ("lot", "Lot Number"),
+    ("mfr", "Manufacturer"),
+    ("qty", "Quantity"),
+    ("name", "Chemical Name"),
+    ("prod", "Product Name"),
+    ("pn", "Product Number"),
+    ("u", "Units"),
+)
+
+PREDICTION_LABELS = {"C": "Chemical", "N": "Not a Chemical"}
+
+# Expected reply tokens per row besides the row itself (a chemical with most fields found; far
+# fewer for "N" rows), used by the batch packer instead of the verbose schema's echo + field names
+COMPACT_OUTPUT_TOKENS_PER_ROW = 40
+
+
+def compact_prompt(batch: List) -> str:
+    """Number the rows of a batch for the compact contract: one ``<index>\\t<row JSON>`` line per row."""
+    return "\n".join(f"{index}\t{json.dumps(row)}" for index, row in enumerate(batch))
+
+
+def expand_prediction(compact: object, batch: List) -> object:
+    """
+    Expand one compact reply object into the prediction shape of the verbose contract.
+
+    Args:
+        compact: One element of the model's reply array, e.g. ``{"i": 3, "p": "C", "cas": "67-64-1"}``.
+        batch: The rows of the batch, to restore the ``row`` the model no longer echoes.
+
+    Returns:
+        object: ``{"row": ..., "prediction": "Chemical" | "Not a Chemical"}``, plus every field
+        of ``COMPACT_FIELDS`` (None when left out) for chemicals. ``row`` is omitted if the index is
+        missing or out of range, so the caller can fall back to the element's position. Elements
+        that are not compact objects are returned unchanged.
+    """
+    if not isinstance(compact, dict) or "p" not in compact:
+        return compact
+    label = str(compact["p"]).strip()
+    label = PREDICTION_LABELS.get(label[:1].upper(), label) if label else label
+    prediction = {}
+    index = compact.get("i")
+    if isinstance(index, str) and index.strip().isdigit():
+        index = int(index)
+    if isinstance(index, int) and not isinstance(index, bool) and 0 <= index < len(batch):
+        prediction["row"] = batch[index]
+    prediction["prediction"] = label
+    if label == "Chemical":
+        for key, field in COMPACT_FIELDS:
+            prediction[field] = compact.get(key)
+    return prediction
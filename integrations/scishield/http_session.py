@@ -0,0 +1,115 @@
+# integrations/scishield/http_session.py
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from integrations.scishield.app_resources import startup_timings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Connection pools kept (one per host) and connections kept alive per pool
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "4"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))
+
+# (connect, read) timeout in seconds; vision calls can take a while to answer
+HTTP_TIMEOUT: Tuple[float, float] = (
+    float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5")),
+    float(os.environ.get("HTTP_READ_TIMEOUT", "60")),
+)
+
+# Retries on 429 / 5xx and connection errors; Retry-After is honoured, otherwise backoff_factor * 2^n seconds
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", "0.5"))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_requests_sent = 0
+
+
+def _count_response(response: Any, *args, **kwargs) -> None:
+    global _requests_sent
+    _requests_sent += 1
+
+
+def build_http_session() -> "requests.Session":
+    """
+    Build a ``requests.Session`` with a keep-alive connection pool and retries.
+
+    Returns:
+        requests.Session: Session whose adapters retry 429 / 5xx responses (honouring Retry-After)
+        and connection errors with exponential backoff. Pass ``timeout=HTTP_TIMEOUT`` per request;
+        requests has no session-wide timeout.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        # POST is retried too: OpenAI rejects throttled or failed calls before doing any work
+        allowed_methods=frozenset({"GET", "HEAD", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_count_response)
+    return session
+
+
+def get_http_session() -> "requests.Session":
+    """
+    Return the process-wide pooled HTTP session, creating it on first use.
+
+    Sharing one session keeps TLS connections to OpenAI and image hosts open between requests,
+    so warm Lambda invocations skip the handshake.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                with startup_timings.timed("http_session"):
+                    _session = build_http_session()
+    return _session
+
+
+def http_session_metrics() -> Optional[Dict[str, Any]]:
+    """
+    Report connection reuse of the shared session, without creating it.
+
+    Returns:
+        Optional[Dict[str, Any]]: Requests sent, HTTP attempts made (including retries), new
+        connections opened and attempts served on a reused connection, per host and in total;
+        None if the session has not been created yet.
+    """
+    session = _session
+    if session is None:
+        return None
+    hosts = {}
+    for adapter in set(session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            hosts[f"{pool.scheme}://{pool.host}"] = {
+                "connections": pool.num_connections,
+                "attempts": pool.num_requests,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+            }
+    return {
+        "requests": _requests_sent,
+        "attempts": sum(host["attempts"] for host in hosts.values()),
+        "connections": sum(host["connections"] for host in hosts.values()),
+        "reused": sum(host["reused"] for host in hosts.values()),
+        "hosts": hosts,
+    }
@@ -0,0 +1,142 @@
+# integrations/scishield/image_buffer.py
+import base64
+import io
+import os
+from typing import BinaryIO, Optional
+
+from flask import Request
+
+MB = 1024 * 1024
+
+# Allowance for the multipart boundary, part headers and the org / api_key form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Requests up to this size have their file parts parsed into memory instead of a spooled temp file
+IN_MEMORY_UPLOAD_LIMIT = int(float(os.environ.get("IN_MEMORY_UPLOAD_LIMIT_MB", "25")) * MB)
+
+# Leading bytes of the image formats the vision models accept, with their media type
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    """
+    Detect an image format from its magic bytes rather than the file name.
+
+    Args:
+        data: The image bytes (only the first 12 are inspected).
+
+    Returns:
+        Optional[str]: "image/png", "image/jpeg", "image/gif" or "image/webp", or None if the
+        data is not one of those formats.
+    """
+    for signature, media_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return media_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def content_length_exceeds(content_length: Optional[int], max_size_mb: float) -> bool:
+    """
+    Check a request's declared size before its body is parsed.
+
+    Args:
+        content_length: The request Content-Length (None when the client did not send one).
+        max_size_mb: Maximum allowed image size in megabytes.
+
+    Returns:
+        bool: True if the body is too large to hold an image within the limit.
+    """
+    return content_length is not None and content_length > max_size_mb * MB + MULTIPART_OVERHEAD
+
+
+def read_image_stream(stream: BinaryIO, max_size_mb: float, chunk_size: int = 65536) -> Optional[bytes]:
+    """
+    Read an uploaded image into memory, stopping as soon as it exceeds the size limit.
+
+    Args:
+        stream: The upload stream, e.g. ``request.files['file'].stream``.
+        max_size_mb: Maximum allowed image size in megabytes.
+        chunk_size: Number of bytes read per chunk (default: 64 KiB).
+
+    Returns:
+        Optional[bytes]: The image bytes, or None if the image is larger than ``max_size_mb``.
+    """
+    max_bytes = int(max_size_mb * MB)
+    if isinstance(stream, io.BytesIO):
+        # Already buffered by InMemoryUploadRequest, no need to copy it chunk by chunk
+        data = stream.getvalue()
+        return data if len(data) <= max_bytes else None
+
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer.write(chunk)
+        if buffer.tell() > max_bytes:
+            return None
+    return buffer.getvalue()
+
+
+def download_image(url: str, max_size_mb: float, chunk_size: int = 65536, timeout: float = 30) -> Optional[bytes]:
+    """
+    Download an image into memory, stopping as soon as it exceeds the size limit.
+
+    Args:
+        url: The URL of the image.
+        max_size_mb: Maximum allowed image size in megabytes.
+        chunk_size: Number of bytes read per chunk (default: 64 KiB).
+        timeout: Read timeout in seconds (default: 30).
+
+    Returns:
+        Optional[bytes]: The image bytes, or None if the image is larger than ``max_size_mb``.
+
+    Raises:
+        Exception: If the download fails or the URL is invalid.
+    """
+    import requests
+    from integrations.scishield.http_session import HTTP_TIMEOUT, get_http_session
+
+    max_bytes = int(max_size_mb * MB)
+    try:
+        with get_http_session().get(url, stream=True, timeout=(HTTP_TIMEOUT[0], timeout)) as response:
+            response.raise_for_status()
+            declared = response.headers.get("Content-Length")
+            if declared is not None and declared.isdigit() and int(declared) > max_bytes:
+                return None
+            buffer = io.BytesIO()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                buffer.write(chunk)
+                if buffer.tell() > max_bytes:
+                    return None
+            return buffer.getvalue()
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Failed to download the file from {url}: {e}")
+
+
+def encode_image_bytes(data: bytes) -> str:
+    """Return the Base64-encoded representation of in-memory image bytes."""
+    return base64.b64encode(data).decode("utf-8")
+
+
+class InMemoryUploadRequest(Request):
+    """
+    Flask request that parses file uploads into memory when the whole request is small enough.
+
+    Werkzeug spools any request over 500 KB to a temporary file; label photos are usually a few
+    megabytes, so that put disk I/O on every image request. Larger requests (e.g. big CSV
+    uploads) keep the default spooled behaviour.
+    """
+
+    def _get_file_stream(self, total_content_length: Optional[int], content_type: Optional[str],
+                         filename: Optional[str] = None, content_length: Optional[int] = None) -> BinaryIO:
+        if total_content_length is not None and total_content_length <= IN_MEMORY_UPLOAD_LIMIT:
+            return io.BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
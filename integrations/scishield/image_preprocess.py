@@ -0,0 +1,264 @@
+# integrations/scishield/image_preprocess.py
+import io
+import logging
+import os
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump when the preprocessing changes so cached extraction results are not reused
+PREPROCESS_VERSION = "p5"
+
+# EXIF orientation tag
+EXIF_ORIENTATION = 0x0112
+
+# Set LABEL_CROP=false to always send the full frame to models whose profile crops to the label
+LABEL_CROP = os.environ.get("LABEL_CROP", "true").lower() != "false"
+
+
+class ImageProfile(NamedTuple):
+    """Largest image a model makes use of, and how to re-encode it."""
+    max_long_edge: int
+    max_short_edge: Optional[int] = None
+    max_pixels: Optional[int] = None
+    format: str = "JPEG"
+    quality: int = 85
+    crop_label: bool = False
+
+
+# Claude scales anything over 1568 px on the long edge or ~1.15 MP down server-side;
+# GPT-4o (high detail) fits images into 2048 px, then scales the short edge to 768 px.
+# Claude is billed per image pixel, so its images are also cropped to the detected label.
+# Nova also charges image tokens by resolution, but the label crop is tuned on Claude extractions,
+# so Nova gets the full frame capped at 2048 px / ~2 MP.
+CLAUDE_IMAGE_PROFILE = ImageProfile(max_long_edge=1568, max_pixels=1_150_000, crop_label=True)
+NOVA_IMAGE_PROFILE = ImageProfile(max_long_edge=2048, max_pixels=2_100_000)
+MODEL_IMAGE_PROFILES: Dict[str, ImageProfile] = {
+    "gpt-4o": ImageProfile(max_long_edge=2048, max_short_edge=768),
+    "anthropic.claude-3-5-sonnet-20240620-v1:0": CLAUDE_IMAGE_PROFILE,
+    "anthropic.claude-3-sonnet-20240229-v1:0": CLAUDE_IMAGE_PROFILE,
+    "anthropic.claude-3-haiku-20240307-v1:0": CLAUDE_IMAGE_PROFILE,
+    "us.amazon.nova-lite-v1:0": NOVA_IMAGE_PROFILE,
+    "us.amazon.nova-pro-v1:0": NOVA_IMAGE_PROFILE,
+}
+# Models without a profile get a size cap and re-encode only: no label crop, no pixel budget
+DEFAULT_IMAGE_PROFILE = ImageProfile(max_long_edge=2048)
+
+FORMAT_MEDIA_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+# Image modes Image.reduce supports
+REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA")
+
+# EXIF orientation -> Image.Transpose member that makes the image upright
+ORIENTATION_TRANSPOSE = {
+    2: "FLIP_LEFT_RIGHT",
+    3: "ROTATE_180",
+    4: "FLIP_TOP_BOTTOM",
+    5: "TRANSPOSE",
+    6: "ROTATE_270",
+    7: "TRANSVERSE",
+    8: "ROTATE_90",
+}
+
+
+class PreparedImage(NamedTuple):
+    """Image to send to a model, plus what preprocessing did to it."""
+    data: bytes
+    media_type: str
+    original_bytes: int
+    width: int
+    height: int
+    elapsed_ms: float
+    preprocessed: bool
+    crop_box: Optional[Tuple[int, int, int, int]] = None
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - len(self.data)
+
+
+def target_size(size: Tuple[int, int], profile: ImageProfile) -> Tuple[int, int]:
+    """
+    Compute the largest size within a model profile that keeps the aspect ratio.
+
+    Args:
+        size: The (width, height) of the image.
+        profile: The model's image profile.
+
+    Returns:
+        Tuple[int, int]: The target (width, height); the input size if it already fits.
+    """
+    width, height = size
+    scale = min(1.0, profile.max_long_edge / max(width, height))
+    if profile.max_short_edge:
+        scale = min(scale, profile.max_short_edge / min(width, height))
+    if profile.max_pixels:
+        scale = min(scale, (profile.max_pixels / (width * height)) ** 0.5)
+    if scale >= 1.0:
+        return width, height
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def open_reduced(image: "Image.Image", size: Tuple[int, int]) -> "Image.Image":
+    """
+    Decode an opened image at the lowest cheap resolution that is still at least ``size``.
+
+    JPEGs are decoded in draft mode, which lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding,
+    so a 12 MP photo never exists at full resolution in memory. Other formats are decoded fully
+    and then shrunk by an integer factor with ``Image.reduce``, which is much cheaper than
+    running LANCZOS over the full image.
+
+    Args:
+        image: An image from ``Image.open`` that has not been loaded yet.
+        size: The (width, height) the caller will resize to.
+
+    Returns:
+        Image.Image: The image, at least ``size`` in both dimensions; resize it to the exact size.
+
+    Notes:
+        ``Image.reduce`` returns a new image without ``info``, so read EXIF data before calling this.
+    """
+    if image.format == "JPEG":
+        image.draft(None, size)
+        return image
+    factor = min(image.width // size[0], image.height // size[1])
+    if factor >= 2 and image.mode in REDUCIBLE_MODES:
+        return image.reduce(factor)
+    return image
+
+
+def to_rgb(image: "Image.Image") -> "Image.Image":
+    """Convert an image to RGB (or keep it grayscale), flattening transparency onto white."""
+    from PIL import Image
+
+    if image.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha channel
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
+
+def prepare_image(data: bytes, media_type: str, model_id: str) -> PreparedImage:
+    """
+    Downscale and re-encode an image for a model: crop to the label (for profiles with
+    ``crop_label``), correct the EXIF orientation, resize to the model's useful resolution, drop
+    EXIF metadata and re-encode as JPEG.
+
+    Args:
+        data: The original image bytes.
+        media_type: The sniffed media type of ``data``.
+        model_id: The model the image is sent to (selects the ``MODEL_IMAGE_PROFILES`` entry).
+
+    Returns:
+        PreparedImage: The re-encoded image, or the original bytes when re-encoding would not make
+        the payload smaller (and there was no crop, orientation or metadata to fix) or the image
+        could not be decoded.
+
+    Notes:
+        When no label region is found the full frame is used.
+    """
+    from PIL import Image
+    from integrations.scishield.label_region import find_label_box
+
+    started = time.perf_counter()
+    profile = MODEL_IMAGE_PROFILES.get(model_id, DEFAULT_IMAGE_PROFILE)
+    original = PreparedImage(data, media_type, len(data), 0, 0, 0.0, False)
+    try:
+        image = Image.open(io.BytesIO(data))
+        orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+        has_metadata = "exif" in image.info
+        full_size = image.size
+
+        crop_box = find_label_box(data) if profile.crop_label and LABEL_CROP else None
+        region = crop_box or (0, 0) + full_size
+        region_size = (region[2] - region[0], region[3] - region[1])
+
+        # The profile limits are the same either way round, so size before rotating
+        size = target_size(region_size, profile)
+        if crop_box or size != region_size:
+            # Decode just large enough for the region to come out at ``size``, then crop and
+            # resize it in one pass
+            scale = size[0] / region_size[0]
+            image = open_reduced(image, (max(1, round(full_size[0] * scale)), max(1, round(full_size[1] * scale))))
+            factor_x, factor_y = image.width / full_size[0], image.height / full_size[1]
+            box = (region[0] * factor_x, region[1] * factor_y, region[2] * factor_x, region[3] * factor_y)
+            image = image.resize(size, Image.LANCZOS, box=box)
+
+        if orientation in ORIENTATION_TRANSPOSE:
+            image = image.transpose(Image.Transpose[ORIENTATION_TRANSPOSE[orientation]])
+        image = to_rgb(image)
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=profile.format, quality=profile.quality)
+        encoded = buffer.getvalue()
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed, sending the original: {e}")
+        return original._replace(elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    rotated = orientation in ORIENTATION_TRANSPOSE
+    if len(encoded) >= len(data) and not (crop_box or rotated or has_metadata):
+        return original._replace(width=image.width, height=image.height, elapsed_ms=elapsed_ms)
+    return PreparedImage(encoded, FORMAT_MEDIA_TYPES[profile.format], len(data),
+                         image.width, image.height, elapsed_ms, True, crop_box)
+
+
+def fit_image(data: bytes, final_square_size: int, pad: bool = False,
+              format: str = "JPEG", quality: int = 85) -> bytes:
+    """
+    Fit an image within a square in memory, optionally padding it (the core of ``process_image``).
+
+    Args:
+        data: The original image bytes.
+        final_square_size: The size of the square the image is fitted within.
+        pad: If True, center the image on a black square of ``final_square_size`` (only needed by
+            models that require square input).
+        format: Output format (default: JPEG).
+        quality: Encoder quality for lossy formats (default: 85).
+
+    Returns:
+        bytes: The encoded image.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    scale = min(final_square_size / image.width, final_square_size / image.height)
+    size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    image = open_reduced(image, size)
+    if image.size != size:
+        image = image.resize(size, Image.LANCZOS)
+    image = to_rgb(image)
+
+    if pad:
+        square = Image.new("RGB", (final_square_size, final_square_size), (0, 0, 0))
+        square.paste(image, ((final_square_size - size[0]) // 2, (final_square_size - size[1]) // 2))
+        image = square
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+def label_confidence(fields: Dict) -> float:
+    """
+    Score an extraction by the share of label fields the model filled in.
+
+    Args:
+        fields: The cleaned field dictionary of a label extraction (``final['data']['post']``).
+
+    Returns:
+        float: Fraction of fields (excluding the raw model output) with a non-null value.
+    """
+    if not isinstance(fields, dict):
+        return 0.0
+    values = [value for key, value in fields.items() if key != "raw output"]
+    if not values:
+        return 0.0
+    found = [value for value in values if str(value).strip().lower() not in ("", "null", "none", "n/a")]
+    return len(found) / len(values)
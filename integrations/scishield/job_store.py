@@ -0,0 +1,301 @@
+# integrations/scishield/job_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job lifecycle states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# Serialized input rows per DynamoDB chunk item, below the 400 KB item limit
+ROWS_CHUNK_BYTES = 300_000
+# Row indexes per DynamoDB result block, and result items read per query request
+RESULTS_BLOCK_ROWS = 1000
+RESULTS_QUERY_ITEMS = 25
+
+
+def running_on_lambda() -> bool:
+    """Whether this process is an AWS Lambda container (each invocation is frozen once it returns)."""
+    return bool(os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+
+
+class MemoryJobStore:
+    """
+    In-process job store. Jobs are only visible to the process that runs them, so it suits local
+    development and single-instance hosts; finished jobs are dropped ``ttl`` seconds after creation.
+    """
+
+    def __init__(self, ttl: float = 86400):
+        self.ttl = ttl
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _purge(self) -> None:
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["expires_at"] < now and job["status"] in FINISHED_STATES]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._results.pop(job_id, None)
+
+    def create(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._purge()
+            self._jobs[job["job_id"]] = {**job, "expires_at": time.time() + self.ttl}
+            self._results[job["job_id"]] = {}
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def add_results(self, job_id: str, results: List[Tuple[int, Any]]) -> None:
+        with self._lock:
+            self._results[job_id].update(results)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def get_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Tuple[int, Any]]:
+        with self._lock:
+            results = sorted(item for item in self._results.get(job_id, {}).items() if item[0] >= offset)
+        return results[:limit]
+
+
+class SQLiteJobStore:
+    """
+    Job store in a local SQLite file (``/tmp`` on Lambda). Survives process restarts on the same
+    host and is handy for tests and single-host deployments.
+    """
+
+    def __init__(self, path: str = "/tmp/classification-jobs.sqlite3", ttl: float = 86400):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, job TEXT, expires_at REAL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS results (job_id TEXT, row_index INTEGER, prediction TEXT, "
+                               "PRIMARY KEY (job_id, row_index))")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, job: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM results WHERE job_id IN (SELECT job_id FROM jobs WHERE expires_at < ?)", (now,))
+            connection.execute("DELETE FROM jobs WHERE expires_at < ?", (now,))
+            connection.execute("INSERT INTO jobs VALUES (?, ?, ?)",
+                               (job["job_id"], json.dumps(job), now + self.ttl))
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock, self._connect() as connection:
+            row = connection.execute("SELECT job FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            job = {**json.loads(row[0]), **fields}
+            connection.execute("UPDATE jobs SET job = ? WHERE job_id = ?", (json.dumps(job), job_id))
+
+    def add_results(self, job_id: str, results: List[Tuple[int, Any]]) -> None:
+        with self._lock, self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                   [(job_id, index, json.dumps(prediction)) for index, prediction in results])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT job FROM jobs WHERE job_id = ? AND expires_at >= ?",
+                                     (job_id, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Tuple[int, Any]]:
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT row_index, prediction FROM results WHERE job_id = ? AND row_index >= ? ORDER BY row_index LIMIT ?",
+                (job_id, offset, -1 if limit is None else limit)).fetchall()
+        return [(index, json.loads(prediction)) for index, prediction in rows]
+
+
+class DynamoDBJobStore:
+    """
+    DynamoDB job store shared across Lambda instances.
+
+    The table needs a string partition key ``job_id`` and a string sort key ``item``. The job
+    record is stored under ``item = "job"``, input rows staged for another invocation under
+    ``item = "rows#<sequence>"`` and results are appended as chunk items grouped by row index
+    (``item = "results#<index block>#<sequence>"``, ``RESULTS_BLOCK_ROWS`` rows per block) so a
+    page of results only reads the blocks it covers and no single item approaches the 400 KB limit.
+    ``expires_at`` (epoch seconds) can be enabled as the table TTL attribute.
+    """
+
+    def __init__(self, table_name: str, region_name: str = "us-east-1",
+                 endpoint_url: Optional[str] = None, ttl: float = 86400):
+        import boto3
+
+        self.ttl = ttl
+        resource = boto3.resource("dynamodb", region_name=region_name, endpoint_url=endpoint_url)
+        self.table = resource.Table(table_name)
+        self._chunks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict[str, Any]) -> None:
+        self.table.put_item(Item={
+            "job_id": job["job_id"],
+            "item": "job",
+            "job": json.dumps(job),
+            "expires_at": int(time.time() + self.ttl),
+        })
+
+    def update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        job = self.get(job_id)
+        job.update(fields)
+        self.table.update_item(
+            Key={"job_id": job_id, "item": "job"},
+            UpdateExpression="SET #job = :job",
+            ExpressionAttributeNames={"#job": "job"},
+            ExpressionAttributeValues={":job": json.dumps(job)},
+        )
+
+    def add_rows(self, job_id: str, rows: Iterable) -> int:
+        """
+        Stage a job's input rows so the invocation that runs the job can read them back.
+
+        Args:
+            job_id: Id of the job the rows belong to.
+            rows: Data rows (JSON serializable), consumed once.
+
+        Returns:
+            int: Number of rows stored.
+        """
+        expires_at = int(time.time() + self.ttl)
+        count = 0
+        with self.table.batch_writer() as writer:
+            chunk: List[str] = []
+            size = 0
+            sequence = 0
+            for row in rows:
+                encoded = json.dumps(row)
+                if chunk and size + len(encoded) > ROWS_CHUNK_BYTES:
+                    writer.put_item(Item={"job_id": job_id, "item": f"rows#{sequence:08d}",
+                                          "rows": "[" + ",".join(chunk) + "]", "expires_at": expires_at})
+                    chunk, size, sequence = [], 0, sequence + 1
+                chunk.append(encoded)
+                size += len(encoded) + 1
+                count += 1
+            if chunk:
+                writer.put_item(Item={"job_id": job_id, "item": f"rows#{sequence:08d}",
+                                      "rows": "[" + ",".join(chunk) + "]", "expires_at": expires_at})
+        return count
+
+    def iter_rows(self, job_id: str) -> Iterator[Any]:
+        """Lazily yield the rows staged by ``add_rows``, in their original order."""
+        from boto3.dynamodb.conditions import Key
+
+        query = {"KeyConditionExpression": Key("job_id").eq(job_id) & Key("item").begins_with("rows#")}
+        while True:
+            page = self.table.query(**query)
+            for item in page.get("Items", []):
+                yield from json.loads(item["rows"])
+            if "LastEvaluatedKey" not in page:
+                break
+            query["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+    def add_results(self, job_id: str, results: List[Tuple[int, Any]]) -> None:
+        blocks: Dict[int, List[Tuple[int, Any]]] = {}
+        for index, prediction in results:
+            blocks.setdefault(index // RESULTS_BLOCK_ROWS, []).append((index, prediction))
+        # Only the process running the job appends results, so a local sequence is enough
+        with self._lock:
+            sequence = self._chunks.get(job_id, 0)
+            self._chunks[job_id] = sequence + 1
+        expires_at = int(time.time() + self.ttl)
+        with self.table.batch_writer() as writer:
+            for block, block_results in blocks.items():
+                writer.put_item(Item={
+                    "job_id": job_id,
+                    "item": f"results#{block:08d}#{sequence:08d}",
+                    "results": json.dumps(block_results),
+                    "expires_at": expires_at,
+                })
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        item = self.table.get_item(Key={"job_id": job_id, "item": "job"}).get("Item")
+        if not item or int(item.get("expires_at", 0)) < time.time():
+            return None
+        return json.loads(item["job"])
+
+    def get_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Tuple[int, Any]]:
+        from boto3.dynamodb.conditions import Key
+
+        # Blocks come back in row order, so once the blocks read so far hold ``limit`` results the
+        # page is complete; rows within a block are in completion order, so a block is read whole
+        results: List[Tuple[int, Any]] = []
+        block = None
+        done = False
+        query = {
+            "KeyConditionExpression": Key("job_id").eq(job_id)
+            & Key("item").between(f"results#{offset // RESULTS_BLOCK_ROWS:08d}", "results#~"),
+            "Limit": RESULTS_QUERY_ITEMS,
+        }
+        while True:
+            page = self.table.query(**query)
+            for item in page.get("Items", []):
+                item_block = int(item["item"].split("#")[1])
+                if item_block != block and limit is not None and len(results) >= limit:
+                    done = True
+                    break
+                block = item_block
+                results.extend((index, prediction) for index, prediction in json.loads(item["results"])
+                               if index >= offset)
+            if done or "LastEvaluatedKey" not in page:
+                break
+            query["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+        results.sort(key=lambda result: result[0])
+        return results[:limit]
+
+def build_job_store(prefix: str = "CLASSIFICATION_JOB", default_backend: str = "memory") -> Any:
+    """
+    Build a job store from ``<prefix>_*`` environment variables.
+
+    Args:
+        prefix: Environment variable prefix (default: "CLASSIFICATION_JOB").
+        default_backend: Backend used when ``<prefix>_STORE`` is unset.
+
+    Returns:
+        The store named by ``<prefix>_STORE`` ("memory", "sqlite" or "dynamodb"), configured by
+        ``<prefix>_TTL``, ``<prefix>_DB``, ``<prefix>_TABLE`` and ``<prefix>_ENDPOINT_URL``.
+        Falls back to the in-memory store if the configured backend cannot be created.
+
+    Raises:
+        RuntimeError: On AWS Lambda, unless the DynamoDB store is configured and can be created.
+            Jobs run in their own invocation and are polled from any container, so a store local
+            to one container would lose them.
+    """
+    kind = os.environ.get(f"{prefix}_STORE", "dynamodb" if running_on_lambda() else default_backend).lower()
+    ttl = float(os.environ.get(f"{prefix}_TTL", "86400"))
+    if running_on_lambda():
+        if kind != "dynamodb" or not os.environ.get(f"{prefix}_TABLE"):
+            raise RuntimeError(f"{prefix}_STORE=dynamodb and {prefix}_TABLE are required on AWS Lambda")
+        return DynamoDBJobStore(os.environ[f"{prefix}_TABLE"],
+                                endpoint_url=os.environ.get(f"{prefix}_ENDPOINT_URL"), ttl=ttl)
+    try:
+        if kind == "sqlite":
+            return SQLiteJobStore(os.environ.get(f"{prefix}_DB", "/tmp/classification-jobs.sqlite3"), ttl)
+        if kind == "dynamodb":
+            return DynamoDBJobStore(
+                os.environ[f"{prefix}_TABLE"],
+                endpoint_url=os.environ.get(f"{prefix}_ENDPOINT_URL"),
+                ttl=ttl,
+            )
+    except Exception as e:
+        logger.warning(f"{prefix} store '{kind}' could not be created, using memory: {e}")
+    return MemoryJobStore(ttl)
@@ -0,0 +1,119 @@
+# integrations/scishield/json_repair.py
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, NamedTuple
+
+from integrations.scishield.json_stream import JsonArrayStreamParser, JsonObjectStreamParser
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How a model reply was turned into JSON, cheapest first
+REPAIR_VALID = "valid"                      # json.loads of the reply as-is
+REPAIR_EXTRACTED = "extracted"              # JSON found inside a code fence or prose
+REPAIR_TRAILING_COMMAS = "trailing_commas"  # trailing commas removed
+REPAIR_SALVAGED = "salvaged"                # complete members kept, truncated / malformed ones dropped
+REPAIR_FAILED = "failed"                    # nothing usable
+REPAIR_KINDS = (REPAIR_VALID, REPAIR_EXTRACTED, REPAIR_TRAILING_COMMAS, REPAIR_SALVAGED, REPAIR_FAILED)
+
+# A JSON string (kept as-is) or a comma directly before a closing bracket (dropped)
+TRAILING_COMMA = re.compile(r'("(?:[^"\\]|\\.)*")|,\s*(?=[\]}])')
+
+JSON_DECODER = json.JSONDecoder()
+
+
+class RepairResult(NamedTuple):
+    """A model reply decoded by ``repair_json``."""
+    value: Any
+    kind: str
+    dropped: int = 0  # malformed or truncated members left out by salvage
+
+
+def remove_trailing_commas(text: str) -> str:
+    """Drop commas that directly precede a ``]`` or ``}``, leaving string contents untouched."""
+    return TRAILING_COMMA.sub(lambda match: match.group(1) or "", text)
+
+
+def repair_json(text: str, opener: str = "[") -> RepairResult:
+    """
+    Decode a model reply that should be a JSON array (or object), repairing it as far as needed.
+
+    Each stage only runs if the cheaper ones failed, so valid JSON costs a single ``json.loads``:
+
+    1. the reply as-is;
+    2. the first value starting at ``opener`` (drops a ```` ```json ```` fence, preamble and trailing prose);
+    3. the same with trailing commas removed;
+    4. salvage: every complete member of the container, read with the streaming parser, which skips
+       malformed members and ignores a member cut off by max_tokens (an unclosed array is closed).
+
+    Args:
+        text: The model reply.
+        opener: ``"["`` for an array reply, ``"{"`` for an object reply.
+
+    Returns:
+        RepairResult: The decoded value (a list, or a dict for ``"{"``; None if nothing could be
+        recovered), the stage that produced it and the number of members salvage dropped.
+    """
+    try:
+        return RepairResult(json.loads(text), REPAIR_VALID)
+    except ValueError:
+        pass
+
+    start = text.find(opener)
+    if start < 0:
+        return RepairResult(None, REPAIR_FAILED)
+    try:
+        return RepairResult(JSON_DECODER.raw_decode(text, start)[0], REPAIR_EXTRACTED)
+    except ValueError:
+        pass
+
+    fixed = remove_trailing_commas(text[start:])
+    try:
+        return RepairResult(JSON_DECODER.raw_decode(fixed)[0], REPAIR_TRAILING_COMMAS)
+    except ValueError:
+        pass
+
+    parser = JsonArrayStreamParser() if opener == "[" else JsonObjectStreamParser()
+    members = parser.feed(fixed) + parser.close()
+    if not members:
+        return RepairResult(None, REPAIR_FAILED, parser.errors)
+    value = members if opener == "[" else dict(members)
+    return RepairResult(value, REPAIR_SALVAGED, parser.errors)
+
+
+class RepairStats:
+    """Thread-safe per-model counts of how replies were decoded."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, model_id: str, kind: str, dropped: int = 0) -> None:
+        """Count one reply of ``model_id`` decoded with ``kind`` (one of ``REPAIR_KINDS``)."""
+        with self._lock:
+            counts = self._counts.setdefault(model_id, dict.fromkeys(REPAIR_KINDS + ("dropped",), 0))
+            counts[kind] += 1
+            counts["dropped"] += dropped
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return the counts per model, with ``repair_rate`` (share of replies that needed any repair)
+        and ``failure_rate`` (share with nothing usable).
+        """
+        with self._lock:
+            report = {}
+            for model_id, counts in self._counts.items():
+                total = sum(counts[kind] for kind in REPAIR_KINDS)
+                report[model_id] = {
+                    **counts,
+                    "replies": total,
+                    "repair_rate": round((total - counts[REPAIR_VALID]) / total, 3) if total else 0.0,
+                    "failure_rate": round(counts[REPAIR_FAILED] / total, 3) if total else 0.0,
+                }
+            return report
+
+
+# Process-wide repair counters, reported by GET /health
+repair_stats = RepairStats()
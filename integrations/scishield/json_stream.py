@@ -0,0 +1,166 @@
+# integrations/scishield/json_stream.py
+import abc
+import json
+import logging
+from typing import Any, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class JsonMemberScanner(abc.ABC):
+    """
+    Incrementally scan streamed text for the top-level members of one JSON container.
+
+    Text before the container opens (a ```` ```json ```` fence, a preamble sentence) and after it
+    closes is ignored. Each member is handed to ``parse_member`` as soon as it is complete: for
+    strings, objects and arrays that is their closing character, for numbers and literals the
+    following ``,`` or the closing bracket. Every character is looked at once, so the cost is
+    linear in the length of the stream however it is chunked.
+
+    Subclasses set ``opener`` / ``closer`` and implement ``parse_member``.
+    """
+
+    opener = "{"
+    closer = "}"
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.errors = 0
+        self._member: List[str] = []
+        self._emitted = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consume the next piece of the stream.
+
+        Args:
+            chunk: Text as received (any length, may split tokens anywhere).
+
+        Returns:
+            List[Any]: The members completed by this chunk, in order, as returned by ``parse_member``.
+        """
+        completed = []
+        member = self._member
+        for char in chunk:
+            if self.done:
+                break
+            if not self.started:
+                if char == self.opener:
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if self.in_string:
+                member.append(char)
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        self._try_emit(completed, final=False)
+                continue
+
+            if char == '"':
+                self.in_string = True
+                member.append(char)
+            elif char in "{[":
+                self.depth += 1
+                member.append(char)
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self._try_emit(completed, final=True)
+                    self.done = True
+                else:
+                    member.append(char)
+                    if self.depth == 1:
+                        self._try_emit(completed, final=False)
+            elif char == "," and self.depth == 1:
+                self._try_emit(completed, final=True)
+                member.clear()
+                self._emitted = False
+            else:
+                member.append(char)
+        return completed
+
+    def close(self) -> List[Any]:
+        """
+        Finish a stream that ended before the container closed (e.g. the model hit max_tokens).
+
+        Returns:
+            List[Any]: The last member, if it is complete on its own; a cut-off member counts as an error.
+        """
+        completed = []
+        if self.started and not self.done:
+            self._try_emit(completed, final=True)
+        self.done = True
+        return completed
+
+    def _try_emit(self, completed: List[Any], final: bool) -> None:
+        if self._emitted:
+            return
+        text = "".join(self._member).strip()
+        if not text:
+            return
+        try:
+            parsed = self.parse_member(text)
+        except ValueError:
+            # Not a whole member yet (e.g. a key without its value); a final attempt that fails is malformed
+            if final:
+                self.errors += 1
+                logger.debug(f"Skipping malformed JSON member: {text[:200]}")
+            return
+        self._emitted = True
+        completed.append(parsed)
+
+    @abc.abstractmethod
+    def parse_member(self, text: str) -> Any:
+        """Decode one member's text; raise ValueError if it is not a complete member."""
+
+
+class JsonObjectStreamParser(JsonMemberScanner):
+    """
+    Yield the ``(key, value)`` pairs of a streamed JSON object as each value completes.
+
+    Example:
+        >>> parser = JsonObjectStreamParser()
+        >>> parser.feed('```json\\n{"name": "Ace')
+        []
+        >>> parser.feed('tone", "cas": "67-64-1"}')
+        [('name', 'Acetone'), ('cas', '67-64-1')]
+    """
+
+    opener = "{"
+    closer = "}"
+
+    def parse_member(self, text: str) -> Tuple[str, Any]:
+        pair = json.loads("{" + text + "}")
+        if len(pair) != 1:
+            raise ValueError(f"Expected one key/value pair, got {len(pair)}")
+        return next(iter(pair.items()))
+
+
+class JsonArrayStreamParser(JsonMemberScanner):
+    """
+    Yield the elements of a streamed JSON array as each element completes.
+
+    Example:
+        >>> parser = JsonArrayStreamParser()
+        >>> parser.feed('```json\\n[{"row": "Acetone", "prediction": "Chem')
+        []
+        >>> parser.feed('ical"}, {"row": "Vial", "prediction": "Not a Chemical"}]\\n```')
+        [{'row': 'Acetone', 'prediction': 'Chemical'}, {'row': 'Vial', 'prediction': 'Not a Chemical'}]
+    """
+
+    opener = "["
+    closer = "]"
+
+    def parse_member(self, text: str) -> Any:
+        return json.loads(text)
@@ -0,0 +1,527 @@
+# integrations/scishield/label_extraction.py
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from integrations.scishield.app_resources import get_bedrock_client, get_secret
+from integrations.scishield.http_session import HTTP_TIMEOUT, get_http_session
+from integrations.scishield.image_buffer import encode_image_bytes
+from integrations.scishield.image_preprocess import PreparedImage, label_confidence, prepare_image
+from integrations.scishield.json_stream import JsonObjectStreamParser
+from integrations.scishield.label_fields import clean_label_value, extract_field_list, extract_json_fields
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Extractions with fewer than this share of label fields filled are retried with the original image
+LABEL_FALLBACK_CONFIDENCE = float(os.environ.get("LABEL_FALLBACK_CONFIDENCE", "0.25"))
+
+# Label extraction prompts
+GPT_LABEL_PROMPT = """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
+                        (Chemical name or CAS number, 
+                        Amount, 
+                        Units, 
+                        Lot number, 
+                        Product number, 
+                        Product name, 
+                        Manufacturer)
+                        if no label info is detected say null
+                        if grade information is found add to product name if its not keep text as is
+                        if no product name use chemical name
+                        add no text besides null about what you can't find to response
+                        """
+
+CLAUDE_LABEL_PROMPT = """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
+                        (Chemical name or CAS_Number, 
+                        Amount, 
+                        Units, 
+                        Lot_Number, 
+                        Product_Number, 
+                        Product_Name, 
+                        Manufacturer)
+                        make sure the keys for each apear exactly as written above,
+                        if no label info is detected say null,
+                        if grade information is found add to product name if its not keep text as is,
+                        if no product name use chemical name,
+                        add no text besides null about what you can't find to response.
+                        """
+
+
+def build_label_result(fields: Dict, data_string: str) -> Dict:
+    """
+    Clean parsed label fields into the response returned by every label route.
+
+    Args:
+        fields: The parsed label fields.
+        data_string: The raw model output, included in the result for debugging.
+
+    Returns:
+        Dict: ``{'status': "200" | "206", 'data': {'post': fields}}``; 206 when the model reported
+        any field as null.
+    """
+    clean_dict = dict(fields)
+    clean_dict['raw output'] = data_string
+    final_dict = {key: clean_label_value(value) for key, value in clean_dict.items()}
+
+    final = { 'status' : "200", 'data' : {'post': final_dict}}
+    if('null' in data_string):
+        final = { 'status' : "206", 'data' : {'post': final_dict}}
+    return final
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the named stages of one extraction, in the order they ran.
+
+    A stage that runs more than once (e.g. ``model`` on a fallback) accumulates its time.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.timings[name] = round(self.timings.get(name, 0.0) + elapsed_ms, 1)
+
+    def server_timing(self) -> str:
+        """Format the timings as a ``Server-Timing`` header value."""
+        return ", ".join(f"{name};dur={duration}" for name, duration in self.timings.items())
+
+
+class OpenAIChatProvider:
+    """Vision extraction through the OpenAI chat completions API."""
+
+    name = "openai"
+    url = "https://api.openai.com/v1/chat/completions"
+
+    def build_request(self, model: "LabelModel", base64_image: str, media_type: str) -> Tuple[Dict, Dict]:
+        """Return the (headers, payload) of a chat completions request for the prompt and image."""
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {get_secret('OPEN_AI_API_KEY')}"
+        }
+        payload = {
+            "model": model.model_id,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": model.prompt
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{media_type};base64,{base64_image}"
+                            }
+                        }
+                    ]
+                }
+            ],
+            "max_tokens": model.max_tokens
+        }
+        return headers, payload
+
+    def invoke(self, model: "LabelModel", base64_image: str, media_type: str) -> str:
+        """
+        Send the prompt and image to the model.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Returns:
+            str: The text of the model's reply.
+        """
+        headers, payload = self.build_request(model, base64_image, media_type)
+        # Pooled keep-alive session; 429 / 5xx are retried honouring Retry-After
+        res = get_http_session().post(self.url, headers=headers, json=payload, timeout=HTTP_TIMEOUT)
+        res.raise_for_status()
+        json_response = res.json()
+        print(json_response)
+        return json_response['choices'][0]['message']['content']
+
+    def stream(self, model: "LabelModel", base64_image: str, media_type: str) -> Iterator[str]:
+        """
+        Send the prompt and image to the model and stream the reply.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Yields:
+            str: Pieces of the reply text as the model generates them.
+        """
+        headers, payload = self.build_request(model, base64_image, media_type)
+        payload["stream"] = True
+        with get_http_session().post(self.url, headers=headers, json=payload, timeout=HTTP_TIMEOUT, stream=True) as res:
+            res.raise_for_status()
+            res.encoding = "utf-8"
+            for line in res.iter_lines(decode_unicode=True):
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                text = choices[0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+
+class BedrockAnthropicProvider:
+    """Vision extraction through the Anthropic messages API on Bedrock."""
+
+    name = "bedrock-anthropic"
+
+    def build_body(self, model: "LabelModel", base64_image: str, media_type: str) -> str:
+        """Return the serialized Anthropic messages request for the prompt and image."""
+        return json.dumps(
+                {
+                    "anthropic_version": "bedrock-2023-05-31",
+                    "max_tokens": model.max_tokens,
+                    "messages": [
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "image",
+                                    "source": {
+                                        "type": "base64",
+                                        "media_type": media_type,
+                                        "data": base64_image,
+                                    },
+                                },
+                                {"type": "text", "text": model.prompt},
+                            ],
+                        }
+                    ],
+                }
+            )
+
+    def invoke(self, model: "LabelModel", base64_image: str, media_type: str) -> str:
+        """
+        Send the prompt and image to the model.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Returns:
+            str: The text of the model's reply.
+        """
+        response = get_bedrock_client().invoke_model(
+            modelId=model.model_id,
+            body=self.build_body(model, base64_image, media_type)
+        )
+        response_body = json.loads(response.get("body").read())
+        data_string = response_body['content'][0]['text']
+        print(data_string)
+        return data_string
+
+    def stream(self, model: "LabelModel", base64_image: str, media_type: str) -> Iterator[str]:
+        """
+        Send the prompt and image to the model and stream the reply.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Yields:
+            str: Pieces of the reply text (``content_block_delta`` events) as the model generates them.
+        """
+        response = get_bedrock_client().invoke_model_with_response_stream(
+            modelId=model.model_id,
+            body=self.build_body(model, base64_image, media_type)
+        )
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            data = json.loads(chunk["bytes"])
+            if data.get("type") == "content_block_delta":
+                text = data.get("delta", {}).get("text")
+                if text:
+                    yield text
+
+
+class BedrockNovaProvider:
+    """Vision extraction through the Amazon Nova messages-v1 API on Bedrock."""
+
+    name = "bedrock-nova"
+
+    def build_body(self, model: "LabelModel", base64_image: str, media_type: str) -> str:
+        """Return the serialized Nova messages-v1 request for the prompt and image."""
+        return json.dumps(
+            {
+                "schemaVersion": "messages-v1",
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "image": {
+                                    "format": media_type.split("/")[-1],
+                                    "source": {"bytes": base64_image},
+                                }
+                            },
+                            {"text": model.prompt},
+                        ],
+                    }
+                ],
+                "inferenceConfig": {"maxTokens": model.max_tokens, "temperature": 0},
+            }
+        )
+
+    def invoke(self, model: "LabelModel", base64_image: str, media_type: str) -> str:
+        """
+        Send the prompt and image to the model.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Returns:
+            str: The text of the model's reply.
+        """
+        response = get_bedrock_client().invoke_model(
+            modelId=model.model_id,
+            body=self.build_body(model, base64_image, media_type)
+        )
+        response_body = json.loads(response.get("body").read())
+        data_string = response_body['output']['message']['content'][0]['text']
+        print(data_string)
+        return data_string
+
+    def stream(self, model: "LabelModel", base64_image: str, media_type: str) -> Iterator[str]:
+        """
+        Send the prompt and image to the model and stream the reply.
+
+        Args:
+            model: The model configuration.
+            base64_image: The Base64-encoded image.
+            media_type: The image media type, e.g. "image/jpeg".
+
+        Yields:
+            str: Pieces of the reply text (``contentBlockDelta`` events) as the model generates them.
+        """
+        response = get_bedrock_client().invoke_model_with_response_stream(
+            modelId=model.model_id,
+            body=self.build_body(model, base64_image, media_type)
+        )
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            delta = json.loads(chunk["bytes"]).get("contentBlockDelta")
+            if delta:
+                text = delta.get("delta", {}).get("text")
+                if text:
+                    yield text
+
+
+# Providers by name, referenced from LabelModel.provider
+PROVIDERS = {provider.name: provider for provider in (OpenAIChatProvider(), BedrockAnthropicProvider(), BedrockNovaProvider())}
+
+
+class LabelModel(NamedTuple):
+    """A model the label routes can extract with, and how to call and parse it."""
+    model_id: str
+    provider: str
+    prompt: str
+    parse: Callable[[str], Dict]
+    max_image_mb: float
+    max_tokens: int
+    too_large_message: str = 'Error - Image is too large'
+    failure_message: str = 'Error- Image Failed to Upload'
+
+
+# Label models by the key used in /chem-snap/models/<key>/image_upload; adding a model is one entry here
+LABEL_MODELS: Dict[str, LabelModel] = {
+    "gpt-4o": LabelModel("gpt-4o", "openai", GPT_LABEL_PROMPT, extract_field_list, 20, 300),
+    "claude-3-5-sonnet": LabelModel(
+        "anthropic.claude-3-5-sonnet-20240620-v1:0", "bedrock-anthropic", CLAUDE_LABEL_PROMPT, extract_json_fields, 9, 4000,
+        'Error - Image is too large for Claude', 'Error- Image Failed to Download'),
+    "claude-3-sonnet": LabelModel(
+        "anthropic.claude-3-sonnet-20240229-v1:0", "bedrock-anthropic", CLAUDE_LABEL_PROMPT, extract_json_fields, 9, 4000,
+        'Error - Image is too large for Claude', 'Error- Image Failed to Download'),
+    "claude-3-haiku": LabelModel(
+        "anthropic.claude-3-haiku-20240307-v1:0", "bedrock-anthropic", CLAUDE_LABEL_PROMPT, extract_json_fields, 9, 4000,
+        'Error - Image is too large for Claude', 'Error- Image Failed to Download'),
+    "nova-lite": LabelModel(
+        "us.amazon.nova-lite-v1:0", "bedrock-nova", CLAUDE_LABEL_PROMPT, extract_json_fields, 20, 1000,
+        'Error - Image is too large for Nova', 'Error- Image Failed to Download'),
+    "nova-pro": LabelModel(
+        "us.amazon.nova-pro-v1:0", "bedrock-nova", CLAUDE_LABEL_PROMPT, extract_json_fields, 20, 1000,
+        'Error - Image is too large for Nova', 'Error- Image Failed to Download'),
+}
+
+
+def run_model(model: LabelModel, image_bytes: bytes, media_type: str, timer: StageTimer) -> Dict:
+    """Encode an image, call the model's provider and parse the reply, timing each stage."""
+    with timer.stage("encode"):
+        base64_image = encode_image_bytes(image_bytes)
+    with timer.stage("model"):
+        data_string = PROVIDERS[model.provider].invoke(model, base64_image, media_type)
+    with timer.stage("parse"):
+        return build_label_result(model.parse(data_string), data_string)
+
+
+def prepared_report(prepared: PreparedImage) -> Dict:
+    """Start the extraction report for an image prepared by ``prepare_image``."""
+    return {
+        "original_bytes": prepared.original_bytes,
+        "sent_bytes": len(prepared.data),
+        "bytes_saved": prepared.bytes_saved,
+        "crop_box": prepared.crop_box,
+        "fallback": False,
+    }
+
+
+def fallback_to_original(model: LabelModel, final: Dict, prepared: PreparedImage, image_bytes: bytes,
+                         media_type: str, report: Dict, timer: StageTimer) -> Dict:
+    """
+    Retry a weak extraction of a preprocessed image with the original image.
+
+    Returns:
+        Dict: ``final``, or the extraction of the original image if it found more label fields
+        (``report`` is updated to match).
+    """
+    confidence = label_confidence(final['data']['post'])
+    if not prepared.preprocessed or confidence >= LABEL_FALLBACK_CONFIDENCE:
+        return final
+    fallback_timer = StageTimer()
+    original_final = run_model(model, image_bytes, media_type, fallback_timer)
+    timer.timings["fallback"] = round(sum(fallback_timer.timings.values()), 1)
+    if label_confidence(original_final['data']['post']) > confidence:
+        report.update(fallback=True, sent_bytes=len(image_bytes), bytes_saved=0)
+        return original_final
+    return final
+
+
+def extract_label(model: LabelModel, image_bytes: bytes, media_type: str,
+                  timer: Optional[StageTimer] = None) -> Tuple[Dict, Dict]:
+    """
+    Extract chemical label information from an image: preprocess it for the model, call the
+    model's provider, parse and clean the reply, and retry with the original image when the result
+    looks unreliable.
+
+    Args:
+        model: The model configuration (an entry of ``LABEL_MODELS``).
+        image_bytes: The original image bytes.
+        media_type: The sniffed media type of ``image_bytes``.
+        timer: Timer to record the stages in (default: a new one).
+
+    Returns:
+        Tuple[Dict, Dict]: The extraction result, and a report with the original and sent payload
+        sizes, the label crop box (if any), whether the original image was used and the per-stage
+        timings in ms.
+
+    Notes:
+        The original (full frame) is only tried if the image was cropped or re-encoded and less than
+        LABEL_FALLBACK_CONFIDENCE of the label fields came back; whichever of the two extractions
+        found more fields is returned.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("preprocess"):
+        prepared = prepare_image(image_bytes, media_type, model.model_id)
+    final = run_model(model, prepared.data, prepared.media_type, timer)
+    report = prepared_report(prepared)
+    final = fallback_to_original(model, final, prepared, image_bytes, media_type, report, timer)
+
+    report["timings"] = timer.timings
+    logger.info(f"Label extraction {model.model_id}: {report}")
+    return final, report
+
+
+def stream_fields(model: LabelModel, key: str, value) -> List[Tuple[str, str]]:
+    """
+    Map one streamed ``key: value`` pair of a model reply to the label field(s) it fills.
+
+    The pair goes through the model's own parser, so streamed fields carry the same names and
+    cleaned values as the final result.
+
+    Returns:
+        List[Tuple[str, str]]: ``(field, value)`` pairs; empty if the key is not a label field.
+    """
+    fields = model.parse(json.dumps({key: value}))
+    # extract_field_list reports fields it did not find as "null"
+    return [(field, clean_label_value(field_value)) for field, field_value in fields.items() if field_value != "null"]
+
+
+def stream_label(model: LabelModel, image_bytes: bytes, media_type: str,
+                 timer: Optional[StageTimer] = None) -> Iterator[Dict]:
+    """
+    Extract chemical label information like ``extract_label``, streaming the model's reply and
+    emitting each label field as soon as its value is complete.
+
+    Args:
+        model: The model configuration (an entry of ``LABEL_MODELS``).
+        image_bytes: The original image bytes.
+        media_type: The sniffed media type of ``image_bytes``.
+        timer: Timer to record the stages in (default: a new one); adds ``first_field``, the time
+            from sending the request to the first field.
+
+    Yields:
+        Dict: ``{"field": name, "value": value}`` per completed field, then
+        ``{"result": final, "report": report}`` with the same result ``extract_label`` returns
+        (after the low-confidence fallback, if it ran).
+
+    Notes:
+        The ``result`` is authoritative. If the fallback replaced the streamed extraction with
+        the original image's, ``{"reset": {"reason": "fallback"}}`` is yielded first: the client
+        must discard the fields it received so far. The replacement's fields follow as
+        ``field`` items, before the ``result``.
+    """
+    timer = timer or StageTimer()
+    with timer.stage("preprocess"):
+        prepared = prepare_image(image_bytes, media_type, model.model_id)
+    with timer.stage("encode"):
+        base64_image = encode_image_bytes(prepared.data)
+
+    parser = JsonObjectStreamParser()
+    pieces = []
+    started = time.perf_counter()
+    for text in PROVIDERS[model.provider].stream(model, base64_image, prepared.media_type):
+        pieces.append(text)
+        for key, value in parser.feed(text):
+            for field, field_value in stream_fields(model, key, value):
+                if "first_field" not in timer.timings:
+                    timer.timings["first_field"] = round((time.perf_counter() - started) * 1000, 1)
+                yield {"field": field, "value": field_value}
+    for key, value in parser.close():
+        for field, field_value in stream_fields(model, key, value):
+            yield {"field": field, "value": field_value}
+    timer.timings["model"] = round((time.perf_counter() - started) * 1000, 1)
+
+    data_string = "".join(pieces)
+    print(data_string)
+    with timer.stage("parse"):
+        final = build_label_result(model.parse(data_string), data_string)
+    report = prepared_report(prepared)
+    final = fallback_to_original(model, final, prepared, image_bytes, media_type, report, timer)
+    if report["fallback"]:
+        # The fields streamed above came from the weaker extraction; replace them
+        yield {"reset": {"reason": "fallback"}}
+        for field, value in final['data']['post'].items():
+            if field != 'raw output':
+                yield {"field": field, "value": value}
+
+    report["timings"] = timer.timings
+    logger.info(f"Streamed label extraction {model.model_id}: {report}")
+    yield {"result": final, "report": report}
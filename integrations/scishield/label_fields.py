@@ -0,0 +1,132 @@
+# integrations/scishield/label_fields.py
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Optional
+
+from integrations.scishield.json_repair import repair_json
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Label fields read from GPT-style replies, in response order, and the (lower-case) keys each may appear under
+LABEL_FIELD_ALIASES: Dict[str, tuple] = {
+    'Chemical name': ("chemical name or cas number", "chemical name"),
+    'CAS number': ("chemical name or cas number", "cas number"),
+    'Amount': ("amount",),
+    'Units': ("units",),
+    'Lot number': ("lot number",),
+    'Product number': ("product number",),
+    'Product name': ("product name",),
+    'Manufacturer': ("manufacturer",),
+}
+LABEL_FIELDS = list(LABEL_FIELD_ALIASES)
+
+# Substring of a (lower-case) JSON key -> label field, checked in this order (Claude / Nova replies)
+LABEL_KEY_MAP = (
+    ("chemical", "Chemical Name"),
+    ("cas", "CAS Number"),
+    ("amount", "Amount"),
+    ("unit", "Units"),
+    ("lot", "Lot Number"),
+    ("product_num", "Product Number"),
+    ("product_nam", "Product Name"),
+    ("manuf", "Manufacturer"),
+)
+
+# One quoted key and its value: a quoted string (double or single quotes), null or a number.
+# Values stop at the first matching quote, as the model replies have no escaped quotes worth keeping.
+LABEL_PAIR = re.compile(
+    r"""(?:"([^"\n:{}]{1,80})"|'([^'\n:{}]{1,80})')\s*:\s*"""
+    r"""(?:"([^"\n]*)"|'([^'\n]*)'|(null|-?\d+(?:\.\d+)?)(?=\s*[,}\]\n]))""",
+    re.IGNORECASE)
+
+def find_label_pairs(text: str) -> Dict[str, str]:
+    """
+    Collect every quoted ``key: value`` pair of a JSON-like reply in one regex pass.
+
+    Tolerates code fences, prose around the JSON, single quotes and output cut off mid-object.
+
+    Args:
+        text: The model reply.
+
+    Returns:
+        Dict[str, str]: Lower-cased, stripped key -> value of its first occurrence; ``null`` and
+        numbers are returned as their text.
+    """
+    pairs = {}
+    for double_key, single_key, double_value, single_value, bare in LABEL_PAIR.findall(text):
+        key = (double_key or single_key).strip().lower()
+        if key not in pairs:
+            pairs[key] = bare.lower() if bare else double_value or single_value
+    return pairs
+
+
+def extract_field_list(data_string: str) -> Dict[str, str]:
+    """
+    Read the label fields from a loosely formatted JSON-like reply (GPT-4o style prompt).
+
+    Args:
+        data_string: The model reply.
+
+    Returns:
+        Dict[str, str]: One entry per ``LABEL_FIELDS`` name, in that order; ``"null"`` for fields
+        the reply does not contain or reports as null.
+    """
+    pairs = find_label_pairs(data_string)
+    fields = {}
+    for field, aliases in LABEL_FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in pairs:
+                fields[field] = pairs[alias]
+                break
+        else:
+            fields[field] = "null"
+    return fields
+
+
+@lru_cache(maxsize=1024)
+def label_key(key: str) -> Optional[str]:
+    """Map a lower-case JSON key to its label field (first ``LABEL_KEY_MAP`` substring it contains)."""
+    for substring, field in LABEL_KEY_MAP:
+        if substring in key:
+            return field
+    return None
+
+
+def extract_json_fields(data_string: str) -> Dict:
+    """
+    Read the label fields from a JSON object reply (Claude / Nova style prompt).
+
+    The reply is lower-cased (keys and values, as the routes have always returned them) and
+    decoded with ``repair_json``, which copes with a code fence or prose around the object,
+    trailing commas and truncated output. Replies it cannot decode (e.g. single quotes) fall back
+    to ``find_label_pairs``.
+
+    Args:
+        data_string: The model reply.
+
+    Returns:
+        Dict: Label field -> value for every key that maps to a label field; a later key for the
+        same field wins.
+    """
+    text = data_string.lower()
+    data = repair_json(text, "{").value
+    if not isinstance(data, dict):
+        data = {key: None if value == "null" else value for key, value in find_label_pairs(text).items()}
+
+    fields = {}
+    for key, value in data.items():
+        field = label_key(str(key))
+        if field is not None:
+            fields[field] = value
+    return fields
+
+
+def clean_label_value(value) -> str:
+    """Strip quoting and markup characters from a label field value; missing values become 'Null'."""
+    if value is None:
+        return 'Null'
+    # Chained str.replace beats str.translate and re.sub here: each call is a memchr scan that
+    # returns the string itself when the character is absent, which is the common case
+    return str(value).replace('"', '').replace('/', '').replace('\\', '').replace('}', '').replace('\n', '').replace('`', '')
@@ -0,0 +1,156 @@
+# integrations/scishield/label_region.py
+import io
+import logging
+from collections import deque
+from typing import List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Long edge of the grayscale thumbnail the detector works on
+DETECT_SIZE = 256
+
+# Side of the square cells edge density is measured over, in thumbnail pixels
+CELL_SIZE = 8
+
+# A pixel is an edge if its gradient is at least this strong (0-510 scale) and above the image's mean + 1 std
+MIN_EDGE_STRENGTH = 24.0
+
+# A cell is part of a text region if at least this share of its pixels are edges
+MIN_CELL_DENSITY = 0.12
+
+# Accept a region only if it holds this share of the image's dense-cell edge mass ...
+MIN_REGION_SHARE = 0.5
+
+# ... and its box covers between these fractions of the frame (otherwise cropping is not worth it / too risky)
+MIN_CROP_FRACTION = 0.04
+MAX_CROP_FRACTION = 0.8
+
+# Margin added around the detected region, in cells
+MARGIN_CELLS = 1
+
+
+def edge_density(gray: "np.ndarray") -> "np.ndarray":
+    """
+    Measure how much of each CELL_SIZE x CELL_SIZE cell of a grayscale image is strong edges.
+
+    Args:
+        gray: 2-D float array of grayscale values (0-255).
+
+    Returns:
+        np.ndarray: 2-D array with the fraction of edge pixels per cell.
+    """
+    import numpy as np
+
+    # Horizontal + vertical absolute differences, cropped to a common shape
+    gradient = np.abs(np.diff(gray, axis=1))[:-1, :] + np.abs(np.diff(gray, axis=0))[:, :-1]
+    threshold = max(MIN_EDGE_STRENGTH, float(gradient.mean() + gradient.std()))
+    edges = gradient >= threshold
+
+    rows, cols = edges.shape[0] // CELL_SIZE, edges.shape[1] // CELL_SIZE
+    edges = edges[:rows * CELL_SIZE, :cols * CELL_SIZE]
+    return edges.reshape(rows, CELL_SIZE, cols, CELL_SIZE).mean(axis=(1, 3))
+
+
+def components(mask: "np.ndarray") -> List[List[Tuple[int, int]]]:
+    """Return the 8-connected components of a small boolean grid as lists of (row, col) cells."""
+    rows, cols = mask.shape
+    seen = set()
+    found = []
+    for start in zip(*mask.nonzero()):
+        start = (int(start[0]), int(start[1]))
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        cells = []
+        while queue:
+            row, col = queue.popleft()
+            cells.append((row, col))
+            for d_row in (-1, 0, 1):
+                for d_col in (-1, 0, 1):
+                    neighbour = (row + d_row, col + d_col)
+                    if (0 <= neighbour[0] < rows and 0 <= neighbour[1] < cols
+                            and neighbour not in seen and mask[neighbour]):
+                        seen.add(neighbour)
+                        queue.append(neighbour)
+        found.append(cells)
+    return found
+
+
+def find_label_box(data: bytes) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Locate the label in a photo from the density of high-contrast edges (printed text, pictograms,
+    barcodes), so the image can be cropped before it is sent to a model.
+
+    Args:
+        data: The image bytes.
+
+    Returns:
+        Optional[Tuple[int, int, int, int]]: The (left, upper, right, lower) box in the pixel
+        coordinates of the stored image (before any EXIF rotation), or None to keep the full frame:
+        no clear text region, a region covering most of the frame, or an image that cannot be decoded.
+
+    Notes:
+        Text-dense cells are grown by one cell so separate lines of a label join into one region;
+        the region with the most edge mass wins, and only if it clearly dominates the image.
+    """
+    import numpy as np
+    from PIL import Image
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        width, height = image.size
+        image.draft("L", (DETECT_SIZE, DETECT_SIZE))
+        thumb = image.convert("L")
+        thumb.thumbnail((DETECT_SIZE, DETECT_SIZE))
+        gray = np.asarray(thumb, dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"Label detection skipped, image could not be decoded: {e}")
+        return None
+
+    density = edge_density(gray)
+    if density.size == 0:
+        return None
+    dense = density >= MIN_CELL_DENSITY
+    total_mass = float(density[dense].sum())
+    if total_mass == 0:
+        return None
+
+    # Grow dense cells by one cell in every direction to bridge line and word gaps
+    grown = dense.copy()
+    grown[1:, :] |= dense[:-1, :]
+    grown[:-1, :] |= dense[1:, :]
+    grown[:, 1:] |= dense[:, :-1]
+    grown[:, :-1] |= dense[:, 1:]
+
+    best_cells, best_mass = None, 0.0
+    for cells in components(grown):
+        cell_rows, cell_cols = zip(*cells)
+        mass = float((density[cell_rows, cell_cols] * dense[cell_rows, cell_cols]).sum())
+        if mass > best_mass:
+            best_cells, best_mass = cells, mass
+    if best_cells is None or best_mass / total_mass < MIN_REGION_SHARE:
+        return None
+
+    cell_rows, cell_cols = zip(*best_cells)
+    grid_rows, grid_cols = density.shape
+    top = max(min(cell_rows) - MARGIN_CELLS, 0)
+    bottom = min(max(cell_rows) + 1 + MARGIN_CELLS, grid_rows)
+    left = max(min(cell_cols) - MARGIN_CELLS, 0)
+    right = min(max(cell_cols) + 1 + MARGIN_CELLS, grid_cols)
+
+    # Cells -> thumbnail pixels -> stored image pixels
+    scale_x, scale_y = width / gray.shape[1], height / gray.shape[0]
+    box = (int(left * CELL_SIZE * scale_x), int(top * CELL_SIZE * scale_y),
+           min(width, int(round(right * CELL_SIZE * scale_x))), min(height, int(round(bottom * CELL_SIZE * scale_y))))
+    # The last partial cell is never measured, so a region touching the grid edge extends to the frame edge
+    if right == grid_cols:
+        box = box[:2] + (width, box[3])
+    if bottom == grid_rows:
+        box = box[:3] + (height,)
+
+    fraction = (box[2] - box[0]) * (box[3] - box[1]) / (width * height)
+    if not MIN_CROP_FRACTION <= fraction <= MAX_CROP_FRACTION:
+        return None
+    return box
@@ -1,23 +1,23 @@
-import boto3
 import json
 import logging
 import random
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import time
-import botocore.config
+from integrations.scishield.batch_packer import pack_rows, token_budget
+from integrations.scishield.bedrock_transport import get_bedrock_transport
+from integrations.scishield.json_repair import REPAIR_FAILED, repair_json, repair_stats
+from integrations.scishield.retry_policy import DEFAULT_RETRY_POLICY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure boto3 client with a larger connection pool
-config = botocore.config.Config(max_pool_connections=50)
-client = boto3.client("bedrock-runtime", region_name="us-east-1", config=config)
-
 # Replace MODEL_ID with the inference profile ARN
 MODEL_ID = "arn:aws:bedrock:us-east-1:961341512141:inference-profile/us.anthropic.claude-3-5-haiku-20241022-v1:0"
 
+# Output cap of a batch call, which batches are packed to
+BATCH_BUDGET = token_budget(MODEL_ID)
+
 # Example data
 example_not_a_chemical = "125L, Vial Scint 20ML Glass 500/CC"
 example_chemical = "N04010, MScn Dp Well Solv. 0.4 µm NS 10PK"
@@ -30,39 +30,30 @@ random.shuffle(combined_list)
 
 # Helper function to clean and parse JSON response
 def clean_and_parse_json(response_text):
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Decode Error: {e}")
-        logger.error(f"Problematic JSON: {response_text}")
-        return {"error": f"JSON Decode Error: {e}", "response": response_text}
+    repaired = repair_json(response_text, "[")
+    repair_stats.record(MODEL_ID, repaired.kind, repaired.dropped)
+    if repaired.kind == REPAIR_FAILED:
+        logger.error(f"Unparseable JSON: {response_text}")
+        return {"error": "Unparseable JSON response", "response": response_text}
+    return repaired.value
 
 async def invoke_with_retries(request_body, max_retries=2):
     """
-    Invoke the model with exponential backoff and jitter.
+    Invoke the model on the shared Bedrock transport, retrying with the shared backoff policy
+    (full jitter, Retry-After aware).
     """
-    for attempt in range(max_retries):
-        try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.invoke_model(
-                    modelId=MODEL_ID,
-                    body=request_body,
-                    contentType="application/json",
-                    accept="application/json"
-                )
-            )
-            response_body = json.loads(response['body'].read().decode('utf-8'))
-            content = response_body.get('content', [{}])[0].get('text', '')
-            return clean_and_parse_json(content)
-        except Exception as e:
-            if "ThrottlingException" in str(e):
-                sleep_time = min(2 ** attempt + random.uniform(0, 0.5), 60)  # Cap at 60 seconds
-                logger.warning(f"Throttling detected. Retrying in {sleep_time:.2f} seconds...")
-                await asyncio.sleep(sleep_time)
-            else:
-                logger.error(f"Error invoking model: {e}")
-                return {"error": str(e)}
+    transport = get_bedrock_transport()
+    try:
+        response = await DEFAULT_RETRY_POLICY.call(
+            lambda: transport.invoke_model(MODEL_ID, request_body),
+            max_attempts=max_retries
+        )
+        response_body = json.loads(response.decode('utf-8'))
+        content = response_body.get('content', [{}])[0].get('text', '')
+        return clean_and_parse_json(content)
+    except Exception as e:
+        logger.error(f"Error invoking model: {e}")
+        return {"error": str(e)}
 
 async def invoke_model_async(batch):
     """
@@ -101,7 +92,7 @@ async def invoke_model_async(batch):
 
     request_body = json.dumps({
         "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 8000,
+        "max_tokens": BATCH_BUDGET.max_output_tokens,
         "messages": [
             {"role": "user", "content": prompt_text.strip()}
         ],
@@ -113,12 +104,13 @@ async def invoke_model_async(batch):
     # Use the existing invoke_with_retries logic
     return await invoke_with_retries(request_body)
 
-async def process_batches(data_list, batch_size=50):
+async def process_batches(data_list, batch_size=None):
     """
     Processes data in batches, combining rows into a single payload for each batch.
+    Batches are packed to the model's token budget; batch_size optionally caps rows per batch.
     """
-    # Break data_list into batches
-    batches = [data_list[i:i + batch_size] for i in range(0, len(data_list), batch_size)]
+    # Break data_list into token-budgeted batches
+    batches = pack_rows(data_list, BATCH_BUDGET, batch_size)
 
     tasks = [invoke_model_async(batch) for batch in batches]
 
@@ -1,22 +1,18 @@
-import boto3
 import json
 import logging
-import re
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
 import time
 import random
 import asyncio
-import botocore.config
+from integrations.scishield.batch_packer import pack_rows, token_budget
+from integrations.scishield.bedrock_invoker import get_bedrock_invoker
+from integrations.scishield.bedrock_transport import get_bedrock_transport
+from integrations.scishield.json_repair import REPAIR_FAILED, repair_json, repair_stats
+from integrations.scishield.retry_policy import DEFAULT_RETRY_POLICY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure boto3 client with a larger connection pool
-config = botocore.config.Config(max_pool_connections=50)
-client = boto3.client("bedrock-runtime", region_name="us-east-1", config=config)
-
 # Example data
 example_not_a_chemical = "125L, Vial Scint 20ML Glass 500/CC"
 example_chemical = "N04010, MScn Dp Well Solv. 0.4 µm NS 10PK"
@@ -30,19 +26,22 @@ random.shuffle(combined_list)
 # Nova model ID (replace with the correct ID)
 MODEL_ID = "us.amazon.nova-lite-v1:0"
 
+# Output cap of a batch call, which batches are packed to
+BATCH_BUDGET = token_budget(MODEL_ID)._replace(max_output_tokens=5000)
+
 # Helper function to clean and parse JSON response
 def clean_and_parse_json(response_text):
-    cleaned_text = re.sub(r'^```json\n|```$', '', response_text.strip())
-    try:
-        return json.loads(cleaned_text)
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Decode Error: {e}")
-        logger.error(f"Problematic JSON: {cleaned_text}")
-        return {"error": f"JSON Decode Error: {e}", "response": cleaned_text}
+    repaired = repair_json(response_text, "[")
+    repair_stats.record(MODEL_ID, repaired.kind, repaired.dropped)
+    if repaired.kind == REPAIR_FAILED:
+        logger.error(f"Unparseable JSON: {response_text}")
+        return {"error": "Unparseable JSON response", "response": response_text}
+    return repaired.value
 
 def invoke_model_sync(data_row):
     """
-    Synchronous function to invoke the Nova model for a single row.
+    Synchronous function to invoke the Nova model for a single row, on the shared boto3 client
+    (created on first use by the Bedrock invoker).
     """
     prompt_text = f"""
     You are an AI trained to identify chemicals based on text descriptions and extract relevant data if present.
@@ -93,38 +92,36 @@ def invoke_model_sync(data_row):
         }
     }
 
-    retries = 5  # Number of retries
-    for attempt in range(retries):
-        try:
-            response = client.invoke_model_with_response_stream(
-                modelId=MODEL_ID,
-                body=json.dumps(request_body)
-            )
-            response_text = ""
-            stream = response.get("body")
-            if stream:
-                for event in stream:
-                    try:
-                        chunk = event.get("chunk")
-                        if chunk:
-                            chunk_bytes = chunk.get("bytes")
-                            if chunk_bytes:
-                                chunk_str = chunk_bytes.decode('utf-8')
-                                chunk_json = json.loads(chunk_str)
-                                content_block_delta = chunk_json.get("contentBlockDelta")
-                                if content_block_delta:
-                                    response_text += content_block_delta.get("delta", {}).get("text", "")
-                    except json.JSONDecodeError as je:
-                        logger.error(f"JSON Decode Error: {je}")
-                        logger.error(f"Problematic chunk: {chunk_str}")
-            return clean_and_parse_json(response_text)
-        except Exception as e:
-            if "ThrottlingException" in str(e) and attempt < retries - 1:
-                sleep_time = 2 ** attempt  # Exponential backoff
-                time.sleep(sleep_time)
-            else:
-                logger.error(f"Error invoking model: {e}")
-                return {"row": data_row, "error": str(e)}
+    def invoke_once():
+        response = get_bedrock_invoker().client.invoke_model_with_response_stream(
+            modelId=MODEL_ID,
+            body=json.dumps(request_body)
+        )
+        text_parts = []
+        stream = response.get("body")
+        if stream:
+            for event in stream:
+                chunk_str = ""
+                try:
+                    chunk = event.get("chunk")
+                    if chunk:
+                        chunk_bytes = chunk.get("bytes")
+                        if chunk_bytes:
+                            chunk_str = chunk_bytes.decode('utf-8')
+                            chunk_json = json.loads(chunk_str)
+                            content_block_delta = chunk_json.get("contentBlockDelta")
+                            if content_block_delta:
+                                text_parts.append(content_block_delta.get("delta", {}).get("text", ""))
+                except json.JSONDecodeError as je:
+                    logger.error(f"JSON Decode Error: {je}")
+                    logger.error(f"Problematic chunk: {chunk_str}")
+        return clean_and_parse_json("".join(text_parts))
+
+    try:
+        return DEFAULT_RETRY_POLICY.call_sync(invoke_once, max_attempts=5)
+    except Exception as e:
+        logger.error(f"Error invoking model: {e}")
+        return {"row": data_row, "error": str(e)}
 
 async def invoke_model_batch(batch):
     """
@@ -174,52 +171,34 @@ async def invoke_model_batch(batch):
             {"text": "You are an AI model trained to identify chemicals and extract relevant information."}
         ],
         "inferenceConfig": {
-            "max_new_tokens": 5000,
+            "max_new_tokens": BATCH_BUDGET.max_output_tokens,
             "top_p": 0.9,
             "top_k": 20,
             "temperature": 0.7
         }
     }
 
-    retries = 2  # Number of retries
-    for attempt in range(retries):
-        try:
-            response = client.invoke_model_with_response_stream(
-                modelId=MODEL_ID,
-                body=json.dumps(request_body)
-            )
-            response_text = ""
-            stream = response.get("body")
-            if stream:
-                for event in stream:
-                    try:
-                        chunk = event.get("chunk")
-                        if chunk:
-                            chunk_bytes = chunk.get("bytes")
-                            if chunk_bytes:
-                                chunk_str = chunk_bytes.decode('utf-8')
-                                chunk_json = json.loads(chunk_str)
-                                content_block_delta = chunk_json.get("contentBlockDelta")
-                                if content_block_delta:
-                                    response_text += content_block_delta.get("delta", {}).get("text", "")
-                    except json.JSONDecodeError as je:
-                        logger.error(f"JSON Decode Error: {je}")
-                        logger.error(f"Problematic chunk: {chunk_str}")
-            return clean_and_parse_json(response_text)
-        except Exception as e:
-            if "ThrottlingException" in str(e) and attempt < retries - 1:
-                sleep_time = 2 ** attempt  # Exponential backoff
-                time.sleep(sleep_time)
-            else:
-                logger.error(f"Error invoking model: {e}")
-                return {"batch": batch, "error": str(e)}
-
-async def process_batches(data_list, batch_size=50):
+    async def invoke_once():
+        text_parts = []
+        async for chunk_json in get_bedrock_transport().invoke_model_stream(MODEL_ID, json.dumps(request_body)):
+            content_block_delta = chunk_json.get("contentBlockDelta")
+            if content_block_delta:
+                text_parts.append(content_block_delta.get("delta", {}).get("text", ""))
+        return clean_and_parse_json("".join(text_parts))
+
+    try:
+        return await DEFAULT_RETRY_POLICY.call(invoke_once, max_attempts=2)
+    except Exception as e:
+        logger.error(f"Error invoking model: {e}")
+        return {"batch": batch, "error": str(e)}
+
+async def process_batches(data_list, batch_size=None):
     """
     Processes data in batches, combining rows into a single payload for each batch.
+    Batches are packed to the model's token budget; batch_size optionally caps rows per batch.
     """
-    # Break data_list into batches
-    batches = [data_list[i:i + batch_size] for i in range(0, len(data_list), batch_size)]
+    # Break data_list into token-budgeted batches
+    batches = pack_rows(data_list, BATCH_BUDGET, batch_size)
 
     tasks = [invoke_model_batch(batch) for batch in batches]
 
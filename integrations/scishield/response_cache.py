@@ -0,0 +1,219 @@
+# integrations/scishield/response_cache.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(*parts: str) -> str:
+    """
+    Build a cache key from its parts.
+
+    Args:
+        *parts: Key components, e.g. (content hash, model id, prompt version).
+
+    Returns:
+        str: Hex SHA-256 of the parts joined with a separator that cannot appear in them.
+    """
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCacheBackend:
+    """In-process LRU cache with a per-entry TTL. Survives between requests on a warm Lambda."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class DiskCacheBackend:
+    """JSON file per entry under a local directory (``/tmp`` on Lambda), with a TTL."""
+
+    def __init__(self, directory: str = "/tmp/scishield-cache", ttl: float = 86400):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as cache_file:
+                entry = json.load(cache_file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry.get("value")
+
+    def set(self, key: str, value: Any) -> None:
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump({"expires_at": time.time() + self.ttl, "value": value}, cache_file)
+        os.replace(tmp_path, self._path(key))
+
+
+class DynamoDBCacheBackend:
+    """
+    DynamoDB table backend shared across Lambda instances.
+
+    The table needs a string partition key ``cache_key``; ``expires_at`` (epoch seconds) can be
+    enabled as the table TTL attribute. ``endpoint_url`` points it at a local stand-in
+    (e.g. DynamoDB Local) for development.
+    """
+
+    def __init__(self, table_name: str, region_name: str = "us-east-1",
+                 endpoint_url: Optional[str] = None, ttl: float = 86400):
+        import boto3
+
+        self.ttl = ttl
+        resource = boto3.resource("dynamodb", region_name=region_name, endpoint_url=endpoint_url)
+        self.table = resource.Table(table_name)
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self.table.get_item(Key={"cache_key": key}).get("Item")
+        if not item or int(item.get("expires_at", 0)) < time.time():
+            return None
+        return json.loads(item["value"])
+
+    def set(self, key: str, value: Any) -> None:
+        self.table.put_item(Item={
+            "cache_key": key,
+            "value": json.dumps(value),
+            "expires_at": int(time.time() + self.ttl),
+        })
+
+
+class ResponseCache:
+    """
+    Cache facade with hit/miss counters. Backend failures are logged and treated as misses
+    so the cache can never fail a request.
+    """
+
+    def __init__(self, backend: Optional[Any], name: str = "cache"):
+        self.backend = backend
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key`` or None on a miss."""
+        if self.backend is None:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"{self.name} get failed: {e}")
+            return None
+        self._count("hits" if value is not None else "misses")
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key``."""
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"{self.name} set failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/error counters and the hit rate."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def build_cache(prefix: str, default_backend: str = "memory", default_ttl: float = 86400,
+                default_max_entries: int = 1024) -> ResponseCache:
+    """
+    Build a cache from ``<prefix>_*`` environment variables.
+
+    Args:
+        prefix: Environment variable prefix, e.g. "LABEL_CACHE".
+        default_backend: Backend used when ``<prefix>_BACKEND`` is unset.
+        default_ttl: Seconds entries are kept when ``<prefix>_TTL`` is unset.
+        default_max_entries: Size of the "memory" backend when ``<prefix>_MAX_ENTRIES`` is unset.
+
+    Returns:
+        ResponseCache: Cache using the backend named by ``<prefix>_BACKEND``
+        ("memory", "disk", "dynamodb" or "none"), configured by ``<prefix>_TTL``,
+        ``<prefix>_MAX_ENTRIES``, ``<prefix>_DIR``, ``<prefix>_TABLE`` and ``<prefix>_ENDPOINT_URL``.
+    """
+    kind = os.environ.get(f"{prefix}_BACKEND", default_backend).lower()
+    ttl = float(os.environ.get(f"{prefix}_TTL", default_ttl))
+    backend = None
+    try:
+        if kind == "memory":
+            backend = LRUCacheBackend(int(os.environ.get(f"{prefix}_MAX_ENTRIES", default_max_entries)), ttl)
+        elif kind == "disk":
+            directory = os.environ.get(f"{prefix}_DIR", f"/tmp/{prefix.lower().replace('_', '-')}")
+            backend = DiskCacheBackend(directory, ttl)
+        elif kind == "dynamodb":
+            backend = DynamoDBCacheBackend(
+                os.environ[f"{prefix}_TABLE"],
+                endpoint_url=os.environ.get(f"{prefix}_ENDPOINT_URL"),
+                ttl=ttl,
+            )
+    except Exception as e:
+        logger.warning(f"{prefix} disabled, backend '{kind}' could not be created: {e}")
+        backend = None
+    return ResponseCache(backend, name=prefix.lower())
@@ -0,0 +1,199 @@
+# integrations/scishield/retry_policy.py
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from botocore.exceptions import ClientError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ErrorRule(NamedTuple):
+    """Retry rule for one class of error."""
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    throttle: bool = False
+
+
+# Errors worth retrying, keyed by AWS error code or exception class name.
+# Anything not listed here (ValidationException, AccessDeniedException, ...) fails fast.
+DEFAULT_RULES: Dict[str, ErrorRule] = {
+    "ThrottlingException": ErrorRule(max_attempts=5, base_delay=1.0, max_delay=20.0, throttle=True),
+    "TooManyRequestsException": ErrorRule(max_attempts=5, base_delay=1.0, max_delay=20.0, throttle=True),
+    "ServiceUnavailableException": ErrorRule(max_attempts=4, base_delay=1.0, max_delay=10.0),
+    "InternalServerException": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=5.0),
+    "ModelNotReadyException": ErrorRule(max_attempts=4, base_delay=2.0, max_delay=15.0),
+    "ModelStreamErrorException": ErrorRule(max_attempts=2, base_delay=0.5, max_delay=2.0),
+    "ModelTimeoutException": ErrorRule(max_attempts=2, base_delay=0.5, max_delay=2.0),
+    # Transport-level failures (botocore and httpx)
+    "EndpointConnectionError": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+    "ConnectTimeoutError": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+    "ReadTimeoutError": ErrorRule(max_attempts=2, base_delay=0.5, max_delay=4.0),
+    "ConnectError": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+    "ConnectTimeout": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+    "ReadTimeout": ErrorRule(max_attempts=2, base_delay=0.5, max_delay=4.0),
+    "RemoteProtocolError": ErrorRule(max_attempts=3, base_delay=0.5, max_delay=4.0),
+}
+
+
+def error_code(exc: BaseException) -> str:
+    """
+    Return the AWS error code of an exception, or its class name for non-AWS errors.
+
+    Args:
+        exc: The exception raised by a model invocation.
+
+    Returns:
+        str: e.g. "ThrottlingException" for a botocore/transport ClientError.
+    """
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code", type(exc).__name__)
+    message = str(exc)
+    for code in DEFAULT_RULES:
+        if code.endswith("Exception") and code in message:
+            return code
+    return type(exc).__name__
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """
+    Return the server-requested delay in seconds from a ``Retry-After`` header, if any.
+
+    Args:
+        exc: The exception raised by a model invocation.
+
+    Returns:
+        Optional[float]: The delay in seconds, or None when the header is absent or not numeric.
+    """
+    if not isinstance(exc, ClientError):
+        return None
+    headers = exc.response.get("ResponseMetadata", {}).get("HTTPHeaders", {}) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, an overall time budget and per-error-class rules.
+
+    The delay before retry ``n`` is ``uniform(0, min(rule.max_delay, rule.base_delay * 2 ** n))``,
+    raised to the ``Retry-After`` value when the service sends one. A retry is skipped when it
+    would exceed ``max_elapsed`` seconds since the first attempt. Async callers sleep with
+    ``asyncio.sleep`` so a throttled batch never blocks the other batches on the event loop.
+    """
+
+    def __init__(self, rules: Optional[Dict[str, ErrorRule]] = None, max_elapsed: float = 60.0):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.max_elapsed = max_elapsed
+
+    def rule_for(self, exc: BaseException) -> Optional[ErrorRule]:
+        """Return the retry rule for ``exc``, or None if it must not be retried."""
+        return self.rules.get(error_code(exc))
+
+    def is_throttle(self, exc: BaseException) -> bool:
+        """Return True if ``exc`` signals throttling."""
+        rule = self.rule_for(exc)
+        return bool(rule and rule.throttle)
+
+    def next_delay(self, exc: BaseException, attempt: int, elapsed: float,
+                   max_attempts: Optional[int] = None) -> Optional[float]:
+        """
+        Compute the delay before the next attempt.
+
+        Args:
+            exc: The exception raised by the failed attempt.
+            attempt: Zero-based index of the failed attempt.
+            elapsed: Seconds since the first attempt started.
+            max_attempts: Optional cap on attempts overriding the rule's own limit.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if the call should not be retried.
+        """
+        rule = self.rule_for(exc)
+        if rule is None:
+            return None
+        attempts = rule.max_attempts if max_attempts is None else min(rule.max_attempts, max_attempts)
+        if attempt + 1 >= attempts:
+            return None
+        delay = random.uniform(0, min(rule.max_delay, rule.base_delay * 2 ** attempt))
+        server_delay = retry_after(exc)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+        if elapsed + delay > self.max_elapsed:
+            return None
+        return delay
+
+    async def call(self, operation: Callable[[], Awaitable[Any]],
+                   on_retry: Optional[Callable[[BaseException, int, float], None]] = None,
+                   max_attempts: Optional[int] = None) -> Any:
+        """
+        Await ``operation()`` and retry it according to the policy.
+
+        Args:
+            operation: Zero-argument coroutine function performing one attempt.
+            on_retry: Optional callback ``on_retry(exc, attempt, delay)`` invoked before each retry.
+            max_attempts: Optional cap on attempts overriding the per-error rules.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The last exception once it is not retryable or the budget is spent.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return await operation()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, time.monotonic() - started, max_attempts)
+                if delay is None:
+                    raise
+                logger.warning(f"{error_code(e)} on attempt {attempt + 1}, retrying in {delay:.2f} seconds")
+                if on_retry is not None:
+                    on_retry(e, attempt, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def call_sync(self, operation: Callable[[], Any],
+                  on_retry: Optional[Callable[[BaseException, int, float], None]] = None,
+                  max_attempts: Optional[int] = None) -> Any:
+        """
+        Synchronous counterpart of ``call`` for code that is not running on an event loop.
+
+        Args:
+            operation: Zero-argument callable performing one attempt.
+            on_retry: Optional callback ``on_retry(exc, attempt, delay)`` invoked before each retry.
+            max_attempts: Optional cap on attempts overriding the per-error rules.
+
+        Returns:
+            The result of the first successful attempt.
+
+        Raises:
+            Exception: The last exception once it is not retryable or the budget is spent.
+        """
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except Exception as e:
+                delay = self.next_delay(e, attempt, time.monotonic() - started, max_attempts)
+                if delay is None:
+                    raise
+                logger.warning(f"{error_code(e)} on attempt {attempt + 1}, retrying in {delay:.2f} seconds")
+                if on_retry is not None:
+                    on_retry(e, attempt, delay)
+                time.sleep(delay)
+                attempt += 1
+
+
+# Shared policy used by every Bedrock invoker
+DEFAULT_RETRY_POLICY = RetryPolicy()
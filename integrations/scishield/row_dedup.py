@@ -0,0 +1,108 @@
+# integrations/scishield/row_dedup.py
+import json
+import re
+from typing import List, Optional
+
+# Vendor pack sizes and count suffixes, e.g. "500/CC", "10PK", "12 / cs", "100 ct"
+PACK_SIZE_PATTERN = re.compile(
+    r"\b\d+\s*/\s*(?:cs|cc|pk|pkg|bx|box|ea|case|ct|pack|bg|bag|rl|roll)\b"
+    r"|\b\d+\s*(?:pk|pkg|pack|ct|count|ea)\b"
+    r"|\(\s*(?:pk|pack|case|box)\s+of\s+\d+\s*\)",
+    re.IGNORECASE,
+)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Separators that vary between exports of the same item
+SEPARATOR_PATTERN = re.compile(r"\s*[,;|]\s*")
+
+# Prediction fields that depend on the pack size, so they are not copied between rows that differ in it
+PACK_SPECIFIC_FIELDS = ("Quantity", "Units", "Product Number")
+
+
+def normalize_text(value: str) -> str:
+    """
+    Normalize a cell for near-duplicate detection.
+
+    Lower-cases the text, removes vendor pack sizes / count suffixes and collapses
+    whitespace and separators. Volumes and concentrations (e.g. "20ML", "0.4 µm") are kept,
+    since they can distinguish different products.
+
+    Args:
+        value: The cell text.
+
+    Returns:
+        str: The normalized text.
+    """
+    value = PACK_SIZE_PATTERN.sub(" ", value.lower())
+    value = SEPARATOR_PATTERN.sub(", ", value)
+    return WHITESPACE_PATTERN.sub(" ", value).strip(" ,")
+
+
+def normalize_row(row: object) -> object:
+    """
+    Apply ``normalize_text`` to every string in a row.
+
+    Args:
+        row: A data row (dictionary, list or scalar).
+
+    Returns:
+        The normalized row with the same shape.
+    """
+    if isinstance(row, dict):
+        return {str(key).strip().lower(): normalize_row(value) for key, value in row.items()}
+    if isinstance(row, list):
+        return [normalize_row(value) for value in row]
+    if isinstance(row, str):
+        return normalize_text(row)
+    return row
+
+
+def pack_sizes(row: object) -> List[str]:
+    """
+    Return the pack sizes found in the strings of a row, lower-cased and without whitespace.
+
+    Args:
+        row: A data row (dictionary, list or scalar).
+
+    Returns:
+        List[str]: The pack sizes in row order, e.g. ``["500/cc"]``.
+    """
+    if isinstance(row, dict):
+        return [size for key in sorted(row, key=str) for size in pack_sizes(row[key])]
+    if isinstance(row, list):
+        return [size for value in row for size in pack_sizes(value)]
+    if isinstance(row, str):
+        return [WHITESPACE_PATTERN.sub("", match.group(0).lower()) for match in PACK_SIZE_PATTERN.finditer(row)]
+    return []
+
+
+def dedup_key(row: object) -> str:
+    """Return the key under which exact and normalized duplicates of ``row`` collide."""
+    return json.dumps(normalize_row(row), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def fan_out_prediction(prediction: object, row: object, representative: Optional[object] = None) -> object:
+    """
+    Copy a representative's prediction to another member row of its group.
+
+    The classification and row-independent fields (chemical name, CAS number, ...) are shared by
+    the whole group. Members that differ from the representative in pack size get None for the
+    ``PACK_SPECIFIC_FIELDS`` instead of the representative's quantity, units and product number.
+
+    Args:
+        prediction: The prediction returned for the group representative.
+        row: The member row receiving the prediction.
+        representative: The representative's input row (default: the prediction's ``row``).
+
+    Returns:
+        The prediction with ``row`` set to the member's own input row.
+    """
+    if not isinstance(prediction, dict):
+        return prediction
+    fanned = {**prediction, "row": row}
+    if representative is None:
+        representative = prediction.get("row")
+    if pack_sizes(representative) != pack_sizes(row):
+        for field in PACK_SPECIFIC_FIELDS:
+            if field in fanned:
+                fanned[field] = None
+    return fanned
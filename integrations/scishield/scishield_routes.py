@@ -1,150 +1,43 @@
 # integrations/scishield/scishield_routes.py
-from flask import Flask, redirect, request, render_template, url_for, session, make_response, jsonify, flash, Blueprint
+from flask import Flask, redirect, request, render_template, url_for, session, make_response, jsonify, flash, Blueprint, Response, stream_with_context
 from functools import wraps
 import uuid
 from werkzeug.utils import secure_filename
-from pytz import timezone
-from typing import Dict, Tuple, Optional, List
-import base64  # Import the base64 module
-import openai
-import requests
-from PIL import Image
+from typing import Dict, Iterator, Tuple, Optional
 import os
 import traceback
 # from labtools_authorizer import *
-from vitality_tools.secrets_manager_tools import get_secrets
-import boto3
-import base64
 import json
-import re
-
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")  # Replace with your AWS region
-runtime = boto3.client("bedrock-runtime","us-east-1")
-my_secrets = get_secrets("labtools-dev", "us-east-1", "dev")
+import logging
+from integrations.scishield.app_resources import get_secret
+from integrations.scishield.image_buffer import (
+    content_length_exceeds, download_image, read_image_stream, sniff_image_type)
+from integrations.scishield.image_preprocess import fit_image, PREPROCESS_VERSION
+from integrations.scishield.label_extraction import (
+    LABEL_MODELS, LabelModel, StageTimer, extract_label, stream_label)
+from integrations.scishield.response_cache import build_cache, make_cache_key, sha256_bytes
 
 # Create a Blueprint for your SciShield routes
 scishield_bp = Blueprint("chem-snap", __name__)
 
-# OpenAI API Key
-api_key = my_secrets.get('OPEN_AI_API_KEY', None)
-product_key = my_secrets.get('PRODUCT_KEY', None)
-openai.api_key = api_key
-
+# Configure logging
+logger = logging.getLogger(__name__)
 
-# Central Route Methods - 
+# Secrets (OPEN_AI_API_KEY, PRODUCT_KEY) and the Bedrock client are created on first use,
+# see integrations/scishield/app_resources.py
 
-def extract_value_from_raw(data_string, field_name):
-    """
-    Extract the value for a given field from the raw JSON-like string.
-    This function handles fields that might have variations in names.
-    """
-    # Define patterns for possible variations of each field
-    field_aliases = {
-        'Chemical name': [r"Chemical name or CAS number", r"Chemical Name"],
-        'CAS number': [r"Chemical name or CAS number", r"CAS Number"],
-        'Amount': [r"Amount"],
-        'Units': [r"Units"],
-        'Lot number': [r"Lot Number"],
-        'Product number': [r"Product Number"],
-        'Product name': [r"Product Name"],
-        'Manufacturer': [r"Manufacturer"]
-    }
-
-    # Iterate over aliases for the given field and try to extract the value
-    for alias in field_aliases.get(field_name, [field_name]):
-        pattern = rf'"{alias}":\s*("(.*?)"|null)'
-        match = re.search(pattern, data_string, re.IGNORECASE)
-        if match:
-            return match.group(2) if match.group(2) is not None else "null"
-    return "null"
-
-
-def encode_image(image_path:str):
-    """
-    Encode an image file into a Base64-encoded string.
+# Bump when the label extraction prompts (label_extraction.py) change so cached results are not reused
+LABEL_PROMPT_VERSION = "v1"
 
-    Args:
-        image_path (str): The path to the image file to be encoded.
+# Extraction results keyed by (image hash, model id, prompt and preprocessing version), see LABEL_CACHE_* env vars
+label_cache = build_cache("LABEL_CACHE")
 
-    Returns:
-        str: The Base64-encoded representation of the image.
+INVALID_IMAGE_MESSAGE = 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'
 
-    Raises:
-        FileNotFoundError: If the specified image file does not exist.
-    """
-    try:
-        with open(image_path, "rb") as image_file:
-            # Read the binary data from the image file and encode it in Base64
-            encoded_image = base64.b64encode(image_file.read()).decode('utf-8')
-            return encoded_image
-    except FileNotFoundError:
-        raise FileNotFoundError(f"The specified image file '{image_path}' does not exist.")
-
-
-def download_file_to_tmp(url: str, chunk_size: int = 8192) -> str:
-    """
-    Download a file from a given URL and save it to a unique filename in the /tmp directory.
-
-    Args:
-        url (str): The URL of the file to download.
-        chunk_size (int, optional): The size of each data chunk to download at a time (default: 8192 bytes).
-
-    Raises:
-        Exception: If the download fails or the URL is invalid.
-
-    Returns:
-        str: The path of the downloaded file.
-    """
-    try:
-        # Send an HTTP GET request to the URL
-        response = requests.get(url, stream=True)
+EVENT_STREAM_MIMETYPE = "text/event-stream"
 
-        # Check if the response status code is OK (200)
-        response.raise_for_status()
-
-        # Generate a unique filename using UUID and save it to /tmp
-        unique_filename = f'/tmp/{uuid.uuid4()}.png'
-
-        with open(unique_filename, 'wb') as file:
-            for chunk in response.iter_content(chunk_size=chunk_size):
-                if chunk:
-                    file.write(chunk)
-
-        return unique_filename
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to download the file from {url}: {e}")
-
-
-def download_file_to_tmp2(file, chunk_size: int = 8192) -> str:
-    """
-    Save a file from a Flask request.files['file'] object to a unique filename in the /tmp directory.
-
-    Args:
-        file (FileStorage): The file object obtained from request.files['file'] in Flask.
-        chunk_size (int, optional): The size of each data chunk to download at a time (default: 8192 bytes).
-
-    Raises:
-        Exception: If the file save fails.
-
-    Returns:
-        str: The path of the saved file.
-    """
-    try:
-        # Generate a unique filename using UUID and save it to /tmp
-        unique_filename = f'/tmp/{uuid.uuid4()}.png'
-
-        with open(unique_filename, 'wb') as saved_file:
-            # Read the file in chunks and save it
-            while True:
-                chunk = file.read(chunk_size)
-                if not chunk:
-                    break
-                saved_file.write(chunk)
-
-        return unique_filename
-    except Exception as e:
-        raise Exception(f"Failed to save the file: {e}")
 
+# Central Route Methods - 
 
 def process_image(image_path: str, final_square_size: int, delete_original: bool, verbose: bool) -> None:
     """
@@ -152,6 +45,8 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
 
     This function resizes an image to fit within a square of a given size, 
     pads it to maintain aspect ratio, and optionally deletes the original image.
+    A file wrapper over ``fit_image``, which decodes at reduced resolution; the label routes use
+    ``prepare_image`` in memory instead, without padding or a ``_padded.png`` file.
 
     Args:
         image_path (str): The file path of the image to be processed.
@@ -166,35 +61,13 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
         Exception: Propagates any exceptions raised during image processing.
     """
     try:
-        # Open the image
-        input_img = Image.open(image_path)
-
-        # Get the original image dimensions
-        original_width, original_height = input_img.size
-
-        # Calculate the scaling factor to fit the image within the square
-        scale_factor = min(final_square_size / original_width, final_square_size / original_height)
-
-        # Calculate the new dimensions
-        new_width = int(original_width * scale_factor)
-        new_height = int(original_height * scale_factor)
-
-        # Resize the image while maintaining its aspect ratio
-        input_img = input_img.resize((new_width, new_height), Image.LANCZOS)
-
-        # Create a new blank square image with the final_square_size
-        output_img = Image.new("RGB", (final_square_size, final_square_size), (0, 0, 0))
-
-        # Calculate the position to paste the resized image (centered)
-        x_offset = (final_square_size - new_width) // 2
-        y_offset = (final_square_size - new_height) // 2
-
-        # Paste the resized image onto the blank square image
-        output_img.paste(input_img, (x_offset, y_offset))
+        with open(image_path, "rb") as image_file:
+            data = image_file.read()
 
         # Save the padded image to file, overwriting the original if needed
         output_image_name = os.path.splitext(image_path)[0] + f"_padded.png"
-        output_img.save(output_image_name)
+        with open(output_image_name, "wb") as output_file:
+            output_file.write(fit_image(data, final_square_size, pad=True, format="PNG"))
 
         # Optionally, delete the original image
         if delete_original:
@@ -208,107 +81,258 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
         print(f"Error processing {image_path}: {str(e)}")
 
 
-def is_image_large(file_path: str, max_size_mb: float = 20) -> bool:
+def extract_value_git(data_string: str, key: str) -> str:
     """
-    Check if an image file exceeds a specified size limit.
+    Extract a value associated with a given key from a specially formatted string.
 
     Args:
-        file_path: Path to the file to be checked.
-        max_size_mb: Maximum allowed file size in megabytes (default: 20).
+        data_string: The input string containing key-value pairs.
+        key: The key whose value needs to be extracted.
 
     Returns:
-        bool: True if the file size exceeds max_size_mb, False otherwise.
+        str: The extracted value, stripped of leading/trailing whitespace.
+    """
+    start_index = data_string.find(f'"{key}"') + len(f'"{key}"') + 2
+    end_index = data_string.find(',', start_index)
+    value = data_string[start_index:end_index]
+    return value.strip()
 
-    Raises:
-        FileNotFoundError: If the specified file does not exist.
+
+def is_image_file(file_path: str) -> bool:
     """
-    # Check if the file exists
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
+    Check if a file has a valid image extension.
 
-    # Get the file size in bytes
-    file_size_bytes = os.path.getsize(file_path)
+    Args:
+        file_path: Path to the file to be checked.
 
-    # Convert bytes to megabytes
-    file_size_mb = file_size_bytes / (1024 * 1024)
+    Returns:
+        bool: True if the file extension matches known image formats, False otherwise.
+    """
+    valid_extensions = ['.png', '.jpeg', '.jpg', '.webp', '.gif']
+    _, file_extension = os.path.splitext(file_path.lower())
+    return file_extension in valid_extensions
 
-    # Check if the file size is greater than the specified maximum size
-    return file_size_mb > max_size_mb
+def label_error(message: str) -> Response:
+    """Build the JSON error response the label routes return (with HTTP 200, as they always have)."""
+    final = { 'status' : "500", 'data' : {'post': message}}
+    response = jsonify(final)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
 
 
-def extract_value_git(data_string: str, key: str) -> str:
+def label_response(final: Dict, report: Optional[Dict] = None, timer: Optional[StageTimer] = None) -> Response:
     """
-    Extract a value associated with a given key from a specially formatted string.
+    Build the JSON response of a label route, exposing the payload sizes and stage timings of
+    ``extract_label`` as headers.
 
     Args:
-        data_string: The input string containing key-value pairs.
-        key: The key whose value needs to be extracted.
+        final: The extraction result.
+        report: The report from ``extract_label``; None for cache hits.
+        timer: The request's stage timer, sent as ``Server-Timing``.
 
     Returns:
-        str: The extracted value, stripped of leading/trailing whitespace.
+        Response: The Flask response.
     """
-    start_index = data_string.find(f'"{key}"') + len(f'"{key}"') + 2
-    end_index = data_string.find(',', start_index)
-    value = data_string[start_index:end_index]
-    return value.strip()
+    print(final)
+    response = jsonify(final)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if report is None:
+        response.headers['X-Cache'] = 'HIT'
+    else:
+        response.headers['X-Image-Bytes-Original'] = str(report["original_bytes"])
+        response.headers['X-Image-Bytes-Sent'] = str(report["sent_bytes"])
+        response.headers['X-Image-Fallback'] = str(report["fallback"]).lower()
+        if report["crop_box"] and not report["fallback"]:
+            response.headers['X-Image-Crop'] = ','.join(str(edge) for edge in report["crop_box"])
+    if timer is not None:
+        response.headers['Server-Timing'] = timer.server_timing()
+    return response
+
+
+def label_cache_key(model: LabelModel, image_bytes: bytes) -> str:
+    """Return the label cache key of an image for a model."""
+    return make_cache_key(sha256_bytes(image_bytes), model.model_id, LABEL_PROMPT_VERSION, PREPROCESS_VERSION)
+
+
+def cached_extract_label(model: LabelModel, image_bytes: bytes, media_type: str, timer: StageTimer) -> Response:
+    """Serve a label extraction from the cache, or run it and cache the result."""
+    # Repeat scans of the same label are served from the cache
+    with timer.stage("cache"):
+        cache_key = label_cache_key(model, image_bytes)
+        cached = label_cache.get(cache_key)
+    if cached is not None:
+        return label_response(cached, timer=timer)
+
+    final, report = extract_label(model, image_bytes, media_type, timer)
+    label_cache.set(cache_key, final)
+    return label_response(final, report, timer)
+
+
+def wants_event_stream() -> bool:
+    """
+    Return True if the client asked for fields as they are extracted, with ``Accept: text/event-stream``
+    or a ``stream=true`` form / query parameter.
+    """
+    if request.values.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best_match(["application/json", EVENT_STREAM_MIMETYPE]) == EVENT_STREAM_MIMETYPE
 
 
-def extract_value_claude(input_string: str) -> Dict:
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iter_label_events(model: LabelModel, image_bytes: bytes, media_type: str, timer: StageTimer) -> Iterator[str]:
     """
-    Transform a JSON string into a dictionary with standardized keys.
+    Stream a label extraction as server-sent events.
 
     Args:
-        input_string: JSON string containing chemical information with various key formats.
+        model: The model configuration.
+        image_bytes: The validated image bytes.
+        media_type: The sniffed media type of ``image_bytes``.
+        timer: The request's stage timer.
+
+    Yields:
+        str: ``field`` events (``{"field", "value"}``) as soon as each field is complete, one
+        ``result`` event with the same JSON the non-streamed route returns, and a final ``done``
+        event with the cache status, payload sizes and stage timings; or an ``error`` event.
+        A ``reset`` event means the low-confidence fallback replaced the extraction: drop the
+        fields received so far (the replacement's fields follow). The ``result`` event is authoritative.
+    """
+    try:
+        with timer.stage("cache"):
+            cache_key = label_cache_key(model, image_bytes)
+            cached = label_cache.get(cache_key)
+        if cached is not None:
+            for field, value in cached['data']['post'].items():
+                if field != 'raw output':
+                    yield sse_event("field", {"field": field, "value": value})
+            yield sse_event("result", cached)
+            yield sse_event("done", {"cache": "HIT", "timings": timer.timings})
+            return
+
+        for event in stream_label(model, image_bytes, media_type, timer):
+            if "field" in event:
+                yield sse_event("field", event)
+                continue
+            if "reset" in event:
+                yield sse_event("reset", event["reset"])
+                continue
+            label_cache.set(cache_key, event["result"])
+            print(event["result"])
+            yield sse_event("result", event["result"])
+            yield sse_event("done", {"cache": "MISS", **event["report"]})
 
-    Returns:
-        Dict[str, Any]: Dictionary with standardized keys mapped from the input.
+    except Exception as e:
+        traceback_str = traceback.format_exc()
+        print(e)
+        print(traceback_str)
+        yield sse_event("error", { 'status' : "500", 'data' : {'post': model.failure_message}})
 
-    Note:
-        The function converts all keys to lowercase before processing and maps
-        them to standardized output keys based on substring matching.
+
+def label_event_stream(model: LabelModel, image_bytes: bytes, media_type: str, timer: StageTimer) -> Response:
+    """Build the streamed ``text/event-stream`` response for ``iter_label_events``."""
+    response = Response(stream_with_context(iter_label_events(model, image_bytes, media_type, timer)),
+                        mimetype=EVENT_STREAM_MIMETYPE)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def run_label_upload(model_key: str) -> Response:
     """
-    # Define the mapping rules for substrings to desired output keys
-    key_map = {
-        "chemical": "Chemical Name",
-        "cas": "CAS Number",
-        "amount": "Amount",
-        "unit": "Units",
-        "lot": "Lot Number",
-        "product_num": "Product Number",
-        "product_nam": "Product Name",
-        "manuf": "Manufacturer"
-    }
-
-    # Load the input string into a Python dictionary and convert keys to lowercase
-    input_dict = json.loads(input_string.lower())
-
-    # Initialize the output dictionary
-    output_dict = {}
-
-    # Iterate through the input dictionary and map the keys based on substrings
-    for key, value in input_dict.items():
-        # Find the appropriate output key based on substring matching
-        for substring, output_key in key_map.items():
-            if substring in key:
-                output_dict[output_key] = value
-                break  # Stop searching once a match is found
-
-    return output_dict
+    The shared body of the image upload routes: validate the request, read and check the image,
+    then extract the label with the configured model.
 
+    Args:
+        model_key: The ``LABEL_MODELS`` key of the model to use.
 
-def is_image_file(file_path: str) -> bool:
+    Returns:
+        Response: The extraction result, or an error with status "500" in the body.
     """
-    Check if a file has a valid image extension.
+    model = LABEL_MODELS[model_key]
+    timer = StageTimer()
+    try:
+        with timer.stage("validate"):
+            # Reject oversized uploads from Content-Length before the body is parsed
+            if(content_length_exceeds(request.content_length, model.max_image_mb)):
+                return label_error(model.too_large_message)
+
+            org = request.form.get('org', '')
+            apikey = request.form.get('api_key', '')
+            file = request.files['file']
+
+            if(apikey != get_secret('PRODUCT_KEY')):
+                return label_error('Error- API Key is Invaild')
+
+            # Read the image into memory; the byte count is checked while streaming
+            image_bytes = read_image_stream(file.stream, model.max_image_mb)
+            if(image_bytes is None):
+                return label_error(model.too_large_message)
+
+            # Check the real format from the file's magic bytes, not its name
+            media_type = sniff_image_type(image_bytes)
+            if(media_type is None):
+                return label_error(INVALID_IMAGE_MESSAGE)
+
+        if wants_event_stream():
+            return label_event_stream(model, image_bytes, media_type, timer)
+        return cached_extract_label(model, image_bytes, media_type, timer)
+
+    except Exception as e:
+        traceback_str = traceback.format_exc()
+        print(e)
+        print(traceback_str)
+        return label_error(model.failure_message)
+
+
+def run_label_url(model_key: str) -> Response:
+    """
+    The shared body of the image URL routes: validate the request, download and check the image,
+    then extract the label with the configured model.
 
     Args:
-        file_path: Path to the file to be checked.
+        model_key: The ``LABEL_MODELS`` key of the model to use.
 
     Returns:
-        bool: True if the file extension matches known image formats, False otherwise.
+        Response: The extraction result, or an error with status "500" in the body.
     """
-    valid_extensions = ['.png', '.jpeg', '.jpg', '.webp', '.gif']
-    _, file_extension = os.path.splitext(file_path.lower())
-    return file_extension in valid_extensions
+    model = LABEL_MODELS[model_key]
+    timer = StageTimer()
+    try:
+        with timer.stage("validate"):
+            org = request.form.get('org', '')
+            apikey = request.form.get('api_key', '')
+            url = request.form.get('html', '')
+
+            if(apikey != get_secret('PRODUCT_KEY')):
+                return label_error('Error- API Key is Invaild')
+
+            if(not is_image_file(url)):
+                return label_error(INVALID_IMAGE_MESSAGE)
+
+        with timer.stage("download"):
+            # get the image into memory, stopping once it exceeds the size limit
+            image_bytes = download_image(url, model.max_image_mb)
+        if(image_bytes is None):
+            return label_error(model.too_large_message)
+
+        media_type = sniff_image_type(image_bytes)
+        if(media_type is None):
+            return label_error(INVALID_IMAGE_MESSAGE)
+
+        if wants_event_stream():
+            return label_event_stream(model, image_bytes, media_type, timer)
+        return cached_extract_label(model, image_bytes, media_type, timer)
+
+    except Exception as e:
+        traceback_str = traceback.format_exc()
+        print(e)
+        print(traceback_str)
+        return label_error(model.failure_message)
+
 
 #swagger docs
 @scishield_bp.route('/docs', methods=['GET', 'POST'])
@@ -347,123 +371,10 @@ def scishield_interpret_image() -> Tuple:
         - 500: Error (invalid API key, invalid image, or processing failure)
 
     Note:
-        The image is downloaded temporarily, validated for type and size (max 20MB),
+        The image is downloaded into memory, validated for type (magic bytes) and size (max 20MB),
         then sent to GPT-4 vision for label information extraction.
     """
-    try:
-        org = request.form.get('org', '')
-        apikey = request.form.get('api_key', '')
-        url = request.form.get('html', '')
-
-
-        if(apikey != product_key):
-            final = { 'status' : "500", 'data' : {'post': 'Error- API Key is Invaild'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        if(not is_image_file(url)):
-            final = { 'status' : "500", 'data' : {'post': 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        # get the image
-        tmp_path = download_file_to_tmp(url)
-        if(is_image_large(tmp_path, 20)):
-            final = { 'status' : "500", 'data' : {'post': 'Error - Image is too large'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-            
-        base64_image = encode_image(tmp_path)
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        payload = {
-            "model": "gpt-4o",
-            "messages": [
-            {
-                "role": "user",
-                "content": [
-                {
-                    "type": "text",
-                    "text": """Please provide a structured JSON response that contains info on the label in the photo sepcificly look for: 
-                ( Chemical name or CAS number, 
-                Amount, 
-                Units, 
-                Lot number, 
-                Product number, 
-                Product name , 
-                Manufacturer )
-                if no label info is detected say null
-                if grade information is found add to product name if its not keep text as is
-                if no product name use chemical name
-                add no text besdies null about what you can't find to response
-                """
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {
-                    "url": f"data:image/jpeg;base64,{base64_image}"
-                    }
-                }
-                ]
-            }
-            ],
-            "max_tokens": 300
-        }
-
-        res = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
-        json_response = res.json()
-        print(json_response)
-
-        # Extracting the content from the API response
-        data_string = json_response['choices'][0]['message']['content']
-
-        # Extracting the required information
-        clean_dict = {
-            'Chemical name': extract_value_from_raw(data_string, 'Chemical name'),
-            'CAS number': extract_value_from_raw(data_string, 'CAS number'),
-            'Amount': extract_value_from_raw(data_string, 'Amount'),
-            'Units': extract_value_from_raw(data_string, 'Units'),
-            'Lot number': extract_value_from_raw(data_string, 'Lot number'),
-            'Product number': extract_value_from_raw(data_string, 'Product number'),
-            'Product name': extract_value_from_raw(data_string, 'Product name'),
-            'Manufacturer': extract_value_from_raw(data_string, 'Manufacturer')
-        }
-
-        clean_dict['raw output'] = data_string
-
-        # Final clean-up of values
-        final_dict = {}
-        for key, value in clean_dict.items():
-            # Further cleaning unnecessary symbols
-            cleaned_value = value.replace('"', '').replace('/', '').replace('\\', '').replace('}','').replace('\n','').replace('`','')
-            final_dict[key] = cleaned_value
-
-        final = { 'status' : "200", 'data' : {'post': final_dict}}
-        if('null' in data_string):
-            final = { 'status' : "206", 'data' : {'post': final_dict}}
-
-        
-        # Displaying the clean dictionary
-        print(final)
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-    
-    except Exception as e:
-        traceback_str = traceback.format_exc()
-        final = { 'status' : "500", 'data' : {'post': 'Error- Image Failed to Upload'}}
-        # Displaying the clean dictionary
-        print(e)
-        print(traceback_str)
-
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+    return run_label_url("gpt-4o")
 
 
 @scishield_bp.route('/image_upload_b64', methods=['POST'])
@@ -484,125 +395,10 @@ def scishield_interpret_image2() -> Tuple:
         - 500: Error (invalid API key, invalid image, or processing failure)
 
     Note:
-        The uploaded file is saved temporarily, validated for type and size (max 20MB),
+        The uploaded file is read into memory, validated for type (magic bytes) and size (max 20MB),
         then sent to GPT-4 vision for label information extraction.
     """
-    try:
-        org = request.form.get('org', '')
-        apikey = request.form.get('api_key', '')
-        file = request.files['file']
-
-
-        if(apikey != product_key):
-            final = { 'status' : "500", 'data' : {'post': 'Error- API Key is Invaild'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-        
-        # get the image
-        tmp_path = download_file_to_tmp2(file)
-
-        #process_image(tmp_path, 1024, False, False)
-        if(is_image_large(tmp_path, 20)):
-            final = { 'status' : "500", 'data' : {'post': 'Error - Image is too large'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-            
-        if(not is_image_file(tmp_path)):
-            final = { 'status' : "500", 'data' : {'post': 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        base64_image = encode_image(tmp_path)
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        payload = {
-            "model": "gpt-4o",
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
-                        (Chemical name or CAS number, 
-                        Amount, 
-                        Units, 
-                        Lot number, 
-                        Product number, 
-                        Product name, 
-                        Manufacturer)
-                        if no label info is detected say null
-                        if grade information is found add to product name if its not keep text as is
-                        if no product name use chemical name
-                        add no text besides null about what you can't find to response
-                        """
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            "max_tokens": 300
-        }
-
-        res = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
-        json_response = res.json()
-        print(json_response)
-
-        # Extracting the content from the API response
-        data_string = json_response['choices'][0]['message']['content']
-
-        # Extracting the required information
-        clean_dict = {
-            'Chemical name': extract_value_from_raw(data_string, 'Chemical name'),
-            'CAS number': extract_value_from_raw(data_string, 'CAS number'),
-            'Amount': extract_value_from_raw(data_string, 'Amount'),
-            'Units': extract_value_from_raw(data_string, 'Units'),
-            'Lot number': extract_value_from_raw(data_string, 'Lot number'),
-            'Product number': extract_value_from_raw(data_string, 'Product number'),
-            'Product name': extract_value_from_raw(data_string, 'Product name'),
-            'Manufacturer': extract_value_from_raw(data_string, 'Manufacturer')
-        }
-
-        clean_dict['raw output'] = data_string
-
-        # Final clean-up of values
-        final_dict = {}
-        for key, value in clean_dict.items():
-            # Further cleaning unnecessary symbols
-            cleaned_value = value.replace('"', '').replace('/', '').replace('\\', '').replace('}','').replace('\n','').replace('`','')
-            final_dict[key] = cleaned_value
-
-        final = { 'status' : "200", 'data' : {'post': final_dict}}
-        if('null' in data_string):
-            final = { 'status' : "206", 'data' : {'post': final_dict}}
-
-        
-        # Displaying the clean dictionary
-        print(final)
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-    
-    except Exception as e:
-        traceback_str = traceback.format_exc()
-        final = { 'status' : "500", 'data' : {'post': 'Error- Image Failed to Upload'}}
-        # Displaying the clean dictionary
-        print(e)
-        print(traceback_str)
-
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+    return run_label_upload("gpt-4o")
 
 
 # claude image routes 
@@ -629,123 +425,7 @@ def scishield_c_interpret_image1() -> Tuple:
         - Returns cleaned data with special characters removed
         - Includes raw model output in the response for debugging
     """
-    try:
-        org = request.form.get('org', '')
-        apikey = request.form.get('api_key', '')
-        file = request.files['file']
-
-        if(apikey != product_key):
-            final = { 'status' : "500", 'data' : {'post': 'Error- API Key is Invaild'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-        
-        # get the image
-        tmp_path = download_file_to_tmp2(file)
-
-        #process_image(tmp_path, 1024, False, False)
-        if(is_image_large(tmp_path, 9)):
-            final = { 'status' : "500", 'data' : {'post': 'Error - Image is too large for Claude'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-            
-        if(not is_image_file(tmp_path)):
-            final = { 'status' : "500", 'data' : {'post': 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        base64_image = encode_image(tmp_path)
-        request_text = """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
-                        (Chemical name or CAS_Number, 
-                        Amount, 
-                        Units, 
-                        Lot_Number, 
-                        Product_Number, 
-                        Product_Name, 
-                        Manufacturer)
-                        make sure the keys for each apear exactly as written above,
-                        if no label info is detected say null,
-                        if grade information is found add to product name if its not keep text as is,
-                        if no product name use chemical name,
-                        add no text besides null about what you can't find to response.
-                        """
-
-        body = json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/jpeg",
-                                        "data": base64_image,
-                                    },
-                                },
-                                {"type": "text", "text": request_text},
-                                #{"type": "text", "text": "What is in this image?"},
-                            ],
-                        }
-                    ],
-                }
-            )
-
-        response = runtime.invoke_model(
-            modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
-            body=body
-        )
-        response_body = json.loads(response.get("body").read())
-        data_string = response_body['content'][0]['text']
-        print(response_body['content'][0]['text'])
-        #Extracting the required information
-        print('data string')
-        print()
-        print(data_string)
-        print()
-        clean_dict = extract_value_claude(data_string)
-        clean_dict['raw output'] = data_string
-        final_dict = {}
-        for key, value in clean_dict.items():
-            try:
-                if value is not None:  # Check if value is not None
-                    value = str(value)
-                    cleaned_value = value.replace('"', '').replace('/', '').replace('\\', '').replace('}','').replace('\n','').replace('`','')
-                else:
-                    cleaned_value = 'Null'  # Or set it to any default value you'd prefer
-                final_dict[key] = cleaned_value
-            except:
-                 cleaned_value = 'Null'
-                 final_dict[key] = cleaned_value
-
-        final = { 'status' : "200", 'data' : {'post': final_dict}}
-        if('null' in data_string):
-            final = { 'status' : "206", 'data' : {'post': final_dict}}
-        # final = { 'status' : "200", 'data' : {'post': data_string}}
-        # if('null' in data_string):
-        #     final = { 'status' : "206", 'data' : {'post': data_string}}
-        # Displaying the clean dictionary
-
-        print(final)
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-    
-    except Exception as e:
-        traceback_str = traceback.format_exc()
-        final = { 'status' : "500", 'data' : {'post': 'Error- Image Failed to Download'}}
-        # Displaying the clean dictionary
-        print(e)
-        print(traceback_str)
-
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+    return run_label_upload("claude-3-5-sonnet")
 
 @scishield_bp.route('/claude3/sonnet/image_upload', methods=['POST'])
 def scishield_c_interpret_image2() -> Tuple:
@@ -774,121 +454,7 @@ def scishield_c_interpret_image2() -> Tuple:
         - 206: Partial Success - Some null values detected
         - 500: Error - Invalid API key, invalid image, or processing failure
     """
-    try:
-        org = request.form.get('org', '')
-        apikey = request.form.get('api_key', '')
-        file = request.files['file']
-
-        if(apikey != product_key):
-            final = { 'status' : "500", 'data' : {'post': 'Error- API Key is Invaild'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-        
-        # get the image
-        tmp_path = download_file_to_tmp2(file)
-
-        #process_image(tmp_path, 1024, False, False)
-        if(is_image_large(tmp_path, 9)):
-            final = { 'status' : "500", 'data' : {'post': 'Error - Image is too large for Claude'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-            
-        if(not is_image_file(tmp_path)):
-            final = { 'status' : "500", 'data' : {'post': 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        base64_image = encode_image(tmp_path)
-        request_text = """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
-                        (Chemical name or CAS_Number, 
-                        Amount, 
-                        Units, 
-                        Lot_Number, 
-                        Product_Number, 
-                        Product_Name, 
-                        Manufacturer)
-                        make sure the keys for each apear exactly as written above,
-                        if no label info is detected say null,
-                        if grade information is found add to product name if its not keep text as is,
-                        if no product name use chemical name,
-                        add no text besides null about what you can't find to response.
-                        """
-
-        body = json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/jpeg",
-                                        "data": base64_image,
-                                    },
-                                },
-                                {"type": "text", "text": request_text},
-                                #{"type": "text", "text": "What is in this image?"},
-                            ],
-                        }
-                    ],
-                }
-            )
-
-        response = runtime.invoke_model(
-            modelId="anthropic.claude-3-sonnet-20240229-v1:0",
-            body=body
-        )
-        response_body = json.loads(response.get("body").read())
-        data_string = response_body['content'][0]['text']
-        print(response_body['content'][0]['text'])
-        #Extracting the required information
-
-        clean_dict = extract_value_claude(data_string)
-        clean_dict['raw output'] = data_string
-        final_dict = {}
-        for key, value in clean_dict.items():
-            try:
-                if value is not None:  # Check if value is not None
-                    value = str(value)
-                    cleaned_value = value.replace('"', '').replace('/', '').replace('\\', '').replace('}','').replace('\n','').replace('`','')
-                else:
-                    cleaned_value = 'Null'  # Or set it to any default value you'd prefer
-                final_dict[key] = cleaned_value
-            except:
-                 cleaned_value = 'Null'
-                 final_dict[key] = cleaned_value
-
-
-        final = { 'status' : "200", 'data' : {'post': final_dict}}
-        if('null' in data_string):
-            final = { 'status' : "206", 'data' : {'post': final_dict}}
-        # final = { 'status' : "200", 'data' : {'post': data_string}}
-        # if('null' in data_string):
-        #     final = { 'status' : "206", 'data' : {'post': data_string}}
-        # Displaying the clean dictionary
-
-        print(final)
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-    
-    except Exception as e:
-        traceback_str = traceback.format_exc()
-        final = { 'status' : "500", 'data' : {'post': 'Error- Image Failed to Download'}}
-        # Displaying the clean dictionary
-        print(e)
-        print(traceback_str)
-
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+    return run_label_upload("claude-3-sonnet")
 
 @scishield_bp.route('/claude3/haiku/image_upload', methods=['POST'])
 def scishield_c_interpret_image3() -> Tuple:
@@ -906,7 +472,7 @@ def scishield_c_interpret_image3() -> Tuple:
             - HTTP status code (200, 206, or 500)
 
     Notes:
-        - Validates API key against product_key before processing
+        - Validates API key against the PRODUCT_KEY secret before processing
         - Checks image file type (.png, .jpeg, .jpg, .webp, .gif) and size (<9MB)
         - Uses Claude 3 Haiku model (anthropic.claude-3-haiku-20240307-v1:0) for extraction
         - Processes response to clean special characters and standardize null values
@@ -917,122 +483,39 @@ def scishield_c_interpret_image3() -> Tuple:
         - 206: Partial Success - Some null values detected in response
         - 500: Error - Invalid API key, invalid image, or processing failure
     """
-    try:
-        org = request.form.get('org', '')
-        apikey = request.form.get('api_key', '')
-        file = request.files['file']
-
-        if(apikey != product_key):
-            final = { 'status' : "500", 'data' : {'post': 'Error- API Key is Invaild'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-        
-        # get the image
-        tmp_path = download_file_to_tmp2(file)
-
-        #process_image(tmp_path, 1024, False, False)
-        if(is_image_large(tmp_path, 9)):
-            final = { 'status' : "500", 'data' : {'post': 'Error - Image is too large for Claude'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-            
-        if(not is_image_file(tmp_path)):
-            final = { 'status' : "500", 'data' : {'post': 'Error- Image is Invaild File Type - Vaild file types are : [.png, .jpeg, .jpg, .webp, .gif]'}}
-            response = jsonify(final)
-            response.headers['Access-Control-Allow-Origin'] = '*'
-            return response
-
-        base64_image = encode_image(tmp_path)
-        request_text = """Please provide a structured JSON response that contains info on the label in the photo specifically look for: 
-                        (Chemical name or CAS_Number, 
-                        Amount, 
-                        Units, 
-                        Lot_Number, 
-                        Product_Number, 
-                        Product_Name, 
-                        Manufacturer)
-                        make sure the keys for each apear exactly as written above,
-                        if no label info is detected say null,
-                        if grade information is found add to product name if its not keep text as is,
-                        if no product name use chemical name,
-                        add no text besides null about what you can't find to response.
-                        """
-
-        body = json.dumps(
-                {
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": "image/jpeg",
-                                        "data": base64_image,
-                                    },
-                                },
-                                {"type": "text", "text": request_text},
-                                #{"type": "text", "text": "What is in this image?"},
-                            ],
-                        }
-                    ],
-                }
-            )
-
-        response = runtime.invoke_model(
-            modelId="anthropic.claude-3-haiku-20240307-v1:0",
-            body=body
-        )
-        response_body = json.loads(response.get("body").read())
-        data_string = response_body['content'][0]['text']
-        print(response_body['content'][0]['text'])
-        #Extracting the required information
-        print('data string')
-        print()
-        print(data_string)
-        print()
-        clean_dict = extract_value_claude(data_string)
-        clean_dict['raw output'] = data_string
-        final_dict = {}
-        for key, value in clean_dict.items():
-            try:
-                if value is not None:  # Check if value is not None
-                    value = str(value)
-                    cleaned_value = value.replace('"', '').replace('/', '').replace('\\', '').replace('}','').replace('\n','').replace('`','')
-                else:
-                    cleaned_value = 'Null'  # Or set it to any default value you'd prefer
-                final_dict[key] = cleaned_value
-            except:
-                 cleaned_value = 'Null'
-                 final_dict[key] = cleaned_value
-
-        final = { 'status' : "200", 'data' : {'post': final_dict}}
-        if('null' in data_string):
-            final = { 'status' : "206", 'data' : {'post': final_dict}}
-        # final = { 'status' : "200", 'data' : {'post': data_string}}
-        # if('null' in data_string):
-        #     final = { 'status' : "206", 'data' : {'post': data_string}}
-        # Displaying the clean dictionary
-
-        print(final)
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
-    
-    except Exception as e:
-        traceback_str = traceback.format_exc()
-        final = { 'status' : "500", 'data' : {'post': 'Error- Image Failed to Download'}}
-        # Displaying the clean dictionary
-        print(e)
-        print(traceback_str)
+    return run_label_upload("claude-3-haiku")
+
+
+# configured model routes
+@scishield_bp.route('/models/<model_key>/image_upload', methods=['POST'])
+def scishield_model_interpret_image(model_key: str) -> Response:
+    """
+    Process an uploaded image file and extract chemical label information with any configured model.
 
-        response = jsonify(final)
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        return response
+    Args:
+        model_key (str): Key of the model in ``LABEL_MODELS`` (e.g. "claude-3-haiku", "nova-lite").
+        org (str): Organization identifier from form data.
+        api_key (str): API key from form data for authentication.
+        file (FileStorage): Uploaded image file from form data.
 
+    Returns:
+        Response: JSON response with status and extracted data, like the model specific routes.
+    """
+    if(model_key not in LABEL_MODELS):
+        return label_error(f'Error- Unknown model - Available models are : {sorted(LABEL_MODELS)}')
+    return run_label_upload(model_key)
 
+
+@scishield_bp.route('/models', methods=['GET'])
+def scishield_label_models() -> Response:
+    """
+    List the models available to ``/models/<model_key>/image_upload``.
+
+    Returns:
+        Response: JSON object of model key -> model id, provider and maximum image size (MB).
+    """
+    models = {key: {'model_id': model.model_id, 'provider': model.provider, 'max_image_mb': model.max_image_mb}
+              for key, model in LABEL_MODELS.items()}
+    response = jsonify(models)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
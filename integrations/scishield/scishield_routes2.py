@@ -1,55 +1,132 @@
 # integrations/scishield/scishield_routes.py
-from flask import Flask, redirect, request, render_template, url_for, session, make_response, jsonify, flash, Blueprint
+from flask import Flask, redirect, request, render_template, url_for, session, make_response, jsonify, flash, Blueprint, Response, stream_with_context
 from functools import wraps
 import uuid
 from werkzeug.utils import secure_filename
-from pytz import timezone
-from typing import Dict, Tuple, Optional, List
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Tuple, Optional, List
 import base64  # Import the base64 module
-import openai
-import requests
-from PIL import Image
 import os
 import traceback
 # from labtools_authorizer import *
-from vitality_tools.secrets_manager_tools import get_secrets
-import boto3
 import base64
 import json
 import csv
+import io
 import asyncio
-import botocore.config
 import logging
 import random
+import math
+import codecs
+import itertools
+import tempfile
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from integrations.scishield.batch_packer import BatchPacker, token_budget
+from integrations.scishield.batch_scheduler import AIMDLimiter, BatchScheduler, DEFAULT_MAX_IN_FLIGHT
+from integrations.scishield.bedrock_transport import get_bedrock_transport
+from integrations.scishield.compact_schema import (COMPACT_OUTPUT_TOKENS_PER_ROW, COMPACT_SYSTEM_PROMPT, compact_prompt,
+                                                   expand_prediction)
+from integrations.scishield.image_preprocess import fit_image
+from integrations.scishield.job_store import (build_job_store, running_on_lambda, FINISHED_STATES, JOB_FAILED, JOB_QUEUED,
+                                             JOB_RUNNING, JOB_SUCCEEDED)
+from integrations.scishield.json_repair import REPAIR_FAILED, REPAIR_SALVAGED, REPAIR_VALID, repair_json, repair_stats
+from integrations.scishield.json_stream import JsonArrayStreamParser
+from integrations.scishield.response_cache import build_cache, make_cache_key, sha256_bytes
+from integrations.scishield.retry_policy import DEFAULT_RETRY_POLICY
+from integrations.scishield.row_dedup import dedup_key, fan_out_prediction
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-bedrock_client = boto3.client("bedrock-runtime", region_name="us-east-1")  # Replace with your AWS region
-runtime = boto3.client("bedrock-runtime","us-east-1")
-my_secrets = get_secrets("labtools-dev", "us-east-1", "dev")
-
 # Create a Blueprint for your SciShield routes
 scishield_bp2 = Blueprint("chemical_classification", __name__)
 
-# OpenAI API Key
-#api_key = my_secrets.get('OPEN_AI_API_KEY', None)
-api_key = my_secrets.get('OPEN_AI_API_KEY', None)
-product_key = my_secrets.get('PRODUCT_KEY', None)
-openai.api_key = api_key
-
-
-# Configure boto3 client with a larger connection pool
-config = botocore.config.Config(max_pool_connections=50)
-client = boto3.client("bedrock-runtime", region_name="us-east-1", config=config)
+# The Bedrock runtime transport (non-blocking http, or boto3 on a sized worker pool) is
+# created on the first classification request, see get_bedrock_transport
 
 
 # MODEL_ID = Nova model ARN
 # MODEL_ID = "us.amazon.nova-micro-v1:0"
 MODEL_ID = "us.amazon.nova-lite-v1:0"
 
+# Verbose system prompt for the Nova batch classifier (each row echoed, full field names)
+NOVA_SYSTEM_PROMPT = """
+                    You are an AI trained to identify chemicals based on text descriptions and extract relevant data if present.
+                    The following is a batch of rows from a dataset. For each determine if the data has any chemical info at all.
+
+                    Respond with a structured JSON array where each object corresponds to one row in the batch.
+                    Each object should have the following fields:
+
+                    if your prediction is not chemical, it should just have:
+                    - row (the input data),
+                    - prediction ("Chemical" or "Not a Chemical").
+
+                    if it is a chemical then build and include all these fields as best you can:
+                    - row (the input data),
+                    - prediction ("Chemical" or "Not a Chemical"),
+                    - Confidence score (a 4-digit decimal between 0.000 and 1.000),
+                    - CAS number (if present in row, else null),
+                    - Lot Number (if present in row, else null),
+                    - Manufacturer (if present in row, else null),
+                    - Quantity (if present in row, else null),
+                    - Chemical Name (if present in row, else null),
+                    - Product Name (if present in row, else null),
+                    - Product Number (if present in row, else null),
+                    - Units (if present in row, else null).
+
+                    Respond only with the JSON array.
+                """
+
+# Set CLASSIFICATION_COMPACT_OUTPUT=false to use the verbose prompt above instead of the compact reply
+# schema (rows answered by index with short keys, see compact_schema), which is expanded back server-side
+CLASSIFICATION_COMPACT_OUTPUT = os.environ.get("CLASSIFICATION_COMPACT_OUTPUT", "true").lower() != "false"
+CLASSIFICATION_SYSTEM_PROMPT = COMPACT_SYSTEM_PROMPT if CLASSIFICATION_COMPACT_OUTPUT else NOVA_SYSTEM_PROMPT
+
+# Hash of the active system prompt, part of the row cache key
+NOVA_SYSTEM_PROMPT_HASH = sha256_bytes(CLASSIFICATION_SYSTEM_PROMPT.encode("utf-8"))
+
+# Output cap and per-call token budget the classification batches are packed to
+CLASSIFICATION_BUDGET = token_budget(MODEL_ID)
+if CLASSIFICATION_COMPACT_OUTPUT:
+    # Compact replies do not echo the rows, so long rows no longer cost output tokens
+    CLASSIFICATION_BUDGET = CLASSIFICATION_BUDGET._replace(
+        echo_rows=False, output_tokens_per_row=COMPACT_OUTPUT_TOKENS_PER_ROW)
+
+# Per-row predictions keyed by (row hash, model id, system prompt hash), see ROW_CACHE_* env vars.
+# Inventories are re-run weekly, so entries outlive a week and the memory backend holds a whole
+# inventory; only a shared backend (dynamodb) survives across Lambda containers until the next run
+row_cache = build_cache("ROW_CACHE", default_ttl=14 * 86400, default_max_entries=100_000)
+
+# Content type of streamed classification results
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Background classification jobs, see CLASSIFICATION_JOB_* env vars
+try:
+    job_store = build_job_store()
+except RuntimeError as e:
+    # Keep serving the other routes; /jobs answers 503 until the job store is configured
+    logger.error(f"Classification jobs disabled: {str(e)}")
+    job_store = None
+job_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("CLASSIFICATION_JOB_WORKERS", "2")),
+                                  thread_name_prefix="classification-job")
+# Seconds / results between partial result flushes of a running job
+JOB_FLUSH_INTERVAL = 2.0
+JOB_FLUSH_ROWS = 100
+# Max results returned per GET /jobs/<job_id> page
+JOB_RESULTS_PAGE_SIZE = 1000
+
+# Max resolved duplicate keys remembered per classification run
+DEDUP_MEMO_SIZE = int(os.environ.get("CLASSIFICATION_DEDUP_MEMO_SIZE", "50000"))
+
+# Follow-up calls made for rows a model reply left out, before they resolve as missing
+RECONCILE_RETRIES = int(os.environ.get("CLASSIFICATION_RECONCILE_RETRIES", "2"))
+
+# Set CLASSIFICATION_STREAMING=false to wait for whole batch responses instead of streaming rows out
+CLASSIFICATION_STREAMING = os.environ.get("CLASSIFICATION_STREAMING", "true").lower() != "false"
+
 
 # Central Route Methods - 
 def encode_image(image_path:str):
@@ -88,6 +165,8 @@ def download_file_to_tmp(url: str, chunk_size: int = 8192) -> str:
     Returns:
         str: The path of the downloaded file.
     """
+    import requests
+
     try:
         # Send an HTTP GET request to the URL
         response = requests.get(url, stream=True)
@@ -145,6 +224,7 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
 
     This function resizes an image to fit within a square of a given size, 
     pads it to maintain aspect ratio, and optionally deletes the original image.
+    A file wrapper over ``fit_image``, which decodes at reduced resolution.
 
     Args:
         image_path (str): The file path of the image to be processed.
@@ -159,35 +239,13 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
         Exception: Propagates any exceptions raised during image processing.
     """
     try:
-        # Open the image
-        input_img = Image.open(image_path)
-
-        # Get the original image dimensions
-        original_width, original_height = input_img.size
-
-        # Calculate the scaling factor to fit the image within the square
-        scale_factor = min(final_square_size / original_width, final_square_size / original_height)
-
-        # Calculate the new dimensions
-        new_width = int(original_width * scale_factor)
-        new_height = int(original_height * scale_factor)
-
-        # Resize the image while maintaining its aspect ratio
-        input_img = input_img.resize((new_width, new_height), Image.LANCZOS)
-
-        # Create a new blank square image with the final_square_size
-        output_img = Image.new("RGB", (final_square_size, final_square_size), (0, 0, 0))
-
-        # Calculate the position to paste the resized image (centered)
-        x_offset = (final_square_size - new_width) // 2
-        y_offset = (final_square_size - new_height) // 2
-
-        # Paste the resized image onto the blank square image
-        output_img.paste(input_img, (x_offset, y_offset))
+        with open(image_path, "rb") as image_file:
+            data = image_file.read()
 
         # Save the padded image to file, overwriting the original if needed
         output_image_name = os.path.splitext(image_path)[0] + f"_padded.png"
-        output_img.save(output_image_name)
+        with open(output_image_name, "wb") as output_file:
+            output_file.write(fit_image(data, final_square_size, pad=True, format="PNG"))
 
         # Optionally, delete the original image
         if delete_original:
@@ -201,34 +259,21 @@ def process_image(image_path: str, final_square_size: int, delete_original: bool
         print(f"Error processing {image_path}: {str(e)}")
 
 
-async def invoke_nova_model_async(
-    batch: List, client: object, max_retries: int = 3) -> List:
+def build_nova_request(batch: List) -> Dict:
     """
-    Asynchronously invokes the Nova Lite model to classify and extract chemical information from a batch of data rows.
+    Build the Nova messages-v1 request body classifying a batch of rows (one JSON row per line,
+    prefixed with its index for the compact reply schema).
 
     Args:
-        batch: A list of dictionaries where each dictionary represents a data row to be processed.
-        client: The Nova client instance used to make model invocation requests.
-        max_retries: Maximum number of retry attempts for failed requests (default: 3).
+        batch: The data rows of the batch.
 
     Returns:
-        A list of dictionaries containing the processed results for each input row. Each result includes:
-        - The original row data
-        - A chemical classification prediction
-        - Extracted chemical information fields (if applicable)
-        - Error messages (if processing failed)
-
-    Raises:
-        json.JSONDecodeError: If the model response cannot be parsed as JSON.
-        Exception: For other unexpected errors during processing.
-
-    Notes:
-        - Implements exponential backoff with jitter for retrying throttled requests.
-        - Processes the model response to remove Markdown formatting (```json```).
-        - Returns error information in the prediction field if processing fails.
-        - The system prompt defines the exact output schema expected from the model.
+        Dict: The request body, ready for ``json.dumps``.
     """
-    prompt_text = "\n".join(json.dumps(row) for row in batch)
+    if CLASSIFICATION_COMPACT_OUTPUT:
+        prompt_text = compact_prompt(batch)
+    else:
+        prompt_text = "\n".join(json.dumps(row) for row in batch)
     request_payload = {
         "schemaVersion": "messages-v1",
         "messages": [
@@ -241,76 +286,754 @@ async def invoke_nova_model_async(
         ],
         "system": [
             {
-                "text": """
-                    You are an AI trained to identify chemicals based on text descriptions and extract relevant data if present.
-                    The following is a batch of rows from a dataset. For each determine if the data has any chemical info at all.
-
-                    Respond with a structured JSON array where each object corresponds to one row in the batch.
-                    Each object should have the following fields:
-
-                    if your prediction is not chemical, it should just have:
-                    - row (the input data),
-                    - prediction ("Chemical" or "Not a Chemical").
-
-                    if it is a chemical then build and include all these fields as best you can:
-                    - row (the input data),
-                    - prediction ("Chemical" or "Not a Chemical"),
-                    - Confidence score (a 4-digit decimal between 0.000 and 1.000),
-                    - CAS number (if present in row, else null),
-                    - Lot Number (if present in row, else null),
-                    - Manufacturer (if present in row, else null),
-                    - Quantity (if present in row, else null),
-                    - Chemical Name (if present in row, else null),
-                    - Product Name (if present in row, else null),
-                    - Product Number (if present in row, else null),
-                    - Units (if present in row, else null).
-
-                    Respond only with the JSON array.
-                """
+                "text": CLASSIFICATION_SYSTEM_PROMPT
             }
         ],
         "inferenceConfig": {
-            "max_new_tokens": 4000,
+            "max_new_tokens": CLASSIFICATION_BUDGET.max_output_tokens,
             "top_p": 0.9,
             "top_k": 20,
             "temperature": 0.7
         }
     }
+    return request_payload
+
+
+def decode_prediction(element: object, batch: List) -> object:
+    """Bring one reply element into the verbose prediction shape (expands compact replies)."""
+    return expand_prediction(element, batch) if CLASSIFICATION_COMPACT_OUTPUT else element
+
+
+def record_token_usage(usage: Optional[Dict], reported: object) -> None:
+    """Add a Nova ``usage`` block (inputTokens / outputTokens) to a run's ``input_tokens`` / ``output_tokens``."""
+    if usage is not None and isinstance(reported, dict):
+        usage["input_tokens"] = usage.get("input_tokens", 0) + (reported.get("inputTokens") or 0)
+        usage["output_tokens"] = usage.get("output_tokens", 0) + (reported.get("outputTokens") or 0)
+
+
+async def invoke_nova_model_async(
+    batch: List, transport: object, max_retries: int = 3, limiter: Optional[AIMDLimiter] = None,
+    usage: Optional[Dict] = None) -> List:
+    """
+    Asynchronously invokes the Nova Lite model to classify and extract chemical information from a batch of data rows.
+
+    Args:
+        batch: A list of dictionaries where each dictionary represents a data row to be processed.
+        transport: The Bedrock runtime transport used to make model invocation requests.
+        max_retries: Maximum number of retry attempts for failed requests (default: 3).
+        limiter: Optional AIMD limiter of the batch scheduler, notified of successes and throttling.
+        usage: Optional dictionary whose ``input_tokens`` / ``output_tokens`` are increased by the call's usage.
+
+    Returns:
+        A list of dictionaries containing the processed results for each input row. Each result includes:
+        - The original row data
+        - A chemical classification prediction
+        - Extracted chemical information fields (if applicable)
+        - Error messages (if processing failed)
+
+    Raises:
+        Exception: For unexpected errors during processing.
+
+    Notes:
+        - Retries throttled and transient errors with the shared RetryPolicy (full jitter,
+          Retry-After aware) without blocking the other batches on the event loop. The limiter
+          is told about throttling once per batch, however many attempts were throttled.
+        - The reply is decoded with ``repair_json``: a code fence, trailing commas or a reply cut
+          off at max_new_tokens only lose the rows that are actually damaged, and the repair is
+          counted in ``repair_stats``.
+        - Returns error information in the prediction field if processing fails.
+        - The system prompt defines the exact output schema expected from the model; compact
+          replies are expanded to the verbose shape with ``decode_prediction``.
+    """
+    request_payload = build_nova_request(batch)
+    throttled = False
+
+    def record_throttle() -> None:
+        # One multiplicative decrease per batch, however many of its attempts were throttled
+        nonlocal throttled
+        if limiter is not None and not throttled:
+            throttled = True
+            limiter.record_throttle()
 
-    for attempt in range(max_retries):
-        try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.invoke_model(
-                    modelId=MODEL_ID,
-                    body=json.dumps(request_payload),
-                    contentType="application/json",
-                    accept="application/json"
-                )
-            )
-
-            response_body = json.loads(response["body"].read())
-            if "output" in response_body and "message" in response_body["output"]:
-                content = response_body["output"]["message"]["content"]
-                if content and "text" in content[0]:
-                    raw_text = content[0]["text"]
-                    # Remove possible triple backticks and language hints (e.g., ```json ... ```)
-                    cleaned_text = raw_text.strip().strip("```").replace("json\n", "").replace("\n```", "")
-                    return json.loads(cleaned_text)
-                else:
-                    return [{"row": row, "prediction": "No valid text content found in the response."} for row in batch]
+    def on_retry(error: Exception, attempt: int, delay: float) -> None:
+        if DEFAULT_RETRY_POLICY.is_throttle(error):
+            record_throttle()
+
+    try:
+        response = await DEFAULT_RETRY_POLICY.call(
+            lambda: transport.invoke_model(MODEL_ID, json.dumps(request_payload)),
+            on_retry=on_retry,
+            max_attempts=max_retries
+        )
+
+        response_body = json.loads(response)
+        if limiter is not None:
+            limiter.record_success()
+        record_token_usage(usage, response_body.get("usage"))
+        if "output" in response_body and "message" in response_body["output"]:
+            content = response_body["output"]["message"]["content"]
+            if content and "text" in content[0]:
+                # Keeps every complete row of a fenced, comma-damaged or truncated reply
+                repaired = repair_json(content[0]["text"], "[")
+                repair_stats.record(MODEL_ID, repaired.kind, repaired.dropped)
+                if repaired.kind == REPAIR_FAILED:
+                    return [{"row": row, "prediction": "Unparseable model response"} for row in batch]
+                if repaired.kind != REPAIR_VALID:
+                    logger.info(f"Repaired Nova reply ({repaired.kind}), dropped {repaired.dropped} malformed rows")
+                elements = repaired.value if isinstance(repaired.value, list) else [repaired.value]
+                return [decode_prediction(element, batch) for element in elements]
             else:
-                return [{"row": row, "prediction": "Invalid response structure"} for row in batch]
+                return [{"row": row, "prediction": "No valid text content found in the response."} for row in batch]
+        else:
+            return [{"row": row, "prediction": "Invalid response structure"} for row in batch]
+
+    except Exception as e:
+        if DEFAULT_RETRY_POLICY.is_throttle(e):
+            record_throttle()
+            return [{"row": row, "prediction": "Max retries exceeded"} for row in batch]
+        logger.error(f"Error invoking model: {e}")
+        return [{"row": row, "prediction": f"Error: {str(e)}"} for row in batch]
+
+
+async def stream_nova_model_async(
+    batch: List, transport: object, on_element: Callable[[int, object], None],
+    max_retries: int = 3, limiter: Optional[AIMDLimiter] = None, usage: Optional[Dict] = None) -> List:
+    """
+    Streaming counterpart of ``invoke_nova_model_async``: hands each row's prediction to
+    ``on_element`` as soon as its array element is complete, before the rest of the batch is generated.
+
+    Args:
+        batch: A list of data rows to classify.
+        transport: The Bedrock runtime transport (must provide ``invoke_model_stream``).
+        on_element: Callback ``on_element(position, prediction)`` invoked once per completed element,
+            in response order. After a retried stream it may be called again for the same position.
+        max_retries: Maximum number of attempts for failed requests (default: 3).
+        limiter: Optional AIMD limiter of the batch scheduler, notified of successes and throttling.
+        usage: Optional dictionary whose ``input_tokens`` / ``output_tokens`` are increased by the call's usage.
+
+    Returns:
+        The list of all parsed elements (expanded with ``decode_prediction``), or one error placeholder per row if the call failed
+        (rows already handed to ``on_element`` keep their prediction).
+
+    Notes:
+        - The response text is never concatenated: ``contentBlockDelta`` chunks go straight into a
+          ``JsonArrayStreamParser``, which skips the ```` ```json ```` fence and any preamble.
+        - A stream that ends without closing the array (max_new_tokens reached) keeps the elements
+          completed so far; the missing rows are left to the caller.
+    """
+    request_body = json.dumps(build_nova_request(batch))
+
+    async def attempt() -> List:
+        parser = JsonArrayStreamParser()
+        elements = []
+
+        def publish(completed: List) -> None:
+            for element in completed:
+                element = decode_prediction(element, batch)
+                on_element(len(elements), element)
+                elements.append(element)
+
+        async for chunk in transport.invoke_model_stream(MODEL_ID, request_body):
+            delta = chunk.get("contentBlockDelta")
+            if delta:
+                publish(parser.feed(delta.get("delta", {}).get("text", "")))
+            elif "metadata" in chunk:
+                record_token_usage(usage, chunk["metadata"].get("usage"))
+        closed = parser.done
+        publish(parser.close())
+        if not parser.started:
+            repair_stats.record(MODEL_ID, REPAIR_FAILED)
+            raise ValueError("No JSON array found in the model response")
+        if parser.errors or not closed:
+            repair_stats.record(MODEL_ID, REPAIR_SALVAGED, parser.errors)
+            logger.warning(f"Skipped {parser.errors} malformed elements in a streamed batch of {len(batch)} rows")
+        else:
+            repair_stats.record(MODEL_ID, REPAIR_VALID)
+        return elements
+
+    throttled = False
+
+    def record_throttle() -> None:
+        # One multiplicative decrease per batch, however many of its attempts were throttled
+        nonlocal throttled
+        if limiter is not None and not throttled:
+            throttled = True
+            limiter.record_throttle()
+
+    def on_retry(error: Exception, attempt_number: int, delay: float) -> None:
+        if DEFAULT_RETRY_POLICY.is_throttle(error):
+            record_throttle()
 
-        except Exception as e:
-            if "ThrottlingException" in str(e):
-                sleep_time = min(2 ** attempt + random.uniform(0, 0.5), 60)
-                await asyncio.sleep(sleep_time)
+    try:
+        elements = await DEFAULT_RETRY_POLICY.call(attempt, on_retry=on_retry, max_attempts=max_retries)
+        if limiter is not None:
+            limiter.record_success()
+        return elements
+    except Exception as e:
+        if DEFAULT_RETRY_POLICY.is_throttle(e):
+            record_throttle()
+            return [{"row": row, "prediction": "Max retries exceeded"} for row in batch]
+        logger.error(f"Error streaming model response: {e}")
+        return [{"row": row, "prediction": f"Error: {str(e)}"} for row in batch]
+
+
+def canonicalize_row(row: object) -> object:
+    """
+    Normalize a row for hashing: trim string values and stringify dictionary keys.
+
+    Args:
+        row: A data row (dictionary from JSON input, list from CSV input, or scalar).
+
+    Returns:
+        The canonical form of the row.
+    """
+    if isinstance(row, dict):
+        return {str(key).strip(): canonicalize_row(value) for key, value in row.items()}
+    if isinstance(row, list):
+        return [canonicalize_row(value) for value in row]
+    if isinstance(row, str):
+        return row.strip()
+    return row
+
+
+def canonical_row_json(row: object) -> str:
+    """Serialize the canonical form of a row (sorted keys, no whitespace) for hashing and comparison."""
+    return json.dumps(canonicalize_row(row), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def row_cache_key(row: object) -> str:
+    """
+    Build the row cache key from the canonical row, the model id and the system prompt hash.
+
+    Args:
+        row: A data row.
+
+    Returns:
+        str: The cache key.
+    """
+    return make_cache_key(sha256_bytes(canonical_row_json(row).encode("utf-8")), MODEL_ID, NOVA_SYSTEM_PROMPT_HASH)
+
+
+def is_cacheable_prediction(prediction: object) -> bool:
+    """Return True for a well-formed model prediction (never for error placeholders)."""
+    return isinstance(prediction, dict) and prediction.get("prediction") in ("Chemical", "Not a Chemical")
+
+
+def echo_fingerprints(echoed: object) -> List[str]:
+    """
+    Fingerprints of a prediction's ``row`` field, comparable with those ``BatchReconciler``
+    indexes the input rows under: the canonical JSON, plus the raw text for an echo given as a
+    string (the model may quote the JSON line it was sent).
+    """
+    fingerprints = [canonical_row_json(echoed)]
+    if isinstance(echoed, str):
+        fingerprints.append("line:" + echoed.strip())
+    return fingerprints
+
+
+class BatchReconciler:
+    """
+    Matches the objects of a model reply back to the rows of the batch they answer.
+
+    The model is asked to echo each row (compact replies name its index, and are expanded with the
+    row), so an object is assigned to the row it echoes (preferring its own position). Dropped, duplicated or reordered objects therefore never shift the
+    predictions of the other rows. Objects whose echo matches no row (the model reformatted it)
+    fall back to their position, but only when the reply has exactly one object per row.
+    """
+
+    def __init__(self, rows: List):
+        self.rows = rows
+        self.resolved = set()  # batch positions with a prediction
+        self.used = set()  # reply indices already assigned
+        self._positions: Dict[str, List[int]] = {}
+        for position, row in enumerate(rows):
+            for fingerprint in [canonical_row_json(row), "line:" + json.dumps(row).strip()]:
+                self._positions.setdefault(fingerprint, []).append(position)
+
+    def match(self, index: int, prediction: object) -> Optional[int]:
+        """
+        Assign the reply object at ``index`` to the unresolved row it echoes.
+
+        Returns:
+            Optional[int]: The batch position it was assigned to, or None if it echoes no unresolved row.
+        """
+        if index in self.used or not isinstance(prediction, dict) or "row" not in prediction:
+            return None
+        candidates = [position for fingerprint in echo_fingerprints(prediction["row"])
+                      for position in self._positions.get(fingerprint, ()) if position not in self.resolved]
+        if not candidates:
+            return None
+        position = index if index in candidates else min(candidates)
+        self.resolved.add(position)
+        self.used.add(index)
+        return position
+
+    def reconcile(self, result: List) -> Tuple[List[Tuple[int, object, bool]], List[int]]:
+        """
+        Assign every remaining object of a complete reply.
+
+        Args:
+            result: All objects of the reply, including any already assigned with ``match``.
+
+        Returns:
+            Tuple[List[Tuple[int, object, bool]], List[int]]: ``(position, prediction, echoed)`` for
+            each newly assigned row (``echoed`` is False for positional fallbacks), and the
+            positions still without a prediction.
+        """
+        assigned = []
+        unmatched = []
+        for index, prediction in enumerate(result):
+            if index in self.used:
+                continue
+            position = self.match(index, prediction)
+            if position is None:
+                unmatched.append((index, prediction))
             else:
-                logger.error(f"Error invoking model: {e}")
-                return [{"row": row, "prediction": f"Error: {str(e)}"} for row in batch]
+                assigned.append((position, prediction, True))
+        if len(result) == len(self.rows):
+            for index, prediction in unmatched:
+                if index not in self.resolved:
+                    self.resolved.add(index)
+                    self.used.add(index)
+                    assigned.append((index, prediction, False))
+        missing = [position for position in range(len(self.rows)) if position not in self.resolved]
+        return assigned, missing
+
+
+def iter_csv_rows(stream: object) -> Iterator[List[str]]:
+    """
+    Lazily read data rows from a CSV byte stream without saving or materializing it.
+
+    Args:
+        stream: Binary file object, e.g. ``uploaded_file.stream`` from request.files.
+
+    Yields:
+        List[str]: Each non-empty data row; the first row is treated as the header and skipped.
+    """
+    # iterdecode works on the raw upload stream, including SpooledTemporaryFile on Python 3.9
+    reader = csv.reader(codecs.iterdecode(stream, "utf-8-sig"))
+    next(reader, None)  # Assume the first row is the header
+    for row in reader:
+        if row:
+            yield row
+
+
+async def iter_classified_rows(rows: Iterable, batch_size: Optional[int], metadata: Dict,
+                               on_batch_done: Optional[Callable[[], None]] = None) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Classify a stream of rows with the Nova model and yield predictions as they resolve.
+
+    Args:
+        rows: Iterable of data rows, consumed lazily as model capacity frees up.
+        batch_size: Optional cap on rows sent per model call; batches are otherwise packed to the
+            model's token budget (``CLASSIFICATION_BUDGET``).
+        metadata: Dictionary updated in place with run statistics (see ``classify_rows``).
+        on_batch_done: Optional callback invoked after each model call completes (progress reporting).
+
+    Yields:
+        Tuple[int, object]: ``(row index, prediction)`` in completion order, not input order.
+
+    Notes:
+        - Duplicate rows (exact or normalized) reuse the representative's prediction; rows waiting
+          on an in-flight representative are resolved when its batch completes.
+        - Rows found in the row cache resolve immediately without a model call.
+        - Reply objects are matched to rows by the row they echo (``BatchReconciler``); rows a
+          reply left out are re-sent in a follow-up mini-batch, up to CLASSIFICATION_RECONCILE_RETRIES
+          times, which also takes a free slot before the next new batch.
+        - With CLASSIFICATION_STREAMING (the default) a row is yielded and cached as soon as the
+          model completes an array element that echoes it; the remaining rows of the batch resolve
+          when the call finishes.
+        - Batches are packed to the model's token budget (``BatchPacker``): short rows share one
+          call, up to CLASSIFICATION_MAX_BATCH_ROWS, while long rows get smaller batches that stay
+          under the max_new_tokens cap.
+        - With CLASSIFICATION_COMPACT_OUTPUT (the default) the model answers each row by index with
+          short keys and no nulls; replies are expanded to the verbose prediction shape before
+          they are matched, cached or yielded.
+        - Batches run concurrently under an AIMD limit (CLASSIFICATION_MAX_IN_FLIGHT), so only the
+          in-flight batches and the bounded duplicate memo are held in memory.
+    """
+    metadata.update({"rows": 0, "unique_rows": 0, "duplicate_rows": 0, "cached_rows": 0, "model_calls": 0,
+                     "streamed_rows": 0, "retried_rows": 0, "retry_calls": 0, "missing_rows": 0,
+                     "input_tokens": 0, "output_tokens": 0})
+    transport = get_bedrock_transport()
+    memo = OrderedDict()  # dedup key -> (representative row, resolved prediction), bounded LRU
+    waiting: Dict[str, List[Tuple[int, object]]] = {}  # dedup key -> rows waiting on an in-flight batch
+    ready = deque()
+    packer = BatchPacker(CLASSIFICATION_BUDGET, batch_size)
+
+    def remember(key: str, row: object, prediction: object) -> None:
+        memo[key] = (row, prediction)
+        memo.move_to_end(key)
+        if len(memo) > DEDUP_MEMO_SIZE:
+            memo.popitem(last=False)
+
+    def batches() -> Iterator[Optional[List[Tuple[str, object]]]]:
+        for index, row in enumerate(rows):
+            if len(ready) >= packer.max_rows:
+                yield None  # Let the consumer flush rows resolved from the cache or memo
+            metadata["rows"] += 1
+            key = dedup_key(row)
+            if key in memo:
+                metadata["duplicate_rows"] += 1
+                memo.move_to_end(key)
+                representative, prediction = memo[key]
+                ready.append((index, fan_out_prediction(prediction, row, representative)))
+                continue
+            if key in waiting:
+                metadata["duplicate_rows"] += 1
+                waiting[key].append((index, row))
+                continue
+
+            metadata["unique_rows"] += 1
+            cached = row_cache.get(row_cache_key(row))
+            if cached is not None:
+                metadata["cached_rows"] += 1
+                remember(key, row, cached)
+                ready.append((index, cached))
+                continue
+
+            waiting[key] = [(index, row)]
+            batch = packer.add((key, row), row)
+            if batch:
+                metadata["rows_per_call"] = round(packer.rows_per_batch, 1)
+                yield batch
+        batch = packer.flush()
+        if batch:
+            metadata["rows_per_call"] = round(packer.rows_per_batch, 1)
+            yield batch
+
+    progress = asyncio.Event()  # Set when a streamed row resolves while its batch is still running
+    reconcilers: Dict[int, BatchReconciler] = {}  # id(batch) -> reply matching state of an in-flight batch
+    attempts: Dict[int, int] = {}  # id(batch) -> follow-up number of a mini-batch of missing rows
+    retries = deque()  # mini-batches of missing rows waiting for a free slot
+
+    def resolve_row(entry: Tuple[str, object], prediction: object, cacheable: bool) -> None:
+        key, row = entry
+        if cacheable and is_cacheable_prediction(prediction):
+            row_cache.set(row_cache_key(row), prediction)
+        remember(key, row, prediction)
+        members = waiting.pop(key)
+        ready.append((members[0][0], prediction))
+        for member_index, member_row in members[1:]:
+            ready.append((member_index, fan_out_prediction(prediction, member_row, row)))
+
+    def resolve_streamed(batch: List[Tuple[str, object]], index: int, prediction: object) -> None:
+        # Resolve now only if the element provably belongs to a row; otherwise wait for the whole reply
+        position = reconcilers[id(batch)].match(index, prediction)
+        if position is None:
+            return
+        metadata["streamed_rows"] += 1
+        resolve_row(batch[position], prediction, cacheable=True)
+        progress.set()
+
+    def resolve(batch: List[Tuple[str, object]], result: object) -> None:
+        reconciler = reconcilers.pop(id(batch))
+        attempt = attempts.pop(id(batch), 0)
+        assigned, missing = reconciler.reconcile(result if isinstance(result, list) else [])
+        aligned = isinstance(result, list) and len(result) == len(batch)
+        for position, prediction, echoed in assigned:
+            if isinstance(prediction, dict) and "row" not in prediction:
+                prediction = {"row": batch[position][1], **prediction}
+            resolve_row(batch[position], prediction, cacheable=echoed or aligned)
+        if missing and attempt < RECONCILE_RETRIES:
+            # Re-send only the rows the reply left out
+            follow_up = [batch[position] for position in missing]
+            attempts[id(follow_up)] = attempt + 1
+            retries.append(follow_up)
+            metadata["retried_rows"] += len(follow_up)
+        else:
+            for position in missing:
+                metadata["missing_rows"] += 1
+                resolve_row(batch[position], {"row": batch[position][1], "prediction": "Missing from model response"},
+                            cacheable=False)
+        if on_batch_done is not None:
+            on_batch_done()
+
+    def invoke(rows_batch: List[Tuple[str, object]], limiter: AIMDLimiter):
+        batch = [row for _, row in rows_batch]
+        reconcilers[id(rows_batch)] = BatchReconciler(batch)
+        if CLASSIFICATION_STREAMING:
+            return stream_nova_model_async(
+                batch, transport, lambda index, prediction: resolve_streamed(rows_batch, index, prediction),
+                limiter=limiter, usage=metadata)
+        return invoke_nova_model_async(batch, transport, limiter=limiter, usage=metadata)
+
+    def submit(batch: List[Tuple[str, object]]) -> None:
+        scheduler.submit(batch)
+        metadata["model_calls"] += 1
+
+    def submit_retries() -> None:
+        while retries and scheduler.has_capacity():
+            submit(retries.popleft())
+            metadata["retry_calls"] += 1
+
+    scheduler = BatchScheduler(invoke, AIMDLimiter(max_limit=DEFAULT_MAX_IN_FLIGHT))
+    try:
+        for batch in batches():
+            while ready:
+                yield ready.popleft()
+            if batch is None:
+                continue
+            while not scheduler.has_capacity():
+                for _, done_batch, result in await scheduler.wait_completed(progress):
+                    resolve(done_batch, result)
+                submit_retries()
+                while ready:
+                    yield ready.popleft()
+            submit(batch)
+
+        while ready:
+            yield ready.popleft()
+        while scheduler.running:
+            for _, done_batch, result in await scheduler.wait_completed(progress):
+                resolve(done_batch, result)
+            submit_retries()
+            while ready:
+                yield ready.popleft()
+    finally:
+        scheduler.cancel()
+
+    # Calls the rows would have taken at the achieved batch size without dedup and the cache
+    rows_per_call = packer.rows_per_batch
+    metadata["rows_per_call"] = round(rows_per_call, 1)
+    baseline_calls = math.ceil(metadata["rows"] / rows_per_call)
+    metadata["model_calls_saved_by_dedup"] = baseline_calls - math.ceil(metadata["unique_rows"] / rows_per_call)
+    metadata["model_calls_saved"] = baseline_calls - metadata["model_calls"]
+    logger.info(f"Classification run: {metadata}, scheduler {scheduler.limiter.stats()}, "
+                f"row cache {row_cache.stats()}, transport {transport.metrics()}, "
+                f"json repair {repair_stats.stats().get(MODEL_ID)}")
+
+
+def classify_rows(rows: Iterable, batch_size: Optional[int] = None) -> Tuple[List, Dict]:
+    """
+    Classify rows with the Nova model, collapsing duplicates and serving previously seen rows
+    from the row cache.
+
+    Args:
+        rows: Data rows to classify (a list or a lazy iterator such as ``iter_csv_rows``).
+        batch_size: Optional cap on rows per model call (default: packed to the token budget).
+
+    Returns:
+        Tuple[List, Dict]: One prediction per input row in input order, and run metadata
+        (row counts, duplicates, cache hits, model calls made and saved, tokens read and generated).
+
+    Notes:
+        - Exact and normalized duplicates (case, whitespace, pack sizes) are sent once and the
+          representative's prediction is fanned out to every member row. Members with a different
+          pack size get None for Quantity, Units and Product Number instead of the representative's.
+        - Only unique rows missing from the cache are batched and sent to the model.
+        - Predictions are cached only when they echo their own row or the batch came back
+          with one well-formed object per row, so error placeholders and misaligned output are
+          never reused.
+        - Rows the model left out of its response are re-sent on their own; rows still missing
+          after CLASSIFICATION_RECONCILE_RETRIES follow-ups get a "Missing from model response"
+          prediction.
+    """
+    metadata: Dict = {}
+
+    async def collect():
+        results = {}
+        async for index, prediction in iter_classified_rows(rows, batch_size, metadata):
+            results[index] = prediction
+        return [results[index] for index in range(len(results))]
+
+    predictions = asyncio.run(collect())
+    return predictions, metadata
+
+
+def wants_ndjson() -> bool:
+    """Return True if the client asked for streamed results with ``Accept: application/x-ndjson``."""
+    return request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+def iter_ndjson_predictions(rows: Iterable, batch_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Classify rows and stream the results as newline-delimited JSON.
+
+    Args:
+        rows: Data rows to classify (a list or a lazy iterator such as ``iter_csv_rows``).
+        batch_size: Optional cap on rows per model call (default: packed to the token budget).
+
+    Yields:
+        str: One ``{"index": ..., "prediction": ...}`` line per row as soon as its batch completes
+        (completion order; ``index`` is the input row position), then a final
+        ``{"summary": metadata}`` line, or an ``{"error": ...}`` line if the run fails.
+    """
+    metadata: Dict = {}
+    loop = asyncio.new_event_loop()
+    predictions = iter_classified_rows(rows, batch_size, metadata)
+    try:
+        while True:
+            try:
+                index, prediction = loop.run_until_complete(predictions.__anext__())
+            except StopAsyncIteration:
+                break
+            yield json.dumps({"index": index, "prediction": prediction}) + "\n"
+        yield json.dumps({"summary": metadata}) + "\n"
+    except Exception as e:
+        logger.error(f"Error in streamed classification: {str(e)}")
+        yield json.dumps({"error": str(e)}) + "\n"
+    finally:
+        loop.run_until_complete(predictions.aclose())
+        loop.close()
 
-    return [{"row": row, "prediction": "Max retries exceeded"} for row in batch]
+
+def ndjson_response(rows: Iterable, batch_size: Optional[int] = None) -> Response:
+    """Build a streamed ``application/x-ndjson`` response for ``iter_ndjson_predictions``."""
+    response = Response(stream_with_context(iter_ndjson_predictions(rows, batch_size)), mimetype=NDJSON_MIMETYPE)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def run_classification_job(job_id: str, rows: Iterable, rows_total: int, batch_size: Optional[int] = None,
+                           cleanup: Optional[Callable[[], None]] = None) -> None:
+    """
+    Run a classification job to completion, recording progress and partial results in ``job_store``.
+
+    Args:
+        job_id: Id of the job record created by ``submit_classification_job``.
+        rows: Data rows to classify (a list or a lazy iterator).
+        rows_total: Number of rows in ``rows``, used for progress and ETA.
+        batch_size: Optional cap on rows per model call (default: packed to the token budget).
+        cleanup: Optional callback run when the job ends (e.g. removing a spooled upload).
+
+    Notes:
+        Results are flushed to the store every ``JOB_FLUSH_ROWS`` rows or ``JOB_FLUSH_INTERVAL`` seconds,
+        whichever comes first, so ``GET /jobs/<job_id>`` can page through them while the job runs.
+    """
+    metadata: Dict = {}
+    progress = {"batches_done": 0}
+
+    def batch_done() -> None:
+        progress["batches_done"] += 1
+
+    async def run() -> None:
+        buffer: List[Tuple[int, object]] = []
+        rows_done = 0
+        last_flush = time.monotonic()
+        async for index, prediction in iter_classified_rows(rows, batch_size, metadata, on_batch_done=batch_done):
+            buffer.append((index, prediction))
+            if len(buffer) < JOB_FLUSH_ROWS and time.monotonic() - last_flush < JOB_FLUSH_INTERVAL:
+                continue
+            rows_done += len(buffer)
+            flush(buffer, rows_done)
+            buffer = []
+            last_flush = time.monotonic()
+        rows_done += len(buffer)
+        flush(buffer, rows_done)
+
+    def flush(buffer: List[Tuple[int, object]], rows_done: int) -> None:
+        if buffer:
+            job_store.add_results(job_id, buffer)
+        # Batches still to come: those already submitted plus the rows not read yet, at the batch
+        # size achieved so far
+        unread = max(rows_total - metadata.get("rows", 0), 0)
+        rows_per_call = metadata.get("rows_per_call") or BatchPacker(CLASSIFICATION_BUDGET, batch_size).max_rows
+        job_store.update(job_id, {
+            "rows_done": rows_done,
+            "batches_done": progress["batches_done"],
+            "batches_total": metadata.get("model_calls", 0) + math.ceil(unread / rows_per_call),
+        })
+
+    try:
+        job_store.update(job_id, {"status": JOB_RUNNING, "started_at": time.time()})
+        asyncio.run(run())
+        job_store.update(job_id, {"status": JOB_SUCCEEDED, "finished_at": time.time(), "metadata": metadata})
+    except Exception as e:
+        logger.error(f"Classification job {job_id} failed: {str(e)}")
+        job_store.update(job_id, {"status": JOB_FAILED, "finished_at": time.time(), "error": str(e)})
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+
+def run_stored_classification_job(job_id: str, rows_total: int, batch_size: Optional[int] = None) -> None:
+    """
+    Run a job whose rows were staged in ``job_store`` (the asynchronous Lambda invocation's entry point).
+
+    Args:
+        job_id: Id of the job record created by ``submit_classification_job``.
+        rows_total: Number of staged rows.
+        batch_size: Optional cap on rows per model call (default: packed to the token budget).
+    """
+    run_classification_job(job_id, job_store.iter_rows(job_id), rows_total, batch_size)
+
+
+def submit_classification_job(rows: Iterable, rows_total: int, batch_size: Optional[int] = None,
+                              cleanup: Optional[Callable[[], None]] = None) -> str:
+    """
+    Create a job record and start the job.
+
+    Locally the job is queued on ``job_executor``. On AWS Lambda the container is frozen once the
+    response is sent, so the rows are staged in the (DynamoDB) job store and the job runs in a
+    separate asynchronous invocation of this function via ``zappa.asynchronous.run``.
+
+    Args:
+        rows: Data rows to classify.
+        rows_total: Number of rows in ``rows``.
+        batch_size: Optional cap on rows per model call (default: packed to the token budget).
+        cleanup: Optional callback run when the job ends.
+
+    Returns:
+        str: The new job id.
+    """
+    job_id = uuid.uuid4().hex
+    job_store.create({
+        "job_id": job_id,
+        "status": JOB_QUEUED,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "rows_total": rows_total,
+        "rows_done": 0,
+        "batches_done": 0,
+        "batches_total": math.ceil(rows_total / BatchPacker(CLASSIFICATION_BUDGET, batch_size).max_rows),
+        "metadata": None,
+        "error": None,
+    })
+    if not running_on_lambda():
+        job_executor.submit(run_classification_job, job_id, rows, rows_total, batch_size, cleanup)
+        return job_id
+
+    from zappa.asynchronous import run
+
+    try:
+        job_store.add_rows(job_id, rows)
+        # Only the job id goes in the event, well below the 256 KB asynchronous payload limit
+        run(run_stored_classification_job, args=[job_id, rows_total, batch_size])
+    except Exception as e:
+        job_store.update(job_id, {"status": JOB_FAILED, "finished_at": time.time(), "error": str(e)})
+        raise
+    finally:
+        if cleanup is not None:
+            cleanup()
+    return job_id
+
+
+def job_progress(job: Dict) -> Dict:
+    """
+    Add throughput and ETA to a job record.
+
+    Args:
+        job: The record returned by ``job_store.get``.
+
+    Returns:
+        Dict: The record with ``rows_per_second`` and ``eta_seconds`` (None until the job has
+        made progress, 0 once it has finished).
+    """
+    job = {key: value for key, value in job.items() if key != "expires_at"}
+    rows_per_second = None
+    eta_seconds = None
+    if job["started_at"]:
+        elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+        if elapsed > 0 and job["rows_done"]:
+            rows_per_second = round(job["rows_done"] / elapsed, 2)
+            eta_seconds = round((job["rows_total"] - job["rows_done"]) / rows_per_second, 1)
+    if job["status"] in FINISHED_STATES:
+        eta_seconds = 0
+    job.update({"rows_per_second": rows_per_second, "eta_seconds": eta_seconds})
+    return job
 
 
 #swagger docs
@@ -348,9 +1071,14 @@ def predict_chemicals_upload() -> Tuple:
 
     Notes:
         - Validates API key and file type (.csv)
-        - Processes CSV in batches of 10 rows
-        - Uses async processing with 1-second delay between batches
-        - Returns flattened predictions for all rows
+        - Reads the upload lazily and feeds batches to the scheduler as capacity frees up
+        - Collapses duplicate rows and serves previously seen rows from the row cache
+        - Processes the remaining rows in batches packed to the model's token budget
+          (CLASSIFICATION_BUDGET, at most CLASSIFICATION_MAX_BATCH_ROWS rows per call)
+        - Runs batches concurrently under an adaptive concurrency limit
+        - Returns flattened predictions for all rows plus run metadata (model calls saved)
+        - With ``Accept: application/x-ndjson`` streams one line per row as batches complete,
+          followed by a summary line
 
     Response Status Codes:
         - 200: Success with predictions
@@ -369,40 +1097,24 @@ def predict_chemicals_upload() -> Tuple:
         if not uploaded_file or not uploaded_file.filename.endswith(".csv"):
             return jsonify({"error": "A valid CSV file is required"}), 400
 
-        # Save the uploaded file to a temporary location
-        local_path = f"/tmp/{uploaded_file.filename}"
-        uploaded_file.save(local_path)
-
-        # Read the CSV file
-        rows = []
-        with open(local_path, newline="") as csvfile:
-            reader = csv.reader(csvfile)
-            header = next(reader)  # Assume the first row is the header
-            for row in reader:
-                rows.append(row)
-
-        if not rows:
+        # Stream rows straight from the upload; only in-flight batches are held in memory
+        rows = iter_csv_rows(uploaded_file.stream)
+        first_row = next(rows, None)
+        if first_row is None:
             return jsonify({"error": "The CSV file is empty"}), 400
 
-        # Define batch size
-        batch_size = 10
-        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
-
-        async def process_batches():
-            results = []
-            for index, batch in enumerate(batches):
-                if index > 0:
-                    await asyncio.sleep(1)  # Sleep 1 second between batch invocations
-                result = await invoke_nova_model_async(batch, client)
-                results.append(result)
-            return results
-
-        predictions = asyncio.run(process_batches())
+        rows = itertools.chain([first_row], rows)
+        if wants_ndjson():
+            # Request teardown closes request.files before a streamed body is sent, so hand
+            # the upload stream over to the response and close it once streaming is done
+            upload_stream, uploaded_file.stream = uploaded_file.stream, io.BytesIO()
+            response = ndjson_response(rows)
+            response.call_on_close(upload_stream.close)
+            return response
 
-        # Flatten the results
-        flattened_predictions = [item for sublist in predictions for item in sublist]
+        flattened_predictions, metadata = classify_rows(rows)
 
-        return jsonify({"predictions": flattened_predictions})
+        return jsonify({"predictions": flattened_predictions, "metadata": metadata})
 
     except Exception as e:
         logger.error(f"Error in processing request: {str(e)}")
@@ -426,9 +1138,13 @@ def predict_chemicals_json() -> Tuple:
 
     Notes:
         - Requires valid API key ('labtools_1273d72650af')
-        - Processes data in batches of 10 rows
-        - Uses async processing with 1-second delay between batches
-        - Returns flattened predictions for all rows
+        - Collapses duplicate rows and serves previously seen rows from the row cache
+        - Processes the remaining rows in batches packed to the model's token budget
+          (CLASSIFICATION_BUDGET, at most CLASSIFICATION_MAX_BATCH_ROWS rows per call)
+        - Runs batches concurrently under an adaptive concurrency limit
+        - Returns flattened predictions for all rows plus run metadata (model calls saved)
+        - With ``Accept: application/x-ndjson`` streams one line per row as batches complete,
+          followed by a summary line
         - Sets CORS headers for cross-origin requests
 
     Response Status Codes:
@@ -465,25 +1181,152 @@ def predict_chemicals_json() -> Tuple:
         if not rows or not isinstance(rows, list):
             return jsonify({"error": "A valid list of rows is required"}), 400
 
-        # Process rows in batches asynchronously
-        batch_size = 10
-        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        if wants_ndjson():
+            return ndjson_response(rows)
 
-        async def process_batches():
-            results = []
-            for index, batch in enumerate(batches):
-                if index > 0:
-                    await asyncio.sleep(1)  # Sleep 1 second between batch invocations
-                result = await invoke_nova_model_async(batch, client)
-                results.append(result)
-            return results
+        # Process uncached rows in batches asynchronously
+        flattened_predictions, metadata = classify_rows(rows)
+
+        return jsonify({"predictions": flattened_predictions, "metadata": metadata})
+
+    except Exception as e:
+        logger.error(f"Error in processing request: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@scishield_bp2.route("/jobs", methods=["POST"])
+def submit_classification_job_route() -> Tuple:
+    """
+    Submit a classification job and return immediately with its id.
 
-        predictions = asyncio.run(process_batches())
+    Accepts either the multipart form of ``/predict-chemicals-upload`` (org, api_key, file) or the
+    JSON body of ``/predict-chemicals-json`` (org, api_key, rows). The job runs in the background
+    and is polled with ``GET /jobs/<job_id>``.
 
-        # Flatten the results
-        flattened_predictions = [item for sublist in predictions for item in sublist]
+    Returns:
+        Tuple: JSON response with ``job_id``, ``status``, ``rows_total`` and ``status_url``, and HTTP status code
+
+    Response Status Codes:
+        - 202: Job accepted
+        - 400: Missing required fields, invalid CSV or empty input
+        - 500: Server error or invalid API key
+        - 503: Jobs are not configured (on AWS Lambda they need the DynamoDB job store)
+
+    Notes:
+        - CSV uploads are spooled to a temporary file and read lazily by the job.
+        - Locally jobs run on a small thread pool (CLASSIFICATION_JOB_WORKERS). On AWS Lambda each
+          job runs in its own asynchronous invocation, bounded by the function timeout, and its
+          rows and results are kept in the DynamoDB job store (CLASSIFICATION_JOB_TABLE).
+    """
+    try:
+        if request.files:
+            org = request.form.get("org")
+            api_key = request.form.get("api_key")
+        else:
+            data = request.get_json(silent=True) or {}
+            org = data.get("org")
+            api_key = data.get("api_key")
+
+        if api_key != 'labtools_1273d72650af':
+            return jsonify({"status": "500", "data": {"post": "Error- API Key is Invalid"}}), 500
+
+        if not org:
+            return jsonify({"error": "org and api_key are required"}), 400
+
+        if job_store is None:
+            return jsonify({"error": "Classification jobs are not configured"}), 503
+
+        if request.files:
+            uploaded_file = request.files.get("file")
+            if not uploaded_file or not uploaded_file.filename.endswith(".csv"):
+                return jsonify({"error": "A valid CSV file is required"}), 400
+
+            # The upload is gone once the request ends, so spool it to local disk for the job
+            fd, csv_path = tempfile.mkstemp(suffix=".csv")
+            os.close(fd)
+            uploaded_file.save(csv_path)
+            with open(csv_path, "rb") as csv_file:
+                rows_total = sum(1 for _ in iter_csv_rows(csv_file))
+            if rows_total == 0:
+                os.remove(csv_path)
+                return jsonify({"error": "The CSV file is empty"}), 400
+
+            csv_file = open(csv_path, "rb")
+
+            def cleanup() -> None:
+                csv_file.close()
+                os.remove(csv_path)
+
+            job_id = submit_classification_job(iter_csv_rows(csv_file), rows_total, cleanup=cleanup)
+        else:
+            rows = data.get("rows")
+            if not rows or not isinstance(rows, list):
+                return jsonify({"error": "A valid list of rows is required"}), 400
+            rows_total = len(rows)
+            job_id = submit_classification_job(rows, rows_total)
+
+        status_url = url_for(".get_classification_job", job_id=job_id)
+        response = jsonify({"job_id": job_id, "status": JOB_QUEUED, "rows_total": rows_total,
+                            "status_url": status_url})
+        response.headers['Location'] = status_url
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response, 202
+
+    except Exception as e:
+        logger.error(f"Error in processing request: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@scishield_bp2.route("/jobs/<job_id>", methods=["GET"])
+def get_classification_job(job_id: str) -> Tuple:
+    """
+    Report a classification job's progress and a page of its results.
+
+    Args:
+        job_id (str): Job id returned by ``POST /jobs``
+        api_key (str): API key for authentication, from the query string
+        offset (int): Lowest row index to return (default: 0)
+        limit (int): Max results to return (default and cap: JOB_RESULTS_PAGE_SIZE)
+
+    Returns:
+        Tuple: JSON response with the job status, progress (rows and batches done/total,
+        rows_per_second, eta_seconds), run metadata once finished, ``results`` as
+        ``{"index", "prediction"}`` pairs sorted by row index and ``next_offset`` (the row index after
+        the last result), and HTTP status code
+
+    Response Status Codes:
+        - 200: Job found
+        - 404: Unknown or expired job id
+        - 500: Server error or invalid API key
+        - 503: Jobs are not configured
+
+    Notes:
+        Results are partial while the job runs; rows resolve out of order, so a page can have gaps
+        that fill in on later polls. Use ``next_offset`` to page once the job has finished.
+    """
+    try:
+        if request.args.get("api_key") != 'labtools_1273d72650af':
+            return jsonify({"status": "500", "data": {"post": "Error- API Key is Invalid"}}), 500
 
-        return jsonify({"predictions": flattened_predictions})
+        if job_store is None:
+            return jsonify({"error": "Classification jobs are not configured"}), 503
+
+        job = job_store.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        limit = min(max(request.args.get("limit", JOB_RESULTS_PAGE_SIZE, type=int), 1), JOB_RESULTS_PAGE_SIZE)
+        results = job_store.get_results(job_id, offset, limit)
+
+        response = jsonify({
+            **job_progress(job),
+            "results": [{"index": index, "prediction": prediction} for index, prediction in results],
+            "offset": offset,
+            "next_offset": results[-1][0] + 1 if results else offset,
+        })
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
 
     except Exception as e:
         logger.error(f"Error in processing request: {str(e)}")
@@ -0,0 +1,108 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Allow running this script directly from the repository root
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+GROUND_TRUTH_FILE = os.path.join(REPO_ROOT, "data", "inventory_text", "goundtruth_data_full.csv")
+LABEL_COLUMN = "Is it a chemical?"
+SCHEMAS = ("verbose", "compact")
+PREDICTIONS = ("Chemical", "Not a Chemical")
+
+
+def load_ground_truth(path):
+    """Return the inventory rows (without the label column) and whether each is a chemical."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        records = list(csv.DictReader(f))
+    rows = [{key: value for key, value in record.items() if key != LABEL_COLUMN} for record in records]
+    labels = [record[LABEL_COLUMN].strip().lower() == "yes" for record in records]
+    return rows, labels
+
+
+def run_schema(path):
+    """Child process: classify the ground truth with the schema selected by CLASSIFICATION_COMPACT_OUTPUT."""
+    from integrations.scishield.scishield_routes2 import classify_rows
+
+    rows, _ = load_ground_truth(path)
+    start = time.perf_counter()
+    predictions, metadata = classify_rows(rows)
+    elapsed = time.perf_counter() - start
+    json.dump({"predictions": predictions, "metadata": metadata, "seconds": elapsed}, sys.stdout)
+
+
+def classify_with(schema, path):
+    """Classify the ground truth in a fresh process (the schema is chosen at import time)."""
+    env = dict(os.environ, CLASSIFICATION_COMPACT_OUTPUT="true" if schema == "compact" else "false")
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--ground-truth", path],
+                               env=env, stdout=subprocess.PIPE, check=True)
+    return json.loads(completed.stdout)
+
+
+def field_value(prediction, field):
+    """Normalized field value for comparison (missing and null are the same)."""
+    value = prediction.get(field) if isinstance(prediction, dict) else None
+    return None if value is None else str(value).strip().lower()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the verbose and compact Nova reply schemas on the ground truth.")
+    parser.add_argument("--ground-truth", default=GROUND_TRUTH_FILE, help="CSV with an 'Is it a chemical?' Yes/No column")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Largest accuracy drop of the compact schema that still passes")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_schema(args.ground_truth)
+        return True
+
+    rows, labels = load_ground_truth(args.ground_truth)
+    runs = {schema: classify_with(schema, args.ground_truth) for schema in SCHEMAS}
+
+    summary = {}
+    for schema in SCHEMAS:
+        run = runs[schema]
+        predicted = [prediction.get("prediction") if isinstance(prediction, dict) else None
+                     for prediction in run["predictions"]]
+        correct = sum((value == "Chemical") == label for value, label in zip(predicted, labels) if value in PREDICTIONS)
+        unresolved = sum(value not in PREDICTIONS for value in predicted)
+        metadata = run["metadata"]
+        summary[schema] = {"accuracy": correct / len(rows), "unresolved": unresolved}
+        print(f"{schema:8s} accuracy {correct}/{len(rows)} ({correct / len(rows):.1%}), unresolved {unresolved}, "
+              f"{metadata['model_calls']} calls ({metadata.get('rows_per_call')} rows/call), "
+              f"{metadata.get('output_tokens', 0)} output tokens "
+              f"({metadata.get('output_tokens', 0) / max(metadata['unique_rows'], 1):.1f}/row), {run['seconds']:.1f} s")
+
+    verbose, compact = runs["verbose"]["predictions"], runs["compact"]["predictions"]
+    agree = sum(field_value(a, "prediction") == field_value(b, "prediction") for a, b in zip(verbose, compact))
+    print(f"\nSame prediction for {agree}/{len(rows)} rows ({agree / len(rows):.1%})")
+
+    both = [(a, b) for a, b in zip(verbose, compact)
+            if field_value(a, "prediction") == field_value(b, "prediction") == "chemical"]
+    fields = sorted({field for a, b in both for field in list(a) + list(b)} - {"row", "prediction"})
+    if both:
+        print(f"Field agreement over the {len(both)} rows both schemas call Chemical:")
+        for field in fields:
+            same = sum(field_value(a, field) == field_value(b, field) for a, b in both)
+            print(f"  {field:18s} {same}/{len(both)} ({same / len(both):.1%})")
+
+    verbose_tokens = runs["verbose"]["metadata"].get("output_tokens", 0)
+    compact_tokens = runs["compact"]["metadata"].get("output_tokens", 0)
+    if verbose_tokens:
+        print(f"\nOutput tokens: {compact_tokens} compact vs {verbose_tokens} verbose "
+              f"({1 - compact_tokens / verbose_tokens:.1%} fewer)")
+
+    passed = (summary["compact"]["accuracy"] >= summary["verbose"]["accuracy"] - args.tolerance
+              and summary["compact"]["unresolved"] <= summary["verbose"]["unresolved"])
+    print("Compact schema " + ("matches" if passed else "does NOT match") + " the verbose schema on the ground truth")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,124 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Allow running this script directly from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from integrations.scishield.image_preprocess import fit_image, prepare_image
+
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "chemical images")
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp", "*.gif")
+SQUARE_SIZE = 1568
+
+
+def legacy_process_image(image_path: str, final_square_size: int) -> str:
+    """
+    The original ``process_image``: full decode, LANCZOS resize, padded square saved as PNG next to the input.
+    """
+    from PIL import Image
+
+    input_img = Image.open(image_path)
+    original_width, original_height = input_img.size
+    scale_factor = min(final_square_size / original_width, final_square_size / original_height)
+    new_width = int(original_width * scale_factor)
+    new_height = int(original_height * scale_factor)
+    input_img = input_img.resize((new_width, new_height), Image.LANCZOS)
+    output_img = Image.new("RGB", (final_square_size, final_square_size), (0, 0, 0))
+    output_img.paste(input_img, ((final_square_size - new_width) // 2, (final_square_size - new_height) // 2))
+    output_image_name = os.path.splitext(image_path)[0] + "_padded.png"
+    output_img.save(output_image_name)
+    return output_image_name
+
+
+def run_variant(variant: str, image_path: str, workdir: str):
+    """Run one preprocessing variant on one image; returns the output size in bytes."""
+    if variant == "legacy_process_image":
+        # Work on a copy so the _padded.png file does not land in data/
+        copy = os.path.join(workdir, os.path.basename(image_path))
+        shutil.copyfile(image_path, copy)
+        return os.path.getsize(legacy_process_image(copy, SQUARE_SIZE))
+    with open(image_path, "rb") as f:
+        data = f.read()
+    if variant == "process_image":
+        from integrations.scishield.scishield_routes import process_image
+        copy = os.path.join(workdir, os.path.basename(image_path))
+        with open(copy, "wb") as f:
+            f.write(data)
+        process_image(copy, SQUARE_SIZE, False, False)
+        return os.path.getsize(os.path.splitext(copy)[0] + "_padded.png")
+    if variant == "fit_image":
+        return len(fit_image(data, SQUARE_SIZE))
+    if variant == "prepare_image":
+        return len(prepare_image(data, "image/jpeg", "anthropic.claude-3-haiku-20240307-v1:0").data)
+    raise ValueError(f"Unknown variant {variant}")
+
+
+def measure(args):
+    """
+    Time a variant and record its peak memory in a fresh process.
+
+    ru_maxrss only ever grows, so the first run's peak above the process baseline is the variant's
+    peak memory; the remaining runs only contribute timings.
+    """
+    variant, image_path, repeats = args
+    import PIL.Image  # noqa: F401  (load Pillow before taking the baseline)
+    from integrations.scishield import scishield_routes  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        timings = []
+        output_bytes = 0
+        peak_kb = 0
+        for i in range(repeats):
+            started = time.perf_counter()
+            output_bytes = run_variant(variant, image_path, workdir)
+            timings.append((time.perf_counter() - started) * 1000)
+            if i == 0:
+                peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_kb
+    return statistics.median(timings), peak_kb / 1024, output_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare label image preprocessing time and peak memory.")
+    parser.add_argument("--images", default=IMAGE_DIR, help="Directory of sample images")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per image and variant")
+    args = parser.parse_args()
+
+    paths = sorted(path for pattern in IMAGE_PATTERNS for path in glob.glob(os.path.join(args.images, pattern)))
+    if not paths:
+        print(f"No images found in {args.images}")
+        return False
+
+    variants = ["legacy_process_image", "process_image", "fit_image", "prepare_image"]
+    totals = {variant: [] for variant in variants}
+    # One fresh (spawned) process per measurement so peak RSS is not inherited from earlier runs
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1, maxtasksperchild=1) as pool:
+        for path in paths:
+            from PIL import Image
+            with Image.open(path) as image:
+                dimensions = f"{image.width}x{image.height} {image.format}"
+            print(f"{os.path.basename(path)} ({os.path.getsize(path) // 1024} KB, {dimensions})")
+            for variant in variants:
+                median_ms, peak_mb, output_bytes = pool.apply(measure, ((variant, path, args.repeats),))
+                totals[variant].append((median_ms, peak_mb))
+                print(f"  {variant:22s} {median_ms:8.1f} ms  peak +{peak_mb:6.1f} MB  output {output_bytes // 1024} KB")
+
+    print()
+    print(f"Totals over {len(paths)} images (sum of median ms, max peak MB):")
+    for variant in variants:
+        total_ms = sum(ms for ms, _ in totals[variant])
+        max_peak = max(peak for _, peak in totals[variant])
+        print(f"  {variant:22s} {total_ms:8.1f} ms  peak +{max_peak:6.1f} MB")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
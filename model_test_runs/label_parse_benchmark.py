@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import timeit
+
+# Allow running this script directly from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from integrations.scishield.label_extraction import LABEL_MODELS
+from integrations.scishield.label_fields import clean_label_value
+
+OUTPUTS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                            "data", "label_outputs", "sample_outputs.json")
+LEGACY_LABEL_FIELDS = ['Chemical name', 'CAS number', 'Amount', 'Units', 'Lot number', 'Product number', 'Product name', 'Manufacturer']
+LEGACY_CODE_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def legacy_extract_value_from_raw(data_string, field_name):
+    """The original ``extract_value_from_raw``: one freshly built regex per alias per field per call."""
+    field_aliases = {
+        'Chemical name': [r"Chemical name or CAS number", r"Chemical Name"],
+        'CAS number': [r"Chemical name or CAS number", r"CAS Number"],
+        'Amount': [r"Amount"],
+        'Units': [r"Units"],
+        'Lot number': [r"Lot Number"],
+        'Product number': [r"Product Number"],
+        'Product name': [r"Product Name"],
+        'Manufacturer': [r"Manufacturer"]
+    }
+    for alias in field_aliases.get(field_name, [field_name]):
+        pattern = rf'"{alias}":\s*("(.*?)"|null)'
+        match = re.search(pattern, data_string, re.IGNORECASE)
+        if match:
+            return match.group(2) if match.group(2) is not None else "null"
+    return "null"
+
+
+def legacy_extract_value_claude(input_string):
+    """The original ``extract_value_claude``: lower-case, json.loads, then a keys x substrings scan."""
+    key_map = {
+        "chemical": "Chemical Name",
+        "cas": "CAS Number",
+        "amount": "Amount",
+        "unit": "Units",
+        "lot": "Lot Number",
+        "product_num": "Product Number",
+        "product_nam": "Product Name",
+        "manuf": "Manufacturer"
+    }
+    input_dict = json.loads(input_string.lower())
+    output_dict = {}
+    for key, value in input_dict.items():
+        for substring, output_key in key_map.items():
+            if substring in key:
+                output_dict[output_key] = value
+                break
+    return output_dict
+
+
+def legacy_clean_label_value(value):
+    """The original per-value chain of str.replace calls."""
+    if value is not None:
+        value = str(value)
+        return value.replace('"', '').replace('/', '').replace('\\', '').replace('}', '').replace('\n', '').replace('`', '')
+    return 'Null'
+
+
+def legacy_parse(model_key, data_string):
+    """Parse and clean a reply the way the label routes did before the compiled extractor."""
+    if LABEL_MODELS[model_key].provider == "openai":
+        fields = {field: legacy_extract_value_from_raw(data_string, field) for field in LEGACY_LABEL_FIELDS}
+    else:
+        fields = legacy_extract_value_claude(LEGACY_CODE_FENCE.sub("", data_string.strip()))
+    fields['raw output'] = data_string
+    return {key: legacy_clean_label_value(value) for key, value in fields.items()}
+
+
+def current_parse(model_key, data_string):
+    """Parse and clean a reply with the model's configured parser."""
+    fields = LABEL_MODELS[model_key].parse(data_string)
+    fields['raw output'] = data_string
+    return {key: clean_label_value(value) for key, value in fields.items()}
+
+
+def time_parse(parse, model_key, data_string, repeats, number):
+    """Median time of one parse in microseconds, or None if the parser raises."""
+    try:
+        parse(model_key, data_string)
+    except Exception:
+        return None
+    runs = timeit.repeat(lambda: parse(model_key, data_string), repeat=repeats, number=number)
+    return statistics.median(runs) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare label reply parse time of the legacy and compiled extractors.")
+    parser.add_argument("--outputs", default=OUTPUTS_FILE,
+                        help="JSON list of {\"model\": <LABEL_MODELS key>, \"output\": <raw model reply>}")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed repeats per reply")
+    parser.add_argument("--number", type=int, default=2000, help="Parses per repeat")
+    args = parser.parse_args()
+
+    with open(args.outputs, encoding="utf-8") as f:
+        outputs = json.load(f)
+    if not outputs:
+        print(f"No model outputs in {args.outputs}")
+        return False
+
+    legacy_total, current_total, legacy_failures, differences = 0.0, 0.0, 0, 0
+    for i, sample in enumerate(outputs):
+        model_key, data_string = sample["model"], sample["output"]
+        legacy_us = time_parse(legacy_parse, model_key, data_string, args.repeats, args.number)
+        current_us = time_parse(current_parse, model_key, data_string, args.repeats, args.number)
+        current = current_parse(model_key, data_string)
+        if legacy_us is None:
+            legacy_failures += 1
+            status = "legacy parser failed"
+        else:
+            legacy = legacy_parse(model_key, data_string)
+            changed = sorted(key for key in set(legacy) | set(current) if legacy.get(key) != current.get(key))
+            differences += bool(changed)
+            status = "same result" if not changed else f"differs in {', '.join(changed)}"
+            legacy_total += legacy_us
+            current_total += current_us
+        legacy_text = f"{legacy_us:7.1f} us" if legacy_us is not None else "  error   "
+        print(f"{i:3d} {model_key:18s} legacy {legacy_text}  compiled {current_us:7.1f} us  {status}")
+
+    parsed = len(outputs) - legacy_failures
+    print()
+    if parsed:
+        print(f"Mean per reply over {parsed} replies both parsers handle: legacy {legacy_total / parsed:.1f} us, "
+              f"compiled {current_total / parsed:.1f} us ({legacy_total / current_total:.1f}x)")
+    print(f"Replies the legacy parser could not parse: {legacy_failures}; replies with different fields: {differences}")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -4,16 +4,23 @@ import logging
 import random
 import asyncio
 import botocore.config
+import os
+import sys
 from datetime import datetime
 import time
 
+# Allow running this script directly from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from integrations.scishield.bedrock_invoker import get_bedrock_invoker
+from integrations.scishield.retry_policy import DEFAULT_RETRY_POLICY
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure boto3 client with a larger connection pool
-config = botocore.config.Config(max_pool_connections=50)
-client = boto3.client("bedrock-runtime", region_name="us-east-1", config=config)
+# Shared Bedrock client and worker pool, both sized to the botocore connection pool
+invoker = get_bedrock_invoker()
+client = invoker.client
 
 # Replace MODEL_ID with your Nova model ARN
 MODEL_ID = "us.amazon.nova-lite-v1:0"
@@ -95,37 +102,33 @@ async def invoke_model_async(prompt_text, max_retries=3):
     """
     request_payload = construct_request_payload(prompt_text)
 
-    for attempt in range(max_retries):
-        try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.invoke_model(
-                    modelId=MODEL_ID,
-                    body=json.dumps(request_payload),
-                    contentType="application/json",
-                    accept="application/json"
-                )
-            )
-
-            response_body = json.loads(response['body'].read())
-
-            # Extract the model's response
-            if 'output' in response_body and 'message' in response_body['output']:
-                content = response_body['output']['message']['content']
-                if content and 'text' in content[0]:
-                    return content[0]['text']
-                else:
-                    return "No valid text content found in the response."
+    try:
+        response = await DEFAULT_RETRY_POLICY.call(
+            lambda: invoker.run(
+                client.invoke_model,
+                modelId=MODEL_ID,
+                body=json.dumps(request_payload),
+                contentType="application/json",
+                accept="application/json"
+            ),
+            max_attempts=max_retries
+        )
+
+        response_body = json.loads(response['body'].read())
+
+        # Extract the model's response
+        if 'output' in response_body and 'message' in response_body['output']:
+            content = response_body['output']['message']['content']
+            if content and 'text' in content[0]:
+                return content[0]['text']
             else:
-                return {"error": "Invalid response structure", "response": response_body}
+                return "No valid text content found in the response."
+        else:
+            return {"error": "Invalid response structure", "response": response_body}
 
-        except Exception as e:
-            if "ThrottlingException" in str(e):
-                sleep_time = min(2 ** attempt + random.uniform(0, 0.5), 60)
-                await asyncio.sleep(sleep_time)
-            else:
-                logger.error(f"Error invoking model: {e}")
-                return {"error": str(e)}
+    except Exception as e:
+        logger.error(f"Error invoking model: {e}")
+        return {"error": str(e)}
 
 
 async def process_batches(data_list, batch_size=50):
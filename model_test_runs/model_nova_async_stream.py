@@ -7,6 +7,12 @@ import time
 import random
 import asyncio
 import botocore.config
+import os
+import sys
+
+# Allow running this script directly from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from integrations.scishield.json_stream import JsonArrayStreamParser
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -29,19 +35,6 @@ random.shuffle(combined_list)
 # Nova model ID (replace with the correct ID)
 MODEL_ID = "us.amazon.nova-lite-v1:0"
 
-# Helper function to clean and parse JSON response
-def clean_and_parse_json(response_text):
-    if not response_text.strip():
-        logger.error("Empty response received from the model.")
-        return {"error": "Empty response from model", "response": response_text}
-
-    try:
-        return json.loads(response_text)
-    except json.JSONDecodeError as e:
-        logger.error(f"JSON Decode Error: {e}")
-        logger.error(f"Problematic JSON: {response_text}")
-        return {"error": f"JSON Decode Error: {e}", "response": response_text}
-
 async def invoke_model_batch(batch):
     """
     Asynchronous function to invoke the Nova model with a batch of data.
@@ -86,7 +79,9 @@ async def invoke_model_batch(batch):
                 modelId=MODEL_ID,
                 body=json.dumps(request_body)
             )
-            response_text = ""
+            # Parse array elements as they arrive instead of concatenating the whole response
+            parser = JsonArrayStreamParser()
+            results = []
             stream = response.get("body")
             if stream:
                 for event in stream:
@@ -97,11 +92,17 @@ async def invoke_model_batch(batch):
                             chunk_json = json.loads(chunk_str)
                             content_block_delta = chunk_json.get("contentBlockDelta")
                             if content_block_delta:
-                                response_text += content_block_delta.get("delta", {}).get("text", "")
+                                results.extend(parser.feed(content_block_delta.get("delta", {}).get("text", "")))
                         except json.JSONDecodeError as je:
                             logger.error(f"JSON Decode Error in chunk: {je}")
                             logger.error(f"Problematic chunk: {chunk_str}")
-            return clean_and_parse_json(response_text)
+            results.extend(parser.close())
+            if not parser.started:
+                logger.error("No JSON array in the model response.")
+                return {"error": "No JSON array in model response", "batch": batch}
+            if parser.errors:
+                logger.error(f"Skipped {parser.errors} malformed elements in the model response")
+            return results
         except Exception as e:
             if "ThrottlingException" in str(e) and attempt < retries - 1:
                 sleep_time = 2 ** attempt
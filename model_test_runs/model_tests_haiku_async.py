@@ -6,14 +6,21 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import time
 import botocore.config
+import os
+import sys
+
+# Allow running this script directly from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from integrations.scishield.bedrock_invoker import get_bedrock_invoker
+from integrations.scishield.retry_policy import DEFAULT_RETRY_POLICY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure boto3 client with a larger connection pool
-config = botocore.config.Config(max_pool_connections=50)
-client = boto3.client("bedrock-runtime", region_name="us-east-1", config=config)
+# Shared Bedrock client and worker pool, both sized to the botocore connection pool
+invoker = get_bedrock_invoker()
+client = invoker.client
 
 # Replace MODEL_ID with the inference profile ARN
 MODEL_ID = "arn:aws:bedrock:us-east-1:961341512141:inference-profile/us.anthropic.claude-3-5-haiku-20241022-v1:0"
@@ -39,30 +46,25 @@ def clean_and_parse_json(response_text):
 
 async def invoke_with_retries(request_body, max_retries=2):
     """
-    Invoke the model with exponential backoff and jitter.
+    Invoke the model, retrying with the shared backoff policy (full jitter, Retry-After aware).
     """
-    for attempt in range(max_retries):
-        try:
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.invoke_model(
-                    modelId=MODEL_ID,
-                    body=request_body,
-                    contentType="application/json",
-                    accept="application/json"
-                )
-            )
-            response_body = json.loads(response['body'].read().decode('utf-8'))
-            content = response_body.get('content', [{}])[0].get('text', '')
-            return clean_and_parse_json(content)
-        except Exception as e:
-            if "ThrottlingException" in str(e):
-                sleep_time = min(2 ** attempt + random.uniform(0, 0.5), 60)  # Cap at 60 seconds
-                logger.warning(f"Throttling detected. Retrying in {sleep_time:.2f} seconds...")
-                await asyncio.sleep(sleep_time)
-            else:
-                logger.error(f"Error invoking model: {e}")
-                return {"error": str(e)}
+    try:
+        response = await DEFAULT_RETRY_POLICY.call(
+            lambda: invoker.run(
+                client.invoke_model,
+                modelId=MODEL_ID,
+                body=request_body,
+                contentType="application/json",
+                accept="application/json"
+            ),
+            max_attempts=max_retries
+        )
+        response_body = json.loads(response['body'].read().decode('utf-8'))
+        content = response_body.get('content', [{}])[0].get('text', '')
+        return clean_and_parse_json(content)
+    except Exception as e:
+        logger.error(f"Error invoking model: {e}")
+        return {"error": str(e)}
 
 async def invoke_model_async(batch):
     """